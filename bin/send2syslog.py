@@ -14,14 +14,21 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import ctypes
+import ctypes.util
+import errno
 import json
 import logging
 from logging.handlers import SysLogHandler
 from optparse import OptionParser
 import os
 import re
+import select
 import signal
+import socket
+import struct
 import sys
+import tempfile
 import time
 
 
@@ -39,6 +46,17 @@ SysLogHandler.priority_map['EMERG'] = 'emerg'
 rfc5424_format = '{version} {timestamp} {hostname} {appname} {procid}'\
                  ' {msgid} {structured_data} {msg}'
 date_format = '%Y-%m-%dT%H:%M:%SZ'
+# Define how often files are checked without inotify.
+poll_interval = 0.5
+# Define how often all files are checked with inotify. It catches
+# changes on filesystems mounted after watches were added.
+rescan_interval = 10
+# Define how many bytes of file are read and sent at once.
+read_chunk_size = 256 * 1024
+# Define how often read offsets are saved to state file.
+state_save_interval = 1
+# Define timeout of sending to TCP servers.
+tcp_timeout = 10
 # Define global semaphore.
 sending_in_progress = 0
 # Define file types.
@@ -88,6 +106,40 @@ http://.*/images/(product|updates).img: HTTP response code said error',
         }
     ]
 }
+
+
+class LogRules:
+    """LogRules(log_type) => Object with precompiled rules of log type."""
+
+    def __init__(self, log_type):
+        self.level_regex = None
+        self.strip_regex = None
+        self.levels = {}
+        msg_type = msg_levels.get(log_type)
+        if msg_type:
+            self.level_regex = re.compile(msg_type['regex'])
+            self.strip_regex = re.compile(msg_type['regex'] + "\s*:?\s?")
+            self.levels = msg_type['levels']
+        self.relevel = [(r['levelfrom'], re.compile(r['regex']), r['levelto'])
+                        for r in relevel_errors.get(log_type, [])]
+
+    def process(self, line):
+        """Return level and message of line."""
+
+        level = logging.INFO
+        if self.level_regex:
+            match = self.level_regex.match(line)
+            if match:
+                level = self.levels[match.group('level')]
+            # Get rid of duplicated information in anaconda logs
+            line = self.strip_regex.sub("", line)
+        # Ignore meaningless errors
+        for levelfrom, regex, levelto in self.relevel:
+            if level == levelfrom and regex.match(line):
+                level = levelto
+        return level, line
+
+
 # Create a main logger.
 logging.basicConfig(format='%(levelname)s: %(message)s')
 main_logger = logging.getLogger()
@@ -101,37 +153,317 @@ class WatchedFile:
         self.name = name
         self.fo = None
         self.where = 0
+        self.inode = None
+        self.tail = ''
+        self.more = False
 
     def reset(self):
         if self.fo:
             self.fo.close()
             self.fo = None
-            self.where = 0
+        self.where = 0
+        self.inode = None
+        self.tail = ''
 
-    def _checkRewrite(self):
+    @property
+    def offset(self):
+        """Position after the last line returned by readLines."""
+
+        return self.where - len(self.tail)
+
+    def _open(self):
         try:
-            if os.stat(self.name)[6] < self.where:
-                self.reset()
-        except OSError:
-            self.close()
+            self.fo = open(self.name, 'r')
+        except IOError:
+            return False
+        stat = os.fstat(self.fo.fileno())
+        self.inode = (stat.st_dev, stat.st_ino)
+        # Continue from saved offset if it's the same file.
+        self.where = state.getOffset(self.name, self.inode)
+        return True
+
+    def _readAppended(self, flush=False, limit=None):
+        """Return complete lines appended since last read. Incomplete
+        last line is kept until it is finished or flush is set.
+        If limit is set, at most limit bytes are read and self.more
+        tells if there is more data.
+        """
+        if os.fstat(self.fo.fileno()).st_size < self.where:
+            # File was truncated, so read it from the beginning.
+            self.where = 0
+            self.tail = ''
+        self.fo.seek(self.where)
+        if limit:
+            data = self.fo.read(limit)
+            self.more = len(data) == limit
+        else:
+            data = self.fo.read()
+            self.more = False
+        self.where += len(data)
+        lines = (self.tail + data).split('\n')
+        self.tail = lines.pop()
+        if flush and self.tail and not self.more:
+            lines.append(self.tail)
+            self.tail = ''
+        return lines
 
-    def readLines(self):
+    def readLines(self, flush=False, limit=None):
         """Return list of last append lines from file if exist."""
 
-        self._checkRewrite()
-        if not self.fo:
-            try:
-                self.fo = open(self.name, 'r')
-            except IOError:
-                return ()
-        lines = self.fo.readlines()
-        self.where = self.fo.tell()
+        lines = []
+        try:
+            stat = os.stat(self.name)
+            inode = (stat.st_dev, stat.st_ino)
+        except OSError:
+            inode = None
+        if self.fo and inode != self.inode:
+            # File was rotated or removed, so send rest of old file.
+            lines.extend(self._readAppended(flush=True))
+            self.reset()
+        self.more = False
+        if not self.fo and (inode is None or not self._open()):
+            return lines
+        lines.extend(self._readAppended(flush, limit))
         return lines
 
     def close(self):
         self.reset()
 
 
+class PollingWatcher:
+    """Reports that all files should be checked every poll_interval."""
+
+    def wait(self):
+        time.sleep(poll_interval)
+        return None
+
+
+class InotifyWatcher:
+    """InotifyWatcher(filenames) => Object that waits for changes of
+    files with Linux inotify.
+
+    Directories of files are watched, so creation and rotation of
+    files are noticed too. Directories which do not exist yet are
+    watched after they appear, they are looked for every
+    rescan_interval seconds.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    mask = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+            IN_MOVED_TO | IN_CREATE | IN_DELETE)
+    event_format = 'iIII'
+    event_size = struct.calcsize(event_format)
+
+    def __init__(self, names):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'),
+                                use_errno=True)
+        self.fd = self.libc.inotify_init()
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init failed')
+        # Map directory to names of watched files in it.
+        self.dirs = {}
+        for name in names:
+            dirname, basename = os.path.split(os.path.abspath(name))
+            self.dirs.setdefault(dirname, set()).add(basename)
+        self.watches = {}
+        self._addWatches()
+
+    def _addWatches(self):
+        """Rebuild map of watches from scratch. inotify returns the same
+        descriptor for directories which are already watched, directories
+        which appeared or were mounted over get new ones, and directories
+        which do not exist are left out until the next rescan.
+        """
+        self.watches.clear()
+        for dirname in self.dirs:
+            wd = self.libc.inotify_add_watch(self.fd, dirname, self.mask)
+            if wd >= 0:
+                self.watches[wd] = dirname
+        self.rescan_at = time.time() + rescan_interval
+
+    def wait(self):
+        """Wait for changes and return set of changed filenames, or None
+        if all files should be checked.
+        """
+        timeout = self.rescan_at - time.time()
+        if timeout <= 0:
+            # Rescan even if events keep coming, otherwise directories
+            # mounted during steady writes would never be watched.
+            self._addWatches()
+            return None
+        try:
+            ready = select.select([self.fd], [], [], timeout)[0]
+        except select.error as e:
+            if e.args[0] != errno.EINTR:
+                raise
+            return None
+        if not ready:
+            self._addWatches()
+            return None
+        return self._readEvents()
+
+    def _readEvents(self):
+        data = os.read(self.fd, 65536)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = struct.unpack_from(
+                self.event_format, data, offset)
+            offset += self.event_size
+            basename = data[offset:offset + length].rstrip('\0')
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            dirname = self.watches.get(wd)
+            if mask & self.IN_IGNORED:
+                # Watched directory was removed or unmounted.
+                self.watches.pop(wd, None)
+            elif dirname and basename in self.dirs[dirname]:
+                changed.add(os.path.join(dirname, basename))
+        return changed
+
+
+def createWatcher(names):
+    """Return InotifyWatcher or PollingWatcher if inotify is unavailable."""
+
+    try:
+        return InotifyWatcher(names)
+    except (OSError, AttributeError) as e:
+        main_logger and main_logger.warning(
+            'Can not use inotify, files will be polled: %s' % e)
+        return PollingWatcher()
+
+
+class TCPSysLogHandler(SysLogHandler):
+    """TCPSysLogHandler(address) => Handler which sends messages to syslog
+    server over TCP in batches.
+
+    Messages are framed with octet counting as RFC 5425 describes and
+    are buffered until sendBuffer() is called. If sending fails, buffer is
+    kept and connection is reestablished on the next call.
+    """
+
+    def __init__(self, address):
+        logging.Handler.__init__(self)
+        self.address = address
+        self.facility = SysLogHandler.LOG_USER
+        self.sock = None
+        self.buffer = []
+
+    def emit(self, record):
+        msg = '<%d>%s' % (
+            self.encodePriority(self.facility,
+                                self.mapPriority(record.levelname)),
+            self.format(record))
+        if isinstance(msg, unicode):
+            msg = msg.encode('utf-8')
+        self.buffer.append('%d %s' % (len(msg), msg))
+
+    def sendBuffer(self):
+        """Send buffered messages, return True if buffer is empty."""
+
+        if not self.buffer:
+            return True
+        try:
+            if self.sock is None:
+                self.sock = socket.create_connection(self.address,
+                                                     tcp_timeout)
+            self.sock.sendall(''.join(self.buffer))
+        except socket.error as e:
+            main_logger and main_logger.warning(
+                'Can not send logs to %s:%s: %s' % (self.address + (e,)))
+            self._disconnect()
+            return False
+        self.buffer = []
+        return True
+
+    def _disconnect(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def close(self):
+        self._disconnect()
+        logging.Handler.close(self)
+
+
+class OffsetState:
+    """OffsetState(filename) => Object that keeps read offsets of files
+    in state file, so restarts continue from the same place.
+
+    State is disabled if filename is empty. Only offsets of files
+    updated by this instance are written, offsets of other files
+    are taken from state file on every save.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.offsets = self._load()
+        self.own = {}
+        self.changed = False
+        self.saved_at = 0
+
+    def _load(self):
+        if not self.filename:
+            return {}
+        try:
+            with open(self.filename) as fo:
+                return json.load(fo)
+        except (IOError, ValueError):
+            return {}
+
+    def getOffset(self, name, inode):
+        """Return saved offset of file if it has the same inode."""
+
+        saved = self.offsets.get(name)
+        if saved and tuple(saved['inode']) == inode:
+            return saved['offset']
+        return 0
+
+    def update(self, watchedfile):
+        if watchedfile.inode is None:
+            return
+        saved = {'inode': list(watchedfile.inode),
+                 'offset': watchedfile.offset}
+        if self.offsets.get(watchedfile.name) != saved:
+            self.offsets[watchedfile.name] = saved
+            self.own[watchedfile.name] = saved
+            self.changed = True
+
+    def save(self, force=False):
+        """Write offsets to state file not more often than
+        state_save_interval unless force is set.
+        """
+        if not (self.filename and self.changed):
+            return
+        if not force and time.time() - self.saved_at < state_save_interval:
+            return
+        # Other instances may share state file, keep their offsets.
+        self.offsets = self._load()
+        self.offsets.update(self.own)
+        try:
+            # Write new file and rename it, so state is never partial.
+            fd, tmpname = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(self.filename)))
+            with os.fdopen(fd, 'w') as fo:
+                json.dump(self.offsets, fo)
+            os.rename(tmpname, self.filename)
+        except (IOError, OSError) as e:
+            main_logger and main_logger.warning(
+                'Can not save state file %s: %s' % (self.filename, e))
+            return
+        self.changed = False
+        self.saved_at = time.time()
+
+
 class WatchedGroup:
     """Can send data from group of specified files to specified servers."""
 
@@ -139,6 +471,7 @@ class WatchedGroup:
         self.servers = servers
         self.files = files
         self.log_type = files.get('log_type', 'syslog')
+        self.rules = LogRules(self.log_type)
         self.name = name
         self._createLogger()
 
@@ -160,9 +493,14 @@ class WatchedGroup:
         log_format = rfc5424_format.format(**format_dict)
         formatter = logging.Formatter(log_format, date_format)
         # Add log handler for each server.
+        self.tcp_handlers = []
         for server in self.servers:
             port = 'port' in server and server['port'] or 514
-            syslog = SysLogHandler((server["host"], port))
+            if server.get('protocol') == 'tcp':
+                syslog = TCPSysLogHandler((server["host"], port))
+                self.tcp_handlers.append(syslog)
+            else:
+                syslog = SysLogHandler((server["host"], port))
             syslog.setFormatter(formatter)
             logger.addHandler(syslog)
         self.logger = logger
@@ -170,71 +508,76 @@ class WatchedGroup:
         for name in self.files['files']:
             self.watchedfiles.append(WatchedFile(name))
 
-    def send(self):
-        """Send append data from files to servers."""
+    def _sendBuffers(self):
+        """Send data buffered for TCP servers, return True on success."""
 
-        for watchedfile in self.watchedfiles:
-            for line in watchedfile.readLines():
-                line = line.strip()
-                level = self._get_msg_level(line, self.log_type)
-                # Get rid of duplicated information in anaconda logs
-                line = re.sub(
-                    msg_levels[self.log_type]['regex'] + "\s*:?\s?",
-                    "",
-                    line
-                )
-                # Ignore meaningless errors
-                try:
-                    for r in relevel_errors[self.log_type]:
-                        if level == r['levelfrom'] and \
-                                re.match(r['regex'], line):
-                            level = r['levelto']
-                except KeyError:
-                    pass
-                self.logger.log(level, line)
-                main_logger and main_logger.log(
-                    level,
-                    'From file "%s" send: %s' % (watchedfile.name, line)
-                )
+        return all([h.sendBuffer() for h in self.tcp_handlers])
 
-    @staticmethod
-    def _get_msg_level(line, log_type):
-        if log_type in msg_levels:
-            msg_type = msg_levels[log_type]
-            regex = re.match(msg_type['regex'], line)
-            if regex:
-                return msg_type['levels'][regex.group('level')]
-        return logging.INFO
+    def send(self, changed=None, flush=False):
+        """Send append data from files to servers.
+
+        If changed set of filenames is given, other files are skipped.
+        Files are read by chunks, and offsets of files are updated only
+        after chunk is sent. Files are not read while some TCP server
+        doesn't accept data, they are read again on the next rescan.
+        """
+
+        if not self._sendBuffers():
+            return
+        for watchedfile in self.watchedfiles:
+            if changed is not None and \
+                    os.path.abspath(watchedfile.name) not in changed:
+                continue
+            while True:
+                lines = watchedfile.readLines(flush, read_chunk_size)
+                for line in lines:
+                    level, line = self.rules.process(line.strip())
+                    self.logger.log(level, line)
+                    main_logger and main_logger.log(
+                        level,
+                        'From file "%s" send: %s' % (watchedfile.name, line)
+                    )
+                if not self._sendBuffers():
+                    return
+                state.update(watchedfile)
+                if not watchedfile.more:
+                    break
 
 
 def sig_handler(signum, frame):
     """Send all new data when signal arrived."""
 
     if not sending_in_progress:
-        send_all()
+        send_all(flush=True)
+        state.save(force=True)
         exit(signum)
     else:
         config['run_once'] = True
 
 
-def send_all():
+def send_all(changed=None, flush=False):
     """Send any updates."""
 
     for group in watchlist:
-        group.send()
+        group.send(changed, flush)
+    state.save(force=flush)
 
 
 def main_loop():
-    """Periodicaly call sendlogs() for each group in watchlist."""
+    """Call send() for each group in watchlist when files change."""
 
     signal.signal(signal.SIGINT, sig_handler)
     signal.signal(signal.SIGTERM, sig_handler)
+    watcher = createWatcher([watchedfile.name
+                             for group in watchlist
+                             for watchedfile in group.watchedfiles])
+    changed = None
     while watchlist:
-        time.sleep(0.5)
-        send_all()
+        send_all(changed, flush=config['run_once'])
         # If asked to run_once, exit now
         if config['run_once']:
             break
+        changed = watcher.wait()
 
 
 class Config:
@@ -250,8 +593,10 @@ class Config:
         #       "daemon": True,
         #       "run_once": False,
         #       "debug": False,
+        #       "state_file": "/var/tmp/send2syslog.state",  # optional
         #       "watchlist": [
-        #           {"servers": [ {"host": "localhost", "port": 514} ],
+        #           {"servers": [ {"host": "localhost", "port": 514,
+        #                          "protocol": "tcp"} ],
         #            "watchfiles": [
         #               {"tag": "anaconda",
         #                "log_type": "anaconda",
@@ -267,6 +612,7 @@ class Config:
                           "run_once": False,
                           "debug": False,
                           "hostname": cls._getHostname(),
+                          "state_file": None,
                           "watchlist": []
                           }
         # First use default config as running config.
@@ -301,7 +647,8 @@ class Config:
             # If no config file specified use watchlist setting from
             # command line.
             watchlist = {"servers": [{"host": cmdline.host,
-                                      "port": cmdline.port}],
+                                      "port": cmdline.port,
+                                      "protocol": cmdline.protocol}],
                          "watchfiles": [{"tag": cmdline.tag,
                                          "log_type": cmdline.log_type,
                                          "files": cmdline.watchfiles}]}
@@ -314,6 +661,8 @@ class Config:
             config["run_once"] = True
         if cmdline.debug:
             config["debug"] = True
+        if cmdline.state_file is not None:
+            config["state_file"] = cmdline.state_file
         return config
 
     @staticmethod
@@ -344,6 +693,11 @@ class Config:
                           action="store_true", help="Do not daemonize.")
         parser.add_option("-d", "--debug", dest="debug",
                           action="store_true", help="Print debug messages.")
+        parser.add_option("-S", "--state-file", dest="state_file",
+                          metavar="FILE",
+                          help="Keep read offsets in FILE, so restarts"
+                               " continue from the same place (disabled by"
+                               " default).")
 
         parser.add_option("-t", "--tag", dest="tag", metavar="TAG",
                           help="Set tag of sending messages as TAG.")
@@ -359,6 +713,11 @@ class Config:
         parser.add_option("-p", "--port", dest="port", type="int", default=514,
                           metavar="PORT",
                           help="Set remote port as PORT (default: %default).")
+        parser.add_option("-P", "--protocol", dest="protocol",
+                          type="choice", choices=["udp", "tcp"],
+                          default="udp", metavar="PROTOCOL",
+                          help="Send via PROTOCOL: udp or tcp"
+                               " (default: %default).")
 
         options, args = parser.parse_args()
         # Validate gathered options.
@@ -397,9 +756,10 @@ class Config:
         for key in ("daemon", "run_once", "debug"):
             if key in config:
                 cls._checkType(config[key], bool, key)
-        key = "hostname"
-        if key in config:
-            cls._checkType(config[key], basestring, key)
+        if "hostname" in config:
+            cls._checkType(config["hostname"], basestring, "hostname")
+        if config.get("state_file") is not None:
+            cls._checkType(config["state_file"], basestring, "state_file")
 
         key = "watchlist"
         if key in config:
@@ -438,6 +798,12 @@ class Config:
                 key, name = "port", "watchlist[n]  => servers[n] => port"
                 if key in item2:
                     cls._checkType(item2[key], int, name)
+                key = "protocol"
+                name = "watchlist[n]  => servers[n] => protocol"
+                if key in item2 and item2[key] not in ("udp", "tcp"):
+                    main_logger.error("Value of %s in config must be"
+                                      " 'udp' or 'tcp'." % name)
+                    exit(1)
 
             for item2 in item["watchfiles"]:
                 cls._checkType(item2, dict, "watchlist[n]  => watchfiles[n]")
@@ -468,6 +834,8 @@ class Config:
 
 # Create global config.
 config = Config.getConfig()
+# Load read offsets of files.
+state = OffsetState(config["state_file"])
 # Create list of WatchedGroup objects with different log names.
 watchlist = []
 i = 0
@@ -20,6 +20,7 @@ import traceback
 
 from fuel_update_downloader.downloader import Downloader
 from fuel_update_downloader import errors
+from fuel_update_downloader.logger import configure_logger
 
 
 def handle_exception(exc):
@@ -51,6 +52,11 @@ def parse_args():
         help='required free space for upgrade',
         required=True,
         type=int)
+    parser.add_argument(
+        '--workers',
+        help='number of parallel connections',
+        default=1,
+        type=int)
 
     return parser.parse_args()
 
@@ -62,7 +68,8 @@ def run_upgrade(args):
         src_path=args.src,
         dst_path=args.dst,
         checksum=args.checksum,
-        required_free_space=args.size)
+        required_free_space=args.size,
+        workers=args.workers)
 
     downloader.run()
 
@@ -70,6 +77,7 @@ def run_upgrade(args):
 def main():
     """Entry point
     """
+    configure_logger()
     try:
         run_upgrade(parse_args())
     except Exception as exc:
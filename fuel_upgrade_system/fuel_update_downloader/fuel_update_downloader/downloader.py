@@ -17,7 +17,6 @@
 from fuel_update_downloader import errors
 
 from fuel_update_downloader.utils import calculate_free_space
-from fuel_update_downloader.utils import calculate_md5sum
 from fuel_update_downloader.utils import download_file
 
 
@@ -25,25 +24,29 @@ class Downloader(object):
     """Class implements downloading logic
     """
 
-    def __init__(self, src_path, dst_path, required_free_space, checksum):
+    def __init__(self, src_path, dst_path, required_free_space, checksum,
+                 workers=1):
         """Create downloader object
 
         :param src_path: source path
         :param dst_path: destination path
         :param required_free_space: require free space
         :param checksum: checksum of file
+        :param workers: number of parallel connections
         """
         self.src_path = src_path
         self.dst_path = dst_path
         self.required_free_space = required_free_space
         self.checksum = checksum
+        self.workers = workers
 
     def run(self):
         """Run downloading and checkings
         """
         self._check_free_space()
-        download_file(self.src_path, self.dst_path)
-        self._check_checksum()
+        calculated_checksum = download_file(
+            self.src_path, self.dst_path, workers=self.workers)
+        self._check_checksum(calculated_checksum)
 
     def _check_free_space(self):
         """Check `self.dst_path` free space
@@ -58,12 +61,12 @@ class Downloader(object):
                 'required free space - "{2}"'.format(
                     self.dst_path, free_space, self.required_free_space))
 
-    def _check_checksum(self):
-        """Calculate checksum and compare it with `self.checksum`
+    def _check_checksum(self, calculated_checksum):
+        """Compare checksum calculated while downloading
+        with `self.checksum`
 
         :raises: errors.WrongChecksum
         """
-        calculated_checksum = calculate_md5sum(self.dst_path)
         if calculated_checksum != self.checksum:
             raise errors.WrongChecksum(
                 u'File "{0}" has wrong checkum, actual '
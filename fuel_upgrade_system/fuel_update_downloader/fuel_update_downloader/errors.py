@@ -23,3 +23,11 @@ class NotEnoughFreeSpace(FuelUpgradeException):
 
 class WrongChecksum(FuelUpgradeException):
     pass
+
+
+class DownloadError(FuelUpgradeException):
+    pass
+
+
+class IncompleteDownload(DownloadError):
+    pass
@@ -22,7 +22,7 @@ from fuel_update_downloader.downloader import Downloader
 from fuel_update_downloader.tests.base import BaseTestCase
 
 
-@patch('fuel_update_downloader.downloader.download_file')
+@patch('fuel_update_downloader.downloader.download_file', return_value='')
 class TestDownloaderUnit(BaseTestCase):
 
     def default_args(self, **kwargs):
@@ -38,13 +38,13 @@ class TestDownloaderUnit(BaseTestCase):
     @patch(
         'fuel_update_downloader.downloader.calculate_free_space',
         return_value=101)
-    @patch(
-        'fuel_update_downloader.downloader.calculate_md5sum',
-        return_value='')
-    def test_run_without_errors(self, _, __, ___):
-        downloader = Downloader(**self.default_args())
+    def test_run_without_errors(self, _, download_file_mock):
+        downloader = Downloader(**self.default_args(workers=4))
         downloader.run()
 
+        download_file_mock.assert_called_once_with(
+            'file:///tmp/src_file', '/tmp/dst_file', workers=4)
+
     def test_run_error_in_case_if_disk_does_not_have_enough_space(self, _):
         kwargs = self.default_args(required_free_space=1000)
         downloader = Downloader(**kwargs)
@@ -64,10 +64,11 @@ class TestDownloaderUnit(BaseTestCase):
 
         kwargs = self.default_args(required_free_space=1000)
         downloader = Downloader(**kwargs)
+        download_file_mock.return_value = 'wrong_md5_sum'
 
         with patch(
-                'fuel_update_downloader.downloader.calculate_md5sum',
-                return_value='wrong_md5_sum'):
+                'fuel_update_downloader.downloader.calculate_free_space',
+                return_value=1001):
 
             self.assertRaisesRegexp(
                 errors.WrongChecksum,
@@ -14,18 +14,27 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import BaseHTTPServer
+import hashlib
 import os
+import re
+import shutil
+import SocketServer
+import tempfile
+import threading
+import time
 
 import mock
 from mock import patch
 
 from StringIO import StringIO
 
+from fuel_update_downloader import errors
 from fuel_update_downloader.tests.base import BaseTestCase
+from fuel_update_downloader import utils
 from fuel_update_downloader.utils import byte_to_megabyte
 from fuel_update_downloader.utils import calculate_free_space
 from fuel_update_downloader.utils import calculate_md5sum
-from fuel_update_downloader.utils import download_file
 
 
 class FakeFile(StringIO):
@@ -69,19 +78,235 @@ class TestUtils(BaseTestCase):
 
         open_mock.assert_called_once_with(file_path, 'rb')
 
-    def test_download_file(self):
-        content = 'Some content'
-        fake_src = StringIO(content)
-        fake_file = FakeFile('')
-        file_mock = mock.MagicMock(return_value=fake_file)
 
-        src_path = 'http://0.0.0.0:80/tmp/file'
-        dst_path = '/tmp/file'
+class FakeHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """HTTP server which serves `content` on any path in a separate thread.
 
-        with mock.patch('urllib2.urlopen', return_value=fake_src) as url_fake:
-            with mock.patch('__builtin__.open', file_mock):
-                download_file(src_path, dst_path)
+    :param ranges: if False, server ignores Range header
+    :param drop_after: if set, connections are closed after
+                       sending so many bytes
+    """
+
+    daemon_threads = True
+
+    def __init__(self, content, ranges=True, drop_after=None):
+        BaseHTTPServer.HTTPServer.__init__(
+            self, ('127.0.0.1', 0), FakeRequestHandler)
+        self.content = content
+        self.ranges = ranges
+        self.drop_after = drop_after
+        self.requested_ranges = []
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{0}/update.tar'.format(self.server_port)
+
+    def __enter__(self):
+        thread = threading.Thread(
+            target=self.serve_forever, kwargs={'poll_interval': 0.01})
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_HEAD(self):
+        self.send_content(with_body=False)
+
+    def do_GET(self):
+        self.send_content()
+
+    def send_content(self, with_body=True):
+        content = self.server.content
+        start, end = 0, len(content)
+
+        range_header = self.headers.getheader('Range')
+        match = re.match(r'bytes=(\d+)-(\d*)$', range_header or '')
+        if self.command == 'GET':
+            self.server.requested_ranges.append(range_header)
+
+        if match and self.server.ranges:
+            start = int(match.group(1))
+            if match.group(2):
+                end = min(int(match.group(2)) + 1, end)
+            if start >= len(content):
+                self.send_error(416)
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {0}-{1}/{2}'.format(
+                start, end - 1, len(content)))
+        else:
+            self.send_response(200)
+        if self.server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start))
+        self.end_headers()
+
+        if with_body:
+            if self.server.drop_after is not None:
+                end = min(end, start + self.server.drop_after)
+            self.wfile.write(content[start:end])
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownloadFile(BaseTestCase):
+
+    content = os.urandom(5 * 1024 + 100)
+
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+        self.dst_path = os.path.join(self.dir_path, 'update.tar')
+        self.part_path = self.dst_path + '.part'
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def download(self, server, **kwargs):
+        kwargs.setdefault('chunk_size', 1024)
+        return utils.download_file(server.url, self.dst_path, **kwargs)
+
+    def assertDownloaded(self, checksum):
+        self.assertEquals(checksum, hashlib.md5(self.content).hexdigest())
+        with open(self.dst_path, 'rb') as f:
+            self.assertEquals(f.read(), self.content)
+        self.assertFalse(os.path.exists(self.part_path))
+
+    def test_download_file_by_chunks(self):
+        with FakeHTTPServer(self.content) as server:
+            with patch.object(utils, 'calculate_md5sum') as md5_mock:
+                self.assertDownloaded(self.download(server))
+
+        self.assertFalse(md5_mock.called)
+        self.assertEquals(server.requested_ranges, [None])
+
+    def test_resume_partial_file(self):
+        with open(self.part_path, 'wb') as f:
+            f.write(self.content[:2000])
+
+        with FakeHTTPServer(self.content) as server:
+            self.assertDownloaded(self.download(server))
+
+        self.assertEquals(server.requested_ranges, ['bytes=2000-'])
+
+    def test_resume_if_server_does_not_support_ranges(self):
+        with open(self.part_path, 'wb') as f:
+            f.write('garbage')
+
+        with FakeHTTPServer(self.content, ranges=False) as server:
+            self.assertDownloaded(self.download(server))
+
+    def test_restart_if_partial_file_is_bigger(self):
+        with open(self.part_path, 'wb') as f:
+            f.write(self.content + 'garbage')
+
+        with FakeHTTPServer(self.content) as server:
+            self.assertDownloaded(self.download(server))
+
+        self.assertEquals(
+            server.requested_ranges,
+            ['bytes={0}-'.format(len(self.content) + 7), None])
+
+    def test_resume_after_connection_was_closed(self):
+        with FakeHTTPServer(self.content, drop_after=2048) as server:
+            self.assertDownloaded(self.download(server))
+
+        self.assertEquals(
+            server.requested_ranges,
+            [None, 'bytes=2048-5219', 'bytes=4096-5219'])
+
+    @patch.object(utils, 'RETRY_DELAY', 0)
+    def test_error_if_download_does_not_progress(self):
+        with FakeHTTPServer(self.content, drop_after=0) as server:
+            self.assertRaisesRegexp(
+                errors.DownloadError,
+                'Failed to download',
+                self.download, server, retries=2)
+
+        self.assertEquals(len(server.requested_ranges), 3)
+        self.assertFalse(os.path.exists(self.dst_path))
+
+    def test_parallel_download(self):
+        with FakeHTTPServer(self.content) as server:
+            self.assertDownloaded(self.download(server, workers=3))
+
+        self.assertEquals(
+            sorted(server.requested_ranges),
+            ['bytes=0-1739', 'bytes=1740-3479', 'bytes=3480-5219'])
+
+    def test_parallel_download_resumes_segments(self):
+        with FakeHTTPServer(self.content, drop_after=1000) as server:
+            self.assertDownloaded(self.download(server, workers=2))
+
+        self.assertIn('bytes=1000-2609', server.requested_ranges)
+
+    def test_parallel_download_falls_back_without_ranges(self):
+        with FakeHTTPServer(self.content, ranges=False) as server:
+            self.assertDownloaded(self.download(server, workers=3))
+
+        self.assertEquals(server.requested_ranges, [None])
+
+    def test_parallel_download_removes_file_on_error(self):
+        with FakeHTTPServer(self.content, drop_after=0) as server:
+            self.assertRaises(
+                errors.DownloadError,
+                self.download, server, workers=2, retries=0)
+
+        self.assertFalse(os.path.exists(self.part_path))
+
+    def test_progress_is_reported(self):
+        with FakeHTTPServer(self.content) as server:
+            with patch.object(utils, 'REPORT_INTERVAL', 0):
+                with patch.object(utils, 'logger') as logger_mock:
+                    self.download(server)
+
+        messages = [args[0] for args, _ in logger_mock.info.call_args_list]
+        self.assertIn('Downloaded 0.0 of 0.0 MB (19%)', messages[0])
+        self.assertIn('MB/s', messages[0])
+        self.assertIn('Download finished', messages[-1])
+
+
+class TestDownloadFileBenchmark(BaseTestCase):
+    """Downloads file from local server, so only overhead
+    of downloader itself is measured.
+    """
+
+    size = 64 * 1024 ** 2
+
+    # generous limit of throughput, in megabytes per second
+    min_throughput = 20
+
+    @classmethod
+    def setUpClass(cls):
+        cls.content = os.urandom(cls.size)
+        cls.checksum = hashlib.md5(cls.content).hexdigest()
+
+    def setUp(self):
+        self.dir_path = tempfile.mkdtemp()
+        self.dst_path = os.path.join(self.dir_path, 'update.tar')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def check_throughput(self, workers):
+        with FakeHTTPServer(self.content) as server:
+            started_at = time.time()
+            checksum = utils.download_file(
+                server.url, self.dst_path, workers=workers)
+            elapsed = time.time() - started_at
+
+        self.assertEquals(checksum, self.checksum)
+        self.assertGreater(
+            self.size / 1024.0 ** 2 / elapsed, self.min_throughput)
+
+    def test_sequential_download_throughput(self):
+        self.check_throughput(workers=1)
 
-        file_mock.assert_called_once_with(dst_path, 'wb')
-        url_fake.assert_called_once_with(src_path)
-        self.assertEquals(fake_file.getvalue(), content)
+    def test_parallel_download_throughput(self):
+        self.check_throughput(workers=4)
@@ -13,20 +13,369 @@
 #    under the License.
 
 import hashlib
+import httplib
+import logging
 import os
+import socket
+import threading
+import time
 import urllib2
 
+from fuel_update_downloader import errors
 
-def download_file(src, dst, chunk_size=2 ** 20):
-    """Download file
+
+logger = logging.getLogger(__name__)
+
+#: size of chunks which are read from network and written to disk
+CHUNK_SIZE = 2 ** 20
+
+#: timeout of connection and of every read, in seconds
+TIMEOUT = 60
+
+#: delay between retries which don't make progress, in seconds
+RETRY_DELAY = 1
+
+#: how often progress is logged, in seconds
+REPORT_INTERVAL = 10
+
+# errors after which the rest of data can be requested again
+NETWORK_ERRORS = (
+    socket.error,
+    httplib.HTTPException,
+    urllib2.URLError,
+    errors.IncompleteDownload)
+
+
+class ProgressReporter(object):
+    """Logs progress and throughput of downloading not
+    more often than once per `interval` seconds.
+    It's updated from several threads in case of parallel download.
+    """
+
+    def __init__(self, interval=None):
+        #: size of file, None if unknown
+        self.total = None
+        #: bytes of file which are on disk
+        self.done = 0
+        #: bytes received by this process
+        self.transferred = 0
+        self.interval = REPORT_INTERVAL if interval is None else interval
+        self.started_at = time.time()
+        self._reported_at = self.started_at
+        self._lock = threading.Lock()
+
+    @property
+    def throughput(self):
+        """Bytes received per second
+        """
+        elapsed = time.time() - self.started_at
+        return self.transferred / elapsed if elapsed > 0 else 0.0
+
+    def update(self, size):
+        with self._lock:
+            self.done += size
+            self.transferred += size
+            now = time.time()
+            if now - self._reported_at < self.interval:
+                return
+            self._reported_at = now
+        logger.info(u'Downloaded {0}'.format(self))
+
+    def finish(self):
+        logger.info(u'Download finished, {0} in {1:.1f} seconds'.format(
+            self, time.time() - self.started_at))
+
+    def __str__(self):
+        done = u'{0:.1f}'.format(self.done / 1024.0 ** 2)
+        if self.total:
+            done = u'{0} of {1:.1f} MB ({2}%)'.format(
+                done, self.total / 1024.0 ** 2, 100 * self.done // self.total)
+        else:
+            done = u'{0} MB'.format(done)
+        return u'{0}, {1:.1f} MB/s'.format(
+            done, self.throughput / 1024 ** 2)
+
+
+class _Segment(object):
+    """Range of remote file which is written to the same
+    offsets of local file, `end` is None if it's unknown.
+    If `md5` is given, segment must start at the beginning
+    of file and data is hashed while it's downloaded.
+    """
+
+    def __init__(self, src, path, start=0, end=None, md5=None):
+        self.src = src
+        self.path = path
+        self.start = start
+        self.position = start
+        self.end = end
+        self.md5 = md5
+
+    @property
+    def done(self):
+        return self.end is not None and self.position >= self.end
+
+    def fetch(self, chunk_size, progress, notify=None, stopped=None):
+        """Download data from current position till the end
+        of segment with one request
+
+        :raises: one of NETWORK_ERRORS if download was interrupted
+        """
+        try:
+            response = _open(self.src, self.position, self.end)
+        except urllib2.HTTPError as exc:
+            if exc.code != httplib.REQUESTED_RANGE_NOT_SATISFIABLE or \
+                    self.md5 is None:
+                raise
+            logger.warn(u'Partial file "{0}" is bigger than remote one, '
+                        'downloading from scratch'.format(self.path))
+            self._restart()
+            response = _open(self.src)
+
+        if self.position and response.getcode() != httplib.PARTIAL_CONTENT:
+            if self.md5 is None:
+                raise errors.DownloadError(
+                    u'Server does not support range requests, '
+                    'url - "{0}"'.format(self.src))
+            logger.warn(u'Server does not support range requests, '
+                        'downloading "{0}" from scratch'.format(self.src))
+            self._restart()
+
+        if self.md5 is not None:
+            self.end = _get_total_size(response)
+            progress.done, progress.total = self.position, self.end
+
+        with open(self.path, 'r+b') as f:
+            f.seek(self.position)
+            while not self.done:
+                if stopped is not None and stopped.is_set():
+                    return
+                size = chunk_size
+                if self.end is not None:
+                    size = min(size, self.end - self.position)
+                chunk = response.read(size)
+                if not chunk:
+                    break
+                f.write(chunk)
+                # data must be visible for other file objects
+                # before position is moved forward
+                f.flush()
+                if self.md5 is not None:
+                    self.md5.update(chunk)
+                self.position += len(chunk)
+                if notify is not None:
+                    notify()
+                progress.update(len(chunk))
+        response.close()
+
+        if self.end is not None and self.position < self.end:
+            raise errors.IncompleteDownload(
+                u'Connection was closed at byte {0} of {1}'.format(
+                    self.position, self.end))
+
+    def _restart(self):
+        self.position = 0
+        self.md5 = hashlib.md5()
+        open(self.path, 'wb').close()
+
+
+def _open(src, start=0, end=None):
+    request = urllib2.Request(src)
+    if start or end is not None:
+        request.add_header('Range', 'bytes={0}-{1}'.format(
+            start, '' if end is None else end - 1))
+    return urllib2.urlopen(request, timeout=TIMEOUT)
+
+
+def _get_total_size(response):
+    """Size of the whole remote file, None if it's unknown
+    """
+    headers = response.info()
+    content_range = headers.getheader('Content-Range')
+    if content_range:
+        total = content_range.rsplit('/', 1)[-1]
+        return int(total) if total.isdigit() else None
+    length = headers.getheader('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def _get_ranges_size(src):
+    """Size of remote file if server supports range requests,
+    otherwise None
+    """
+    request = urllib2.Request(src)
+    request.get_method = lambda: 'HEAD'
+    try:
+        response = urllib2.urlopen(request, timeout=TIMEOUT)
+    except urllib2.HTTPError:
+        return None
+    response.close()
+    headers = response.info()
+    if headers.getheader('Accept-Ranges') != 'bytes':
+        return None
+    return _get_total_size(response)
+
+
+def _retry(fetch, segment, retries):
+    """Call `fetch` until it finishes without network errors.
+    Attempts which don't move segment forward are retried
+    at most `retries` times in a row.
+    """
+    failures = 0
+    while True:
+        position = segment.position
+        try:
+            return fetch()
+        except urllib2.HTTPError:
+            raise
+        except NETWORK_ERRORS as exc:
+            failures = 1 if segment.position > position else failures + 1
+            if failures > retries:
+                raise errors.DownloadError(
+                    u'Failed to download "{0}": {1}'.format(
+                        segment.src, exc))
+            logger.warn(
+                u'Download of "{0}" was interrupted at byte {1}: {2}, '
+                'retrying'.format(segment.src, segment.position, exc))
+            time.sleep(RETRY_DELAY * (failures - 1))
+
+
+def _download_sequential(src, path, chunk_size, retries, progress):
+    md5 = hashlib.md5()
+    start = 0
+    if os.path.exists(path):
+        start = _update_md5(md5, path, chunk_size)
+        logger.info(u'Resuming download of "{0}" from byte {1}'.format(
+            src, start))
+    else:
+        open(path, 'wb').close()
+
+    segment = _Segment(src, path, start, md5=md5)
+    _retry(lambda: segment.fetch(chunk_size, progress), segment, retries)
+    return segment.md5
+
+
+def _download_parallel(src, path, size, chunk_size, workers, retries,
+                       progress):
+    """Download file with parallel range requests. Workers write
+    their segments into preallocated file, and current thread
+    hashes data as soon as it's downloaded without gaps.
+    """
+    with open(path, 'wb') as f:
+        f.truncate(size)
+    progress.total = size
+
+    step = -(-size // workers)
+    segments = [
+        _Segment(src, path, start, min(start + step, size))
+        for start in xrange(0, size, step)]
+    condition = threading.Condition()
+    stopped = threading.Event()
+    failures = []
+
+    def notify():
+        with condition:
+            condition.notify()
+
+    def work(segment):
+        try:
+            _retry(
+                lambda: segment.fetch(chunk_size, progress, notify, stopped),
+                segment, retries)
+        except Exception as exc:
+            with condition:
+                failures.append(exc)
+                condition.notify()
+
+    def downloaded():
+        for segment in segments:
+            if not segment.done:
+                return segment.position
+        return size
+
+    threads = [
+        threading.Thread(target=work, args=(segment,))
+        for segment in segments]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    md5 = hashlib.md5()
+    hashed = 0
+    try:
+        # unbuffered, so data which isn't downloaded yet is never read
+        with open(path, 'rb', 0) as f:
+            while hashed < size:
+                with condition:
+                    while not failures and downloaded() <= hashed:
+                        condition.wait()
+                    if failures:
+                        raise failures[0]
+                    ready = downloaded()
+                while hashed < ready:
+                    chunk = f.read(min(chunk_size, ready - hashed))
+                    md5.update(chunk)
+                    hashed += len(chunk)
+    except BaseException:
+        stopped.set()
+        for thread in threads:
+            thread.join()
+        # preallocated file can't be resumed
+        os.remove(path)
+        raise
+
+    for thread in threads:
+        thread.join()
+    return md5
+
+
+def download_file(src, dst, chunk_size=CHUNK_SIZE, workers=1, retries=3):
+    """Download file and calculate its checksum on the fly.
+
+    Data is written into file with '.part' suffix which is
+    renamed to `dst` when download is finished. If partial file
+    already exists, only missing data is requested with HTTP
+    Range header. Interrupted downloads are resumed in the same way.
+    With several workers file is downloaded by parallel range
+    requests if server supports them.
 
     :param src: download from
     :param dst: download to
     :param chunk_size: optional parameter, size of chunk
+    :param workers: optional parameter, number of parallel connections
+    :param retries: optional parameter, how many times in a row
+                    interrupted download is retried without progress
+    :returns: md5sum string
     """
-    with open(dst, 'wb') as f:
-        for chunk in urllib2.urlopen(src).read(chunk_size):
-            f.write(chunk)
+    part_path = u'{0}.part'.format(dst)
+    progress = ProgressReporter()
+
+    md5 = None
+    if workers > 1 and not os.path.exists(part_path):
+        size = _get_ranges_size(src)
+        if size is not None and size > chunk_size:
+            md5 = _download_parallel(
+                src, part_path, size, chunk_size, workers, retries, progress)
+    if md5 is None:
+        md5 = _download_sequential(
+            src, part_path, chunk_size, retries, progress)
+
+    os.rename(part_path, dst)
+    progress.finish()
+    return md5.hexdigest()
+
+
+def _update_md5(md5, file_path, chunk_size):
+    """Update `md5` with content of file
+
+    :returns: size of file
+    """
+    size = 0
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            md5.update(chunk)
+            size += len(chunk)
+    return size
 
 
 def calculate_md5sum(file_path, chunk_size=2 ** 20):
@@ -39,11 +388,7 @@ def calculate_md5sum(file_path, chunk_size=2 ** 20):
     # TODO(el): maybe it will be much faster to use
     # linux md5sum command line utility
     md5 = hashlib.md5()
-
-    with open(file_path, 'rb') as f:
-        for chunk in iter(lambda: f.read(chunk_size), b''):
-            md5.update(chunk)
-
+    _update_md5(md5, file_path, chunk_size)
     return md5.hexdigest()
 
 
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import gzip
+import hashlib
+import logging
+import os
+import pipes
+import shutil
+import subprocess
+import time
+
+import yaml
+
+from fuel_upgrade import errors
+from fuel_upgrade.utils import exec_cmd
+from fuel_upgrade.utils import run_parallel
+
+logger = logging.getLogger(__name__)
+
+#: size of chunks which are read from and written to streams
+CHUNK_SIZE = 2 ** 20
+
+
+class ChecksumWriter(object):
+    """File-like object which writes data into `fileobj`
+    and calculates md5 and size of written data
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.md5 = hashlib.md5()
+        self.size = 0
+
+    def write(self, data):
+        self.fileobj.write(data)
+        self.md5.update(data)
+        self.size += len(data)
+
+    def flush(self):
+        self.fileobj.flush()
+
+
+def calculate_md5sum(path):
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def _check_process(process, cmd):
+    process.wait()
+    if process.returncode != 0:
+        raise errors.ExecutedErrorNonZeroExitCode(
+            u'Shell command executed with "{0}" '
+            'exit code: {1} '.format(process.returncode, ' '.join(cmd)))
+
+
+class StreamBackup(object):
+    """Backup of output of command which is compressed
+    and written to archive as soon as it's produced.
+    Restoring passes uncompressed archive to stdin
+    of restore command.
+
+    :param name: name of backup step, also name of archive
+    :param backup_cmd: command which writes data to stdout
+    :param restore_cmd: command which reads data from stdin
+    :param compresslevel: gzip compression level, the fastest
+                          one by default to keep downtime short
+    """
+
+    def __init__(self, name, backup_cmd, restore_cmd, compresslevel=1):
+        self.name = name
+        self.backup_cmd = backup_cmd
+        self.restore_cmd = restore_cmd
+        self.compresslevel = compresslevel
+
+    def backup(self, backup_dir):
+        """Make backup
+
+        :returns: dict with file name, size and md5 of archive
+        """
+        file_name = u'{0}.gz'.format(self.name)
+        logger.debug(u'Execute command "{0}"'.format(
+            ' '.join(self.backup_cmd)))
+        process = subprocess.Popen(self.backup_cmd, stdout=subprocess.PIPE)
+
+        with open(os.path.join(backup_dir, file_name), 'wb') as f:
+            writer = ChecksumWriter(f)
+            archive = gzip.GzipFile(
+                filename='', mode='wb', fileobj=writer,
+                compresslevel=self.compresslevel)
+            for chunk in iter(lambda: process.stdout.read(CHUNK_SIZE), b''):
+                archive.write(chunk)
+            archive.close()
+
+        _check_process(process, self.backup_cmd)
+        return {
+            'file': file_name,
+            'size': writer.size,
+            'md5': writer.md5.hexdigest()}
+
+    def verify(self, backup_dir, record):
+        """Check that archive wasn't damaged
+
+        :raises: errors.WrongChecksum
+        """
+        path = os.path.join(backup_dir, record['file'])
+        if not os.path.exists(path) or \
+                calculate_md5sum(path) != record['md5']:
+            raise errors.WrongChecksum(
+                u'Backup "{0}" is damaged, file "{1}" has wrong '
+                'checksum'.format(self.name, path))
+
+    def restore(self, backup_dir, record):
+        self._pipe_archive(
+            os.path.join(backup_dir, record['file']), self.restore_cmd)
+
+    def _pipe_archive(self, path, cmd):
+        logger.debug(u'Execute command "{0}"'.format(' '.join(cmd)))
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        archive = gzip.open(path, 'rb')
+        try:
+            for chunk in iter(lambda: archive.read(CHUNK_SIZE), b''):
+                process.stdin.write(chunk)
+        finally:
+            archive.close()
+            process.stdin.close()
+        _check_process(process, cmd)
+
+
+class DirectoryBackup(StreamBackup):
+    """Backup of directory to compressed tar archive.
+    Directory is extracted next to the original one and
+    replaced with it at once during restoring.
+    """
+
+    def __init__(self, name, path, compresslevel=1):
+        self.path = os.path.normpath(path)
+        parent, base = os.path.split(self.path)
+        super(DirectoryBackup, self).__init__(
+            name,
+            ['tar', '-cf', '-', '-C', parent, base],
+            None,
+            compresslevel=compresslevel)
+
+    def restore(self, backup_dir, record):
+        staging_dir = u'{0}.restore'.format(self.path)
+        _remove(staging_dir)
+        os.makedirs(staging_dir)
+
+        self._pipe_archive(
+            os.path.join(backup_dir, record['file']),
+            ['tar', '-xpf', '-', '-C', staging_dir])
+        _replace(
+            os.path.join(staging_dir, os.path.basename(self.path)),
+            self.path)
+        os.rmdir(staging_dir)
+
+
+class SnapshotBackup(object):
+    """Snapshot of big directory, e.g. repositories. It takes
+    only time to copy metadata and restoring is a rename.
+
+    By default files are hardlinked, which is safe only when
+    upgrade replaces files instead of modifying them in place,
+    as package managers and rsync do. Snapshot directory must
+    be on the same filesystem as the original one.
+    With `reflink` files are cloned with copy-on-write if
+    filesystem supports it and copied otherwise.
+
+    :param name: name of backup step, also name of snapshot
+    :param path: path to directory
+    :param reflink: use copy-on-write clones instead of hardlinks
+    """
+
+    def __init__(self, name, path, reflink=False):
+        self.name = name
+        self.path = os.path.normpath(path)
+        self.reflink = reflink
+
+    def backup(self, backup_dir):
+        snapshot_path = os.path.join(backup_dir, self.name)
+        _remove(snapshot_path)
+        copy_flags = '-a --reflink=auto' if self.reflink else '-al'
+        exec_cmd(u'cp {0} {1} {2}'.format(
+            copy_flags, pipes.quote(self.path), pipes.quote(snapshot_path)))
+        return {'file': self.name}
+
+    def verify(self, backup_dir, record):
+        snapshot_path = os.path.join(backup_dir, record['file'])
+        if not os.path.isdir(snapshot_path):
+            raise errors.WrongChecksum(
+                u'Backup "{0}" is damaged, directory "{1}" '
+                'does not exist'.format(self.name, snapshot_path))
+
+    def restore(self, backup_dir, record):
+        _replace(os.path.join(backup_dir, record['file']), self.path)
+
+
+def _remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def _replace(src, dst):
+    """Move `src` directory to `dst`, old `dst` is removed
+    only after new one is in place
+    """
+    old_path = u'{0}.old'.format(dst)
+    _remove(old_path)
+    if os.path.lexists(dst):
+        os.rename(dst, old_path)
+    os.rename(src, dst)
+    _remove(old_path)
+
+
+class Backup(object):
+    """Runs backup steps concurrently and writes manifest with
+    checksums of archives and timings of steps to `backup_dir`.
+
+    Rollback is staged: all backups are verified before anything
+    is touched, then snapshots are restored, they are only renamed,
+    and after that archives are restored concurrently.
+
+    :param backup_dir: directory for archives and snapshots
+    :param steps: list of StreamBackup, DirectoryBackup
+                  or SnapshotBackup objects with unique names
+    """
+
+    manifest_name = 'manifest.yaml'
+
+    def __init__(self, backup_dir, steps):
+        self.backup_dir = backup_dir
+        self.steps = steps
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.backup_dir, self.manifest_name)
+
+    def run(self):
+        """Make backup
+
+        :returns: list of records of steps
+        """
+        if not os.path.isdir(self.backup_dir):
+            os.makedirs(self.backup_dir)
+        # manifest is written only when all steps
+        # are finished, restore must not use old one
+        _remove(self.manifest_path)
+
+        records = run_parallel([
+            lambda step=step: self._run_step(step) for step in self.steps])
+
+        with open(self.manifest_path, 'w') as f:
+            yaml.safe_dump(records, f, default_flow_style=False)
+        return records
+
+    def _run_step(self, step):
+        logger.debug(u'Run backup step "{0}"'.format(step.name))
+        started_at = time.time()
+        record = step.backup(self.backup_dir)
+        record.update(
+            name=step.name,
+            time=round(time.time() - started_at, 3))
+        logger.debug(u'Backup step "{0}" finished in {1} seconds'.format(
+            step.name, record['time']))
+        return record
+
+    def restore(self):
+        """Restore backup which is described by manifest
+
+        :raises: errors.WrongChecksum
+        """
+        if not os.path.exists(self.manifest_path):
+            raise errors.WrongChecksum(
+                u'Backup is not finished, manifest "{0}" does not '
+                'exist'.format(self.manifest_path))
+        with open(self.manifest_path) as f:
+            records = dict((r['name'], r) for r in yaml.safe_load(f))
+
+        steps = [s for s in self.steps if s.name in records]
+        run_parallel([
+            lambda step=step: step.verify(
+                self.backup_dir, records[step.name])
+            for step in steps])
+
+        snapshots = [s for s in steps if isinstance(s, SnapshotBackup)]
+        for step in snapshots:
+            logger.debug(u'Restore snapshot "{0}"'.format(step.name))
+            step.restore(self.backup_dir, records[step.name])
+
+        run_parallel([
+            lambda step=step: step.restore(
+                self.backup_dir, records[step.name])
+            for step in steps if step not in snapshots])
+
+
+def master_node_backup(backup_dir):
+    """Backup of data which is changed by upgrade of master node:
+    nailgun database, configuration files and repositories
+    """
+    return Backup(backup_dir, [
+        StreamBackup(
+            'nailgun_db',
+            ['sudo', '-u', 'postgres', 'pg_dump', '--clean', 'nailgun'],
+            ['sudo', '-u', 'postgres', 'psql', '-q', 'nailgun']),
+        DirectoryBackup('etc', '/etc'),
+        SnapshotBackup('repos', '/var/www/nailgun')])
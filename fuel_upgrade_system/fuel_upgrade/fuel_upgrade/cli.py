@@ -15,6 +15,7 @@
 #    under the License.
 
 import argparse
+import os
 import sys
 import traceback
 
@@ -22,6 +23,7 @@ from fuel_upgrade.logger import configure_logger
 # TODO(eli): move to config
 logger = configure_logger('/tmp/file.log')
 
+from fuel_upgrade.backup import master_node_backup
 from fuel_upgrade import errors
 from fuel_upgrade.upgrade import PuppetUpgrader
 from fuel_upgrade.upgrade import Upgrade
@@ -66,7 +68,8 @@ def run_upgrade(args):
         args.src,
         args.dst,
         PuppetUpgrader(args.src),
-        disable_rollback=args.disable_rollback)
+        disable_rollback=args.disable_rollback,
+        backup=master_node_backup(os.path.join(args.dst, 'backup')))
 
     upgrader.run()
 
@@ -19,3 +19,7 @@ class FuelUpgradeException(Exception):
 
 class ExecutedErrorNonZeroExitCode(FuelUpgradeException):
     pass
+
+
+class WrongChecksum(FuelUpgradeException):
+    pass
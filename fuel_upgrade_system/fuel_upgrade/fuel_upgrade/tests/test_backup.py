@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import gzip
+import os
+import shutil
+import tempfile
+import time
+
+import yaml
+
+from fuel_upgrade.backup import Backup
+from fuel_upgrade.backup import calculate_md5sum
+from fuel_upgrade.backup import DirectoryBackup
+from fuel_upgrade.backup import SnapshotBackup
+from fuel_upgrade.backup import StreamBackup
+from fuel_upgrade import errors
+from fuel_upgrade.tests.base import BaseTestCase
+
+
+class TestBackup(BaseTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.backup_dir = os.path.join(self.tmp_dir, 'backup')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, *args):
+        return os.path.join(self.tmp_dir, *args)
+
+    def write_file(self, path, content):
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def read_file(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def make_directory(self, name):
+        self.write_file(self.path(name, 'file'), 'content of file')
+        self.write_file(self.path(name, 'sub', 'file'), 'content of sub')
+
+    def stream_step(self, name='db', content='dump of db'):
+        self.write_file(self.path(name + '.src'), content)
+        return StreamBackup(
+            name,
+            ['cat', self.path(name + '.src')],
+            ['sh', '-c', 'cat > {0}'.format(self.path(name + '.dst'))])
+
+    def test_stream_backup_is_compressed_with_checksum(self):
+        content = 'dump of db\n' * 1000
+        backup = Backup(self.backup_dir, [self.stream_step(content=content)])
+        record, = backup.run()
+
+        archive_path = os.path.join(self.backup_dir, 'db.gz')
+        self.assertEquals(record['file'], 'db.gz')
+        self.assertEquals(record['md5'], calculate_md5sum(archive_path))
+        self.assertEquals(record['size'], os.path.getsize(archive_path))
+        self.assertLess(record['size'], len(content))
+        self.assertEquals(gzip.open(archive_path).read(), content)
+
+        with open(backup.manifest_path) as f:
+            self.assertEquals(yaml.safe_load(f), [record])
+
+    def test_stream_backup_restore(self):
+        backup = Backup(self.backup_dir, [self.stream_step()])
+        backup.run()
+        backup.restore()
+
+        self.assertEquals(self.read_file(self.path('db.dst')), 'dump of db')
+
+    def test_stream_backup_fails_if_command_fails(self):
+        backup = Backup(
+            self.backup_dir, [StreamBackup('db', ['false'], ['true'])])
+
+        self.assertRaises(errors.ExecutedErrorNonZeroExitCode, backup.run)
+        self.assertFalse(os.path.exists(backup.manifest_path))
+
+    def test_directory_backup_restore(self):
+        self.make_directory('etc')
+        backup = Backup(
+            self.backup_dir, [DirectoryBackup('etc', self.path('etc'))])
+        backup.run()
+
+        self.write_file(self.path('etc', 'file'), 'changed by upgrade')
+        self.write_file(self.path('etc', 'new_file'), 'added by upgrade')
+        backup.restore()
+
+        self.assertEquals(
+            self.read_file(self.path('etc', 'file')), 'content of file')
+        self.assertEquals(
+            self.read_file(self.path('etc', 'sub', 'file')), 'content of sub')
+        self.assertFalse(os.path.exists(self.path('etc', 'new_file')))
+        self.assertEquals(sorted(os.listdir(self.tmp_dir)), ['backup', 'etc'])
+
+    def test_snapshot_backup_hardlinks_files(self):
+        self.make_directory('repos')
+        backup = Backup(
+            self.backup_dir, [SnapshotBackup('repos', self.path('repos'))])
+        backup.run()
+
+        self.assertEquals(
+            os.stat(self.path('repos', 'sub', 'file')).st_ino,
+            os.stat(os.path.join(self.backup_dir, 'repos', 'sub', 'file'))
+            .st_ino)
+
+        # upgrade replaces files
+        os.remove(self.path('repos', 'file'))
+        self.write_file(self.path('repos', 'file'), 'new version')
+        backup.restore()
+
+        self.assertEquals(
+            self.read_file(self.path('repos', 'file')), 'content of file')
+        self.assertEquals(
+            sorted(os.listdir(self.tmp_dir)), ['backup', 'repos'])
+
+    def test_snapshot_backup_with_reflink_copies_files(self):
+        self.make_directory('repos')
+        backup = Backup(
+            self.backup_dir,
+            [SnapshotBackup('repos', self.path('repos'), reflink=True)])
+        backup.run()
+
+        # upgrade modifies file in place
+        self.write_file(self.path('repos', 'file'), 'new version')
+        backup.restore()
+
+        self.assertEquals(
+            self.read_file(self.path('repos', 'file')), 'content of file')
+
+    def test_steps_are_run_concurrently(self):
+        steps = [
+            StreamBackup(name, ['sh', '-c', 'sleep 0.5'], ['true'])
+            for name in ('first', 'second', 'third')]
+
+        started_at = time.time()
+        records = Backup(self.backup_dir, steps).run()
+
+        self.assertLess(time.time() - started_at, 1.0)
+        self.assertEquals(
+            [r['name'] for r in records], ['first', 'second', 'third'])
+        for record in records:
+            self.assertGreaterEqual(record['time'], 0.5)
+
+    def test_nothing_is_restored_if_backup_is_damaged(self):
+        self.make_directory('repos')
+        backup = Backup(self.backup_dir, [
+            SnapshotBackup('repos', self.path('repos')),
+            self.stream_step()])
+        backup.run()
+
+        self.write_file(os.path.join(self.backup_dir, 'db.gz'), 'damaged')
+        self.write_file(self.path('repos', 'new_file'), 'added by upgrade')
+
+        self.assertRaisesRegexp(
+            errors.WrongChecksum, 'Backup "db" is damaged', backup.restore)
+        self.assertTrue(os.path.exists(self.path('repos', 'new_file')))
+        self.assertFalse(os.path.exists(self.path('db.dst')))
+
+    def test_restore_without_finished_backup(self):
+        backup = Backup(self.backup_dir, [self.stream_step()])
+
+        self.assertRaisesRegexp(
+            errors.WrongChecksum, 'Backup is not finished', backup.restore)
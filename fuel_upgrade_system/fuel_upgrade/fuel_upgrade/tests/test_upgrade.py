@@ -16,6 +16,7 @@
 
 import mock
 
+from fuel_upgrade import errors
 from fuel_upgrade.tests.base import BaseTestCase
 from fuel_upgrade.upgrade import Upgrade
 
@@ -62,3 +63,49 @@ class TestUpgrade(BaseTestCase):
         engine_mock.backup.assert_called_once_with()
         engine_mock.upgrade.assert_called_once_with()
         self.method_was_not_called(engine_mock.rollback.call_count)
+
+    def test_backup_is_made_and_restored(self):
+        engine_mock = mock.Mock()
+        engine_mock.upgrade.side_effect = Exception('Upgrade failed')
+        backup_mock = mock.Mock()
+        upgrader = Upgrade(**self.default_args(
+            upgrade_engine=engine_mock,
+            backup=backup_mock))
+        upgrader.run()
+
+        engine_mock.backup.assert_called_once_with()
+        backup_mock.run.assert_called_once_with()
+        backup_mock.restore.assert_called_once_with()
+        engine_mock.rollback.assert_called_once_with()
+
+    def test_engine_rollback_runs_if_restore_failed(self):
+        engine_mock = mock.Mock()
+        engine_mock.upgrade.side_effect = Exception('Upgrade failed')
+        backup_mock = mock.Mock()
+        backup_mock.restore.side_effect = Exception('Checksum mismatch')
+        upgrader = Upgrade(**self.default_args(
+            upgrade_engine=engine_mock,
+            backup=backup_mock))
+        upgrader.run()
+
+        backup_mock.restore.assert_called_once_with()
+        engine_mock.rollback.assert_called_once_with()
+
+    def test_phases_are_timed(self):
+        upgrader = Upgrade(**self.default_args())
+        upgrader.run()
+
+        self.assertEquals(
+            [phase for phase, _ in upgrader.timings],
+            ['check_upgrade_opportunity', 'shutdown_services', 'make_backup',
+             'upgrade', 'run_services', 'check_health'])
+
+    def test_failed_phase_is_timed(self):
+        engine_mock = mock.Mock()
+        engine_mock.backup.side_effect = errors.ExecutedErrorNonZeroExitCode(
+            'Backup failed')
+        upgrader = Upgrade(**self.default_args(upgrade_engine=engine_mock))
+
+        self.assertRaises(errors.ExecutedErrorNonZeroExitCode, upgrader.run)
+        self.assertIn('make_backup', dict(upgrader.timings))
+        self.method_was_not_called(engine_mock.upgrade.call_count)
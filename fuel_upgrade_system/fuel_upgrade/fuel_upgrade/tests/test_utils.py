@@ -15,6 +15,7 @@
 #    under the License.
 
 import subprocess
+import time
 
 import mock
 from mock import patch
@@ -22,6 +23,8 @@ from mock import patch
 from fuel_upgrade import errors
 from fuel_upgrade.tests.base import BaseTestCase
 from fuel_upgrade.utils import exec_cmd
+from fuel_upgrade.utils import measure_time
+from fuel_upgrade.utils import run_parallel
 
 
 class TestUtils(BaseTestCase):
@@ -58,3 +61,31 @@ class TestUtils(BaseTestCase):
                 'Shell command executed with "{0}" '
                 'exit code: {1} '.format(return_code, cmd),
                 exec_cmd, cmd)
+
+    def test_run_parallel_returns_results_in_order(self):
+        self.assertEquals(
+            run_parallel([lambda: 1, lambda: 2, lambda: 3]), [1, 2, 3])
+
+    def test_run_parallel_waits_all_and_raises_first_error(self):
+        finished = []
+
+        def fail(message):
+            raise Exception(message)
+
+        def finish():
+            time.sleep(0.1)
+            finished.append(True)
+
+        self.assertRaisesRegexp(
+            Exception, 'first',
+            run_parallel,
+            [finish, lambda: fail('first'), lambda: fail('second')])
+        self.assertEquals(finished, [True])
+
+    def test_measure_time(self):
+        timings = []
+        with patch('time.time', side_effect=[10, 12.5]):
+            with measure_time(timings, 'phase'):
+                pass
+
+        self.assertEquals(timings, [('phase', 2.5)])
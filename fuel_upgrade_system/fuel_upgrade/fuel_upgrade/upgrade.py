@@ -19,6 +19,8 @@ import os
 import traceback
 
 from fuel_upgrade.utils import exec_cmd
+from fuel_upgrade.utils import measure_time
+from fuel_upgrade.utils import run_parallel
 
 logger = logging.getLogger(__name__)
 
@@ -50,13 +52,16 @@ class PuppetUpgrader(object):
 
 class Upgrade(object):
     """Upgrade logic
+
+    Execution time of every phase is stored in `timings`.
     """
 
     def __init__(self,
                  update_path,
                  working_dir,
                  upgrade_engine,
-                 disable_rollback=False):
+                 disable_rollback=False,
+                 backup=None):
 
         logger.debug(
             u'Create Upgrade object with update path "{0}", '
@@ -71,24 +76,36 @@ class Upgrade(object):
         self.working_dir = working_dir
         self.upgrade_engine = upgrade_engine
         self.disable_rollback = disable_rollback
+        self.backup = backup
+        self.timings = []
 
     def run(self):
-        self.before_upgrade()
-
         try:
-            self.upgrade()
-            self.after_upgrade()
-        except Exception as exc:
-            logger.error(u'Upgrade failed: {0}'.format(exc))
-            logger.error(traceback.format_exc())
-            if not self.disable_rollback:
-                self.rollback()
+            self.before_upgrade()
+
+            try:
+                self.run_phase('upgrade')
+                self.after_upgrade()
+            except Exception as exc:
+                logger.error(u'Upgrade failed: {0}'.format(exc))
+                logger.error(traceback.format_exc())
+                if not self.disable_rollback:
+                    self.run_phase('rollback')
+        finally:
+            logger.info(u'Timings of upgrade phases: {0}'.format(
+                ', '.join(
+                    u'{0} - {1:.2f}s'.format(phase, seconds)
+                    for phase, seconds in self.timings)))
+
+    def run_phase(self, name):
+        with measure_time(self.timings, name):
+            getattr(self, name)()
 
     def before_upgrade(self):
         logger.debug('Run before upgrade actions')
-        self.check_upgrade_opportunity()
-        self.shutdown_services()
-        self.make_backup()
+        self.run_phase('check_upgrade_opportunity')
+        self.run_phase('shutdown_services')
+        self.run_phase('make_backup')
 
     def upgrade(self):
         logger.debug('Run upgrade')
@@ -96,12 +113,18 @@ class Upgrade(object):
 
     def after_upgrade(self):
         logger.debug('Run after upgrade actions')
-        self.run_services()
-        self.check_health()
+        self.run_phase('run_services')
+        self.run_phase('check_health')
 
     def make_backup(self):
+        """Backup of upgrade engine and data backup
+        are independent, so they are made concurrently
+        """
         logger.debug('Make backup')
-        self.upgrade_engine.backup()
+        backups = [self.upgrade_engine.backup]
+        if self.backup is not None:
+            backups.append(self.backup.run)
+        run_parallel(backups)
 
     def check_upgrade_opportunity(self):
         """Sends request to nailgun
@@ -120,5 +143,14 @@ class Upgrade(object):
         logger.debug('Check that upgrade passed correctly')
 
     def rollback(self):
+        """Failed restore of data backup is only logged,
+        so upgrade engine rollback is run anyway
+        """
         logger.debug('Run rollback')
+        if self.backup is not None:
+            try:
+                self.backup.restore()
+            except Exception as exc:
+                logger.error(u'Backup restore failed: {0}'.format(exc))
+                logger.error(traceback.format_exc())
         self.upgrade_engine.rollback()
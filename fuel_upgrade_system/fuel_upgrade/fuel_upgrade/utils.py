@@ -16,6 +16,11 @@
 
 import logging
 import subprocess
+import sys
+import threading
+import time
+
+from contextlib import contextmanager
 
 from fuel_upgrade import errors
 
@@ -49,3 +54,49 @@ def exec_cmd(cmd):
             'exit code: {1} '.format(return_code, cmd))
 
     logger.debug(u'Command "{0}" successfully executed'.format(cmd))
+
+
+def run_parallel(funcs):
+    """Call functions in separate threads and wait
+    until all of them are finished
+
+    :param funcs: list of callables without arguments
+    :returns: list of results in the same order
+    :raises: the first error in order of functions
+    """
+    results = [None] * len(funcs)
+    failures = [None] * len(funcs)
+
+    def run(index, func):
+        try:
+            results[index] = func()
+        except Exception:
+            failures[index] = sys.exc_info()
+
+    threads = [
+        threading.Thread(target=run, args=(index, func))
+        for index, func in enumerate(funcs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for failure in failures:
+        if failure is not None:
+            raise failure[0], failure[1], failure[2]
+
+    return results
+
+
+@contextmanager
+def measure_time(timings, name):
+    """Append (`name`, seconds) pair with execution time
+    of the block to `timings` list, even if the block failed
+    """
+    started_at = time.time()
+    try:
+        yield
+    finally:
+        seconds = time.time() - started_at
+        timings.append((name, seconds))
+        logger.debug(u'"{0}" took {1:.2f} seconds'.format(name, seconds))
@@ -0,0 +1,217 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import print_function
+
+import curses
+from functools import partial
+import sys
+from time import sleep
+
+from fuelclient.cli.arguments import get_env_arg
+from fuelclient.cli.client import get_nodes
+from fuelclient.cli.client import json_api_get_request
+from fuelclient.cli.client import json_api_put_request
+from fuelclient.cli.utils import get_bar_for_progress
+from fuelclient.cli.utils import print_to_output
+
+# seconds to wait for changes in one events feed request
+FEED_TIMEOUT = 5
+
+
+class DeployProgressError(Exception):
+    pass
+
+
+def deploy_changes(params):
+    """Deploy changes to environments
+    """
+    put_response = json_api_put_request(
+        "clusters/{0}/changes".format(params.env),
+        {}
+    )
+    print_to_output(put_response, put_response,
+                    print_method=print_deploy_progress)
+
+
+class DeployProgressFactory:
+
+    def __init__(self, deploy_task):
+        self.env = deploy_task["cluster"]
+        self.tid = deploy_task["id"]
+        self.progress = 0
+        self.nodes = []
+        self.cursor = None
+
+    @property
+    def is_not_finished(self):
+        return self.progress != 100 or any(
+            map(lambda n: n["progress"] != 100, self.nodes)
+        )
+
+    @property
+    def normalized_progress(self):
+        return self.progress / 100.0
+
+    def update(self):
+        if self.cursor is None:
+            self.reload()
+            return
+        feed = json_api_get_request(
+            "events/?cursor={0}&cluster_id={1}&topics=task,node"
+            "&timeout={2}".format(self.cursor, self.env, FEED_TIMEOUT)
+        )
+        if feed["reset"]:
+            self.reload()
+            return
+        self.cursor = feed["cursor"]
+        nodes_by_id = dict((n["id"], n) for n in self.nodes)
+        for event in feed["events"]:
+            if event["topic"] == "task" and event["object_id"] == self.tid:
+                self.update_task(event["data"])
+            elif event["topic"] == "node" \
+                    and event["object_id"] in nodes_by_id:
+                nodes_by_id[event["object_id"]].update(
+                    (k, v) for k, v in event["data"].iteritems()
+                    if k in ("status", "progress")
+                )
+        self.update_nodes(self.nodes)
+
+    def reload(self):
+        """Fetch full state. Feed cursor is taken before it,
+        so no changes are missed between requests.
+        """
+        self.cursor = json_api_get_request("events/")["cursor"]
+        self.update_task(json_api_get_request(
+            "tasks/{0}/".format(self.tid)
+        ))
+        self.update_nodes(get_nodes(
+            cluster_id=self.env,
+            fields=("id", "status", "progress")
+        ))
+
+    def update_task(self, task_data):
+        if task_data["status"] == "error":
+            raise DeployProgressError(task_data["message"])
+        self.progress = task_data["progress"]
+
+    def update_nodes(self, nodes):
+        self.nodes = sorted(nodes, key=lambda n: n.get("id"))
+        for _node in self.nodes:
+            _node["norm_progress"] = _node["progress"] / 100.0
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        if self.is_not_finished:
+            # feed request waits for changes on server side,
+            # so we need only initial delay here
+            if self.cursor is None:
+                sleep(0.5)
+            self.update()
+            return self
+        else:
+            raise StopIteration
+
+
+def print_deploy_progress(deploy_task):
+    deploy_process = DeployProgressFactory(deploy_task)
+    try:
+        terminal_screen = curses.initscr()
+        print_deploy_progress_with_terminal(deploy_process, terminal_screen)
+    except curses.error:
+        print_deploy_progress_without_terminal(deploy_process)
+
+
+def print_deploy_progress_without_terminal(deploy_process):
+    print("Deploying changes to environment with id={0}".format(
+        deploy_process.env
+    ))
+    message_len = 0
+    try:
+        for state in deploy_process:
+            sys.stdout.write("\r" * message_len)
+            message_len = 0
+            deployment_message = "[Deployment: {0:4.0%}]".format(
+                state.normalized_progress
+            )
+            sys.stdout.write(deployment_message)
+            message_len += len(deployment_message)
+            for index, _node in enumerate(state.nodes):
+                node_message = "[Node{id:2} {norm_progress:4.0%}]".format(
+                    **_node
+                )
+                message_len += len(node_message)
+                sys.stdout.write(node_message)
+        print("\nFinished deployment!")
+    except DeployProgressError as de:
+        print(de.message)
+
+
+def print_deploy_progress_with_terminal(deploy_process, terminal_screen):
+    scr_width = terminal_screen.getmaxyx()[1]
+    curses.noecho()
+    curses.cbreak()
+    total_progress_bar = partial(get_bar_for_progress, scr_width - 17)
+    node_bar = partial(get_bar_for_progress, scr_width - 28)
+    try:
+        for state in deploy_process:
+            terminal_screen.refresh()
+            terminal_screen.addstr(
+                0, 0,
+                "Deploying changes to environment with id={0}".format(
+                    state.env
+                )
+            )
+            terminal_screen.addstr(
+                1, 0,
+                "Deployment: {0} {1:4.0%}".format(
+                    total_progress_bar(state.progress),
+                    state.normalized_progress
+                )
+            )
+            for index, _node in enumerate(state.nodes):
+                terminal_screen.addstr(
+                    index + 2, 0,
+                    "Node{id:3} {status:13}: {bar} {norm_progress:4.0%}"
+                    .format(bar=node_bar(_node["progress"]), **_node)
+                )
+    except DeployProgressError as de:
+        close_curses()
+        print(de.message)
+    finally:
+        close_curses()
+
+
+def close_curses():
+    curses.echo()
+    curses.nocbreak()
+    curses.endwin()
+
+
+actions = {
+    "deploy-changes": {
+        "action": deploy_changes,
+        "args": [
+            get_env_arg(required=True),
+        ],
+        "examples":
+"""Examples:
+
+    To deploy all applied changes to some environment:
+        fuel --env 1 deploy-changes
+"""
+    }
+}
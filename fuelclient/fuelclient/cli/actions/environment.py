@@ -0,0 +1,201 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import print_function
+
+from fuelclient.cli.arguments import get_delete_arg
+from fuelclient.cli.arguments import get_env_arg
+from fuelclient.cli.arguments import get_list_arg
+from fuelclient.cli.arguments import get_release_arg
+from fuelclient.cli.arguments import get_set_arg
+from fuelclient.cli.client import json_api_delete_request
+from fuelclient.cli.client import json_api_get_request
+from fuelclient.cli.client import json_api_post_request
+from fuelclient.cli.client import json_api_put_request
+from fuelclient.cli.utils import check_for_attributes
+from fuelclient.cli.utils import check_for_one_attribute
+from fuelclient.cli.utils import format_table
+from fuelclient.cli.utils import print_error
+from fuelclient.cli.utils import print_to_output
+
+
+def environment(params):
+    """Create, list and modify currently existing environments(clusters)
+    """
+    if params.create:
+        check_for_attributes(params, ["name", "rel"])
+        data = {
+            "nodes": [],
+            "tasks": [],
+            "name": params.name,
+            "release": int(params.rel)
+        }
+        if params.net.lower() == "nova":
+            data["net_provider"] = "nova_network"
+        else:
+            data["net_provider"] = "neutron"
+            if params.net_segment_type:
+                data["net_segment_type"] = params.net_segment_type
+            else:
+                print_error('"--net-segment-type" must be specified!')
+        cluster_response = json_api_post_request("clusters/", data)
+        cluster_id = cluster_response[u"id"]
+        if params.mode:
+            full_mode = "ha_compact" \
+                if params.mode.lower() == "ha" else "multinode"
+            data = {"mode": full_mode}
+            cluster_response = json_api_put_request(
+                "clusters/{0}/".format(cluster_id),
+                data
+            )
+        print_to_output(
+            cluster_response,
+            "Environment '{name}' with id={id}, mode={mode}"
+            " and network-mode={net_provider} was created!"
+            .format(**cluster_response)
+        )
+    elif params.set:
+        check_for_attributes(params, ["env"])
+        check_for_one_attribute(params, ["name", "mode"])
+        data = {}
+        if params.mode:
+            data["mode"] = "ha_compact" \
+                if params.mode.lower() == "ha" else "multinode"
+        if params.name:
+            data["name"] = params.name
+        put_response = json_api_put_request(
+            "clusters/{0}/".format(params.env),
+            data
+        )
+        msg_templates = []
+        if params.name:
+            msg_templates.append(
+                "Environment with id={id} was renamed to '{name}'."
+            )
+        if params.mode:
+            msg_templates.append(
+                "Mode of environment with id={id} was set to '{mode}'."
+            )
+
+        message = "\n".join(msg_templates).format(
+            id=params.env,
+            name=params.name,
+            mode=params.mode
+        )
+        print_to_output(put_response, message)
+    elif params.delete:
+        check_for_attributes(params, ["env"])
+        delete_response = json_api_delete_request(
+            "clusters/{0}/".format(params.env)
+        )
+        print_to_output(
+            delete_response,
+            "Environment with id={0} was deleted."
+            .format(params.env)
+        )
+    else:
+        acceptable_keys = ["id", "status", "name", "mode",
+                           "release_id", "changes"]
+        data = json_api_get_request("clusters/")
+        if params.env:
+            data = filter(
+                lambda x: x[u"id"] == int(params.env),
+                data
+            )
+        print_to_output(
+            data,
+            format_table(
+                data,
+                acceptable_keys=acceptable_keys,
+                subdict_keys=[("release_id", u"id")]
+            )
+        )
+
+
+actions = {
+    "environment": {
+        "action": environment,
+        "args": [
+        get_env_arg(),
+        get_list_arg("List all available environments."),
+        get_set_arg("Set environment parameters (e.g name, deployment mode)"),
+        get_delete_arg("Delete environment with specific env or name"),
+        get_release_arg("Release id"),
+        {
+            "args": ["-c", "--env-create", "--create"],
+            "params": {
+                "dest": "create",
+                "action": "store_true",
+                "help": "Create a new environment with specific "
+                        "release id and name.",
+                "default": False
+            }
+        }, {
+            "args": ["--name", "--env-name"],
+            "params": {
+                "dest": "name",
+                "action": "store",
+                "type": str,
+                "help": "environment name",
+                "default": None
+            }
+        }, {
+            "args": ["-m", "--mode", "--deployment-mode"],
+            "params": {
+                "dest": "mode",
+                "action": "store",
+                "choices": ["multinode", "ha"],
+                "help": "Set deployment mode for specific environment.",
+                "default": False
+            }
+        }, {
+            "args": ["-n", "--net", "--network-mode"],
+            "params": {
+                "dest": "net",
+                "action": "store",
+                "choices": ["nova", "neutron"],
+                "help": "Set network mode for specific environment.",
+                "default": "nova"
+            }
+        }, {
+            "args": ["--nst", "--net-segment-type"],
+            "params": {
+                "dest": "net_segment_type",
+                "action": "store",
+                "choices": ["gre", "vlan"],
+                "help": "Set network segment type",
+                "default": False
+            }
+        }],
+        "examples":
+"""Examples:
+
+    Print all available environments:
+        fuel env
+
+    To create an environment with name MyEnv and release id=1 run:
+        fuel env create --name MyEnv --rel 1
+
+    By default it creates environment in multinode mode, and nova network mode,
+    to specify other modes you can add optional arguments:
+        fuel env create --name MyEnv --rel 1 --mode ha --network-mode neutron
+
+    For changing environments name, mode or network mode exists set action:
+        fuel --env 1 env set --name NewEmvName --mode ha_compact
+
+    To delete the environment:
+        fuel --env 1 env delete
+"""
+    }
+}
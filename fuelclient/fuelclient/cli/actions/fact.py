@@ -0,0 +1,171 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import print_function
+
+import os
+import shutil
+
+from fuelclient.cli.arguments import get_args_for_facts
+from fuelclient.cli.client import json_api_delete_request
+from fuelclient.cli.client import json_api_get_request
+from fuelclient.cli.client import json_api_put_request
+from fuelclient.cli.utils import folder_or_one_up
+from fuelclient.cli.utils import listdir_without_extensions
+from fuelclient.cli.utils import print_error
+from fuelclient.cli.utils import read_from_file
+from fuelclient.cli.utils import write_to_file
+
+
+def provisioning(params):
+    """Show computed provisioning facts for orchestrator
+    """
+    fact(params, "provisioning")
+
+
+def deployment(params):
+    """Show computed deployment facts for orchestrator
+    """
+    fact(params, "deployment")
+
+
+def fact(params, info_type):
+    dir_name = os.path.join(
+        os.path.abspath(params.dir or os.path.curdir),
+        "{0}_{1}".format(info_type, params.env)
+    )
+    facts_default_url = "clusters/{0}/orchestrator/{1}/defaults".format(
+        params.env,
+        info_type
+    )
+    if params.node:
+        facts_default_url += "/?nodes=" + ",".join(map(str, params.node))
+    facts_url = "clusters/{0}/orchestrator/{1}/".format(
+        params.env,
+        info_type
+    )
+    if params.default:
+        facts = json_api_get_request(facts_default_url)
+        write_facts_to_dir(facts, dir_name)
+    elif params.upload:
+        json_api_put_request(
+            facts_url,
+            read_deployment_info(dir_name)
+            if info_type == "deployment" else
+            read_provisioning_info(dir_name)
+        )
+        print("{0} facts uploaded from {1}.".format(info_type, dir_name))
+    elif params.delete:
+        json_api_delete_request(facts_url)
+        print("{0} facts deleted.".format(info_type))
+    else:
+        facts = json_api_get_request(facts_url)
+        if not facts:
+            print(
+                "Environment with id={0} has no {1} info."
+                .format(params.env, info_type)
+            )
+            return
+        if params.download:
+            write_facts_to_dir(facts, dir_name)
+
+
+def read_provisioning_info(dir_name):
+    dir_name = folder_or_one_up(dir_name)
+    if not any(map(lambda f: "engine" in f, os.listdir(dir_name))):
+        print_error(
+            "engine file was not found in {0}"
+            .format(dir_name)
+        )
+    try:
+        node_facts = map(
+            lambda f: read_from_file(f)[0],
+            [os.path.join(dir_name, fact_file)
+             for fact_file in listdir_without_extensions(dir_name)
+             if "engine" != fact_file]
+        )
+        engine, _ = read_from_file(os.path.join(dir_name, "engine"))
+        return {
+            "engine": engine,
+            "nodes": node_facts
+        }
+    except OSError:
+        print_error(
+            "Directory {0} doesn't exist."
+            .format(dir_name)
+        )
+
+
+def read_deployment_info(dir_name):
+    dir_name = folder_or_one_up(dir_name)
+    try:
+        return map(
+            lambda f: read_from_file(f)[0],
+            [os.path.join(dir_name, json_file)
+             for json_file in listdir_without_extensions(dir_name)]
+        )
+    except OSError:
+        print_error(
+            "Directory {0} doesn't exist."
+            .format(dir_name)
+        )
+
+
+def write_facts_to_dir(facts, dir_name):
+    if os.path.exists(dir_name):
+        shutil.rmtree(dir_name)
+        print("old directory {0} was removed".format(dir_name))
+    os.makedirs(dir_name)
+    print("directory {0} was created".format(dir_name))
+    if isinstance(facts, dict):
+        engine_file_path = os.path.join(dir_name, "engine")
+        engine_file_path = write_to_file(engine_file_path, facts["engine"])
+        print("Created {0}".format(engine_file_path))
+        facts = facts["nodes"]
+        name_template = "{name}"
+    else:
+        name_template = "{role}_{uid}"
+    for _fact in facts:
+        fact_path = os.path.join(
+            dir_name,
+            name_template.format(**_fact)
+        )
+        fact_path = write_to_file(fact_path, _fact)
+        print("Created {0}".format(fact_path))
+
+
+actions = {}
+for fact_type in (deployment, provisioning):
+    actions[fact_type.__name__] = {
+        "action": fact_type,
+        "args": get_args_for_facts(fact_type.__name__),
+        "examples":
+"""Examples:
+
+    To download {func} information for some environment:
+        fuel --env 1 {func} --download
+
+    To get default {func} information for some environment:
+        fuel --env 1 {func} --default
+
+    To upload {func} information for some environment:
+        fuel --env 1 {func} --upload
+
+    It's possible to get default {func} information just for some nodes:
+        fuel --env 1 {func} --default --node 1,2,3
+
+    Also {func} information can be left or taken from specific directory:
+        fuel --env 1 {func} --upload --dir path/to/some/directory
+""".format(func=fact_type.__name__)
+    }
@@ -0,0 +1,146 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import print_function
+
+from itertools import chain
+from operator import itemgetter
+from time import sleep
+
+from fuelclient.cli.arguments import get_env_arg
+from fuelclient.cli.arguments import get_force_arg
+from fuelclient.cli.arguments import get_list_arg
+from fuelclient.cli.arguments import SetAction
+from fuelclient.cli.client import json_api_get_request
+from fuelclient.cli.client import json_ostf_get_request
+from fuelclient.cli.client import json_ostf_post_request
+from fuelclient.cli.utils import format_table
+from fuelclient.cli.utils import print_error
+from fuelclient.cli.utils import print_to_output
+
+
+def health_check(params):
+    """Run health check on environment
+    """
+    test_sets = json_ostf_get_request(
+        'testsets/{0}'.format(params.env)
+    )
+    if params.list:
+        print_to_output(test_sets, format_table(test_sets))
+    else:
+        cluster = json_api_get_request("clusters/{0}/".format(params.env))
+        if cluster["is_customized"] and not params.force:
+            print_error(
+                "Environment deployment facts were updated. "
+                "Health check is likely to fail because of "
+                "that. Use --force flag to proceed anyway."
+            )
+        params.check = params.check or set(ts["id"] for ts in test_sets)
+        tests_data = map(
+            lambda testset: {
+                "testset": testset,
+                "metadata": {
+                    "config": {},
+                    "cluster_id": params.env
+                }
+            },
+            list(params.check)
+        )
+        json_ostf_post_request(
+            "testruns",
+            tests_data
+        )
+        tests_state = json_ostf_get_request(
+            "testruns/last/{0}".format(params.env)
+        )
+        print_to_output(tests_state, params, print_method=print_health_check)
+
+
+def print_health_check(params):
+    tests_states = [{"status": "not finished"}]
+    finished_tests = set()
+    test_counter, total_tests_count = 1, None
+    while not all(map(
+            lambda t: t["status"] == "finished",
+            tests_states
+    )):
+        tests_states = json_ostf_get_request(
+            "testruns/last/{0}".format(params.env)
+        )
+        all_tests = list(chain(*map(
+            itemgetter("tests"),
+            filter(
+                lambda x: x["testset"] in params.check,
+                tests_states
+            ))))
+        if total_tests_count is None:
+            total_tests_count = len(all_tests)
+        all_finished_tests = filter(
+            lambda t: "running" not in t["status"],
+            all_tests
+        )
+        new_finished_tests = filter(
+            lambda t: t["name"] not in finished_tests,
+            all_finished_tests
+        )
+        finished_tests.update(
+            map(
+                itemgetter("name"),
+                new_finished_tests
+            )
+        )
+        for test in new_finished_tests:
+            print(
+                "[{0:2} of {1}] [{status}] '{name}' "
+                "({taken:.4} s) {message}".format(
+                    test_counter,
+                    total_tests_count,
+                    **test
+                )
+            )
+            test_counter += 1
+        sleep(1)
+
+
+actions = {
+    "health": {
+        "action": health_check,
+        "args": [
+            get_env_arg(required=True),
+            get_list_arg("List all available checks"),
+            get_force_arg(),
+            {
+                "args": ["--check"],
+                "params": {
+                    "dest": "check",
+                    "type": lambda v: v.split(','),
+                    "action": SetAction,
+                    "help": "Run check for some testset.",
+                    "default": None
+                }
+            }
+        ],
+        "examples":
+"""Examples:
+
+    To list all health check test sets:
+        fuel health
+    or:
+        fuel --env 1 health --list
+
+    To run some health checks:
+        fuel --env 1 health --check smoke,sanity
+"""
+    }
+}
@@ -0,0 +1,66 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import print_function
+
+from fuelclient.cli.arguments import get_env_arg
+from fuelclient.cli.client import json_api_put_request
+from fuelclient.cli.utils import print_to_output
+
+
+def stop(params):
+    """Stop deployment process for specific environment
+    """
+    intercept_deploy(params, "stop")
+
+
+def reset(params):
+    """Reset deployed process for specific environment
+    """
+    intercept_deploy(params, "reset")
+
+
+def intercept_deploy(params, method):
+    url_template_map = {
+        "stop": 'clusters/{0}/stop_deployment/',
+        "reset": 'clusters/{0}/reset/',
+    }
+    inflect = lambda w: w + w[-1] + "ing"
+    intercept_task = json_api_put_request(
+        url_template_map[method].format(params.env),
+        data={}
+    )
+    print_to_output(
+        intercept_task,
+        "{0} of environment with id={1} started. To check task status run"
+        " 'fuel task -t {2}'.".format(
+            inflect(method).title(),
+            params.env,
+            intercept_task["id"]
+        )
+    )
+
+
+actions = {}
+for func in (stop, reset):
+    actions[func.__name__] = {
+        "action": func,
+        "args": [get_env_arg(required=True)],
+        "examples":
+"""Examples:
+
+    To {func} some environment:
+        fuel --env 1 {func}
+""".format(func=func.__name__)
+    }
@@ -0,0 +1,99 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import print_function
+
+import os
+
+from fuelclient.cli.arguments import get_dir_arg
+from fuelclient.cli.arguments import get_download_arg
+from fuelclient.cli.arguments import get_env_arg
+from fuelclient.cli.arguments import get_upload_arg
+from fuelclient.cli.arguments import get_verify_arg
+from fuelclient.cli.client import json_api_get_request
+from fuelclient.cli.client import json_api_put_request
+from fuelclient.cli.utils import check_for_one_attribute
+from fuelclient.cli.utils import print_to_output
+from fuelclient.cli.utils import read_from_file
+from fuelclient.cli.utils import write_to_file
+
+
+def network(params):
+    """Show or modify network settings of specific environments
+    """
+    cluster = json_api_get_request("clusters/{0}/".format(params.env))
+    network_url = "clusters/{0}/network_configuration/{1}".format(
+        params.env,
+        cluster["net_provider"]
+    )
+    network_data = json_api_get_request(network_url)
+    network_file_path = os.path.join(
+        os.path.abspath(params.dir or os.path.curdir),
+        "network_{0}".format(params.env)
+    )
+    check_for_one_attribute(params, ["upload", "verify", "download"])
+    if params.upload:
+        data, network_file_path = read_from_file(network_file_path)
+        put_response = json_api_put_request(
+            network_url,
+            data
+        )
+        print_to_output(
+            put_response,
+            "Network configuration from {0} uploaded."
+            .format(network_file_path)
+        )
+    elif params.verify:
+        verify_url = network_url + "/verify"
+        put_response = json_api_put_request(verify_url, network_data)
+        print_to_output(
+            put_response,
+            "Verification status is '{status}'. message: {message}"
+            .format(**put_response)
+        )
+    elif params.download:
+        network_file_path = write_to_file(network_file_path,
+                                          network_data)
+        print(
+            "Network configuration for environment with id={0}"
+            " downloaded to {1}"
+            .format(params.env, network_file_path)
+        )
+
+
+actions = {
+    "network": {
+        "action": network,
+        "args": [
+            get_env_arg(required=True),
+            get_download_arg("Download current network configuration."),
+            get_dir_arg("Directory with network data."),
+            get_verify_arg("Verify current network configuration."),
+            get_upload_arg("Upload changed network configuration.")
+        ],
+        "examples":
+"""Examples:
+
+    To download network configuration in this directory for some environment:
+        fuel --env 1 network --download
+
+    To upload network configuration from some directory for some environment:
+        fuel --env 1 network --upload --dir path/to/derectory
+
+    To verify network configuration from some directory for some environment:
+        fuel --env 1 network --verify --dir path/to/derectory
+
+"""
+    }
+}
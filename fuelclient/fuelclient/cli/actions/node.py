@@ -0,0 +1,375 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import print_function
+
+from itertools import groupby
+import os
+
+from fuelclient.cli.arguments import get_default_arg
+from fuelclient.cli.arguments import get_delete_arg
+from fuelclient.cli.arguments import get_dir_arg
+from fuelclient.cli.arguments import get_download_arg
+from fuelclient.cli.arguments import get_env_arg
+from fuelclient.cli.arguments import get_force_arg
+from fuelclient.cli.arguments import get_list_arg
+from fuelclient.cli.arguments import get_node_arg
+from fuelclient.cli.arguments import get_set_arg
+from fuelclient.cli.arguments import get_upload_arg
+from fuelclient.cli.arguments import SetAction
+from fuelclient.cli.client import get_nodes
+from fuelclient.cli.client import json_api_get_request
+from fuelclient.cli.client import json_api_post_request
+from fuelclient.cli.client import json_api_put_request
+from fuelclient.cli.client import parallel_map
+from fuelclient.cli import utils
+from fuelclient.cli.utils import check_for_attributes
+from fuelclient.cli.utils import check_for_one_attribute
+from fuelclient.cli.utils import folder_or_one_up
+from fuelclient.cli.utils import format_table
+from fuelclient.cli.utils import print_error
+from fuelclient.cli.utils import print_to_output
+from fuelclient.cli.utils import read_from_file
+from fuelclient.cli.utils import write_to_file
+
+
+def node(params):
+    """List and assign available nodes to environments
+    """
+    node_ids = params.node
+    if params.set:
+        check_for_attributes(params, ["node", "role", "env"])
+        roles = map(str.lower, params.role)
+        data = [{'id': _node_id, 'roles': roles} for _node_id in node_ids]
+        post_response = json_api_post_request(
+            "clusters/{0}/assignment/".format(params.env),
+            data
+        )
+        print_to_output(
+            post_response,
+            "Nodes {0} with roles {1} "
+            "were added to environment {2}"
+            .format(node_ids, roles, params.env)
+        )
+    elif params.delete:
+        check_for_one_attribute(params, ["env", "node"])
+        if not params.node and params.env:
+            if params.all:
+                node_ids = [
+                    n["id"] for n in
+                    get_nodes(cluster_id=params.env, fields=("id",))
+                ]
+                if not node_ids:
+                    print_error(
+                        "Environment with id={0} doesn't have nodes to remove."
+                        .format(params.env)
+                    )
+            else:
+                print_error(
+                    "You have to select which nodes to remove with --node-id."
+                    "  Try --all for removing all nodes."
+                )
+            json_api_post_request(
+                "clusters/{0}/unassignment/".format(params.env),
+                [{"id": n} for n in node_ids]
+            )
+            print_to_output({},
+                            "Nodes with ids {0} were removed "
+                            "from environment with id {1}."
+                            .format(node_ids, params.env))
+        else:
+            if params.env:
+                clusters_removable_nodes_map = [(params.env, node_ids)]
+            else:
+                nodes_clusters = dict(
+                    (n["id"], n["cluster"])
+                    for n in get_nodes(ids=node_ids, fields=("id", "cluster"))
+                )
+                for n_id in node_ids:
+                    if n_id not in nodes_clusters:
+                        print_error(
+                            "Node with id={0} was not found.".format(n_id)
+                        )
+                get_cluster_id_by_node_id = nodes_clusters.get
+                clusters_removable_nodes_map = groupby(
+                    sorted(node_ids, key=get_cluster_id_by_node_id),
+                    get_cluster_id_by_node_id
+                )
+            for cluster_id, nodes in clusters_removable_nodes_map:
+                nodes = list(nodes)
+                json_api_post_request(
+                    "clusters/{0}/unassignment/".format(cluster_id),
+                    [{"id": n} for n in nodes]
+                )
+                print_to_output({},
+                                "Nodes with ids {0} were removed "
+                                "from environment with id {1}."
+                                .format(nodes, cluster_id))
+    elif params.network or params.disk:
+        check_for_one_attribute(params, ["default", "download", "upload"])
+        check_for_attributes(params, ["node"])
+        if params.network:
+            get_node_attribute(
+                params,
+                node_ids,
+                "interfaces",
+                [("interfaces", "default_assignment")]
+            )
+        elif params.disk:
+            get_node_attribute(
+                params,
+                node_ids,
+                "disks",
+                [("disks", "defaults")]
+            )
+    elif any((params.default, params.download, params.upload)):
+        print('"--default", "--download" or "--upload" '
+              'must appear after "--disk" or "--network" flags.')
+    elif params.deploy or params.provision:
+        check_for_attributes(params, ["node", "env"])
+        node_ids = map(str, node_ids)
+        mode = "deploy" if params.deploy else "provision"
+        deploy_nodes_url = "clusters/{0}/{1}/?nodes={2}".format(
+            params.env,
+            mode,
+            ','.join(node_ids)
+        )
+        data = json_api_put_request(
+            deploy_nodes_url,
+            {}
+        )
+        print_to_output(
+            data,
+            "Started {0}ing nodes [{1}]."
+            .format(mode, ", ".join(node_ids))
+        )
+    else:
+        acceptable_keys = ["id", "status", "name", "cluster", "ip",
+                           "mac", "roles", "pending_roles", "online"]
+        # all fields are printed in json and yaml formats
+        fields = None if utils.JSON or utils.YAML else acceptable_keys
+        if params.env:
+            data = get_nodes(cluster_id=params.env, fields=fields)
+        elif params.node:
+            data = get_nodes(ids=node_ids, fields=fields)
+        else:
+            data = get_nodes(fields=fields)
+        print_to_output(
+            data,
+            format_table(data, acceptable_keys=acceptable_keys)
+        )
+
+
+def get_node_attribute(params, node_ids, upload_attribute, attributes):
+    """Upload, download or get default attribute of several nodes.
+    Files are checked and read before any request is sent.
+    Requests for different nodes are sent concurrently,
+    messages are printed in order of nodes.
+    """
+    default_url_template = "nodes/{0}/{1}/{2}"
+    base_dir = os.path.abspath(params.dir or os.path.curdir)
+    if params.upload:
+        uploads = []
+        for node_id in node_ids:
+            dir_path = folder_or_one_up(
+                os.path.join(base_dir, "node_{0}".format(node_id))
+            )
+            if not os.path.exists(dir_path):
+                print_error(
+                    "Folder {0} doesn't contain node folder '{1}'"
+                    .format(dir_path, "node_{0}".format(node_id))
+                )
+            uploads.append((
+                default_url_template.format(node_id, upload_attribute, ""),
+                node_id,
+                read_node_attribute(dir_path, upload_attribute),
+                upload_attribute
+            ))
+        messages = parallel_map(
+            lambda args: [upload_node_attribute(*args)],
+            uploads
+        )
+    elif params.default or params.download:
+        downloads = []
+        for node_id in node_ids:
+            dir_path = os.path.join(base_dir, "node_{0}".format(node_id))
+            if not os.path.exists(dir_path):
+                os.makedirs(dir_path)
+            downloads.append([
+                (
+                    default_url_template.format(
+                        node_id,
+                        attribute,
+                        default_tail if params.default else ""
+                    ),
+                    dir_path,
+                    attribute
+                ) for attribute, default_tail in attributes
+            ])
+        messages = parallel_map(
+            lambda node_downloads: [
+                write_node_attribute(*args) for args in node_downloads
+            ],
+            downloads
+        )
+    for node_messages in messages:
+        for message in node_messages:
+            print(message)
+
+
+def read_node_attribute(node_dir_path, attribute):
+    return read_from_file(
+        os.path.join(
+            node_dir_path,
+            attribute
+        )
+    )[0]
+
+
+def upload_node_attribute(url, node_id, data, attribute):
+    if attribute == "interfaces":
+        url = "nodes/interfaces"
+        data = [{
+            "interfaces": data,
+            "id": node_id
+        }]
+    json_api_put_request(
+        url,
+        data
+    )
+    return "{0} configuration uploaded.".format(attribute)
+
+
+def write_node_attribute(url, node_dir_path, attribute):
+    attribute_path = os.path.join(
+        node_dir_path,
+        attribute
+    )
+    get_response = json_api_get_request(url)
+    if os.path.exists(attribute_path):
+        os.remove(attribute_path)
+    attribute_path = write_to_file(
+        attribute_path,
+        get_response
+    )
+    return (
+        "{0} configuration downloaded to {1}"
+        .format(attribute, attribute_path)
+    )
+
+
+actions = {
+    "node": {
+        "action": node,
+        "args": [
+            get_env_arg(),
+            get_list_arg("List all nodes."),
+            get_set_arg("Set role for specific node."),
+            get_delete_arg("Delete specific node from environment."),
+            get_default_arg("Get default network configuration of some node"),
+            get_download_arg("Download configuration of specific node"),
+            get_upload_arg("Upload configuration to specific node"),
+            get_dir_arg("Select directory to which download node attributes"),
+            get_node_arg("Node id."),
+            get_force_arg(),
+        {
+            "args": ["--all"],
+            "params": {
+                "dest": "all",
+                "action": "store_true",
+                "help": "Select all nodes.",
+                "default": False
+            }
+        }, {
+            "args": ["-r", "--role"],
+            "params": {
+                "dest": "role",
+                "type": lambda v: v.split(','),
+                "action": SetAction,
+                "help": "Role to assign for node.",
+                "default": None
+            }
+        }, {
+            "args": ["--net", "--network"],
+            "params": {
+                "dest": "network",
+                "action": "store_true",
+                "help": "Node network configuration.",
+                "default": False
+            }
+        }, {
+            "args": ["--disk"],
+            "params": {
+                "dest": "disk",
+                "action": "store_true",
+                "help": "Node disk configuration.",
+                "default": False
+            }
+        }, {
+            "args": ["--deploy"],
+            "params": {
+                "dest": "deploy",
+                "action": "store_true",
+                "help": "Deploy specific nodes.",
+                "default": False
+            }
+        }, {
+            "args": ["--provision"],
+            "params": {
+                "dest": "provision",
+                "action": "store_true",
+                "help": "Provision specific nodes.",
+                "default": False
+            }
+        }],
+        "examples":
+"""Examples:
+
+    To list all available nodes:
+        fuel node
+
+    To filter them by environment:
+        fuel --env-id 1 node
+
+    Assign some nodes to environment with with specific roles:
+        fuel --env 1 node set --node 1 --role controller
+        fuel --env 1 node set --node 2,3,4 --role compute,cinder
+
+    Remove some nodes from environment:
+        fuel --env 1 node remove --node 2,3
+
+    Remove nodes no matter to which environment they were assigned:
+        fuel node remove --node 2,3,6,7
+
+    Remove all nodes from some environment:
+        fuel --env 1 node remove --all
+
+    Download current or default disk, network, configuration for some node:
+        fuel node --node-id 2 --disk --default
+        fuel node --node-id 2 --network --download --dir path/to/directory
+
+    Upload disk, network, configuration for some node:
+        fuel node --node-id 2 --network --upload
+        fuel node --node-id 2 --disk --upload --dir path/to/directory
+
+    Deploy/Provision some node:
+        fuel node --node-id 2 --provision
+        fuel node --node-id 2 --deploy
+
+    It's Possible to manipulate nodes with their short mac addresses:
+        fuel node --node-id 80:ac
+        fuel node remove --node-id 80:ac,5d:a2
+"""
+    }
+}
@@ -0,0 +1,151 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import print_function
+
+from fuelclient.cli.arguments import get_list_arg
+from fuelclient.cli.arguments import get_release_arg
+from fuelclient.cli.client import json_api_get_request
+from fuelclient.cli.client import json_api_post_request
+from fuelclient.cli.utils import check_for_attributes
+from fuelclient.cli.utils import format_table
+from fuelclient.cli.utils import print_error
+from fuelclient.cli.utils import print_to_output
+
+
+def release(params):
+    """List and modify currently available releases
+    """
+    acceptable_keys = ["id", "name", "state", "operating_system", "version"]
+    if params.config:
+        check_for_attributes(params, ["rel", "username", "password"])
+        data = {
+            "release_id": params.rel,
+            "username": params.username,
+            "password": params.password
+        }
+        satellite_flags = [params.satellite_server_hostname,
+                           params.activation_key]
+        if not any(satellite_flags):
+            data.update({
+                "license_type": "rhsm",
+                "satellite": "",
+                "activation_key": ""
+            })
+        elif all(satellite_flags):
+            data.update({
+                "license_type": "rhn",
+                "satellite": params.satellite_server_hostname,
+                "activation_key": params.activation_key
+            })
+        else:
+            print_error('RedHat satellite settings requires both a '
+                        '"--satellite-server-hostname" and '
+                        'a "--activation-key" flags.')
+        release_response = json_api_post_request(
+            "redhat/setup/",
+            data
+        )
+        print_to_output(
+            release_response,
+            "Credentials for release with id={0}"
+            " were modified."
+            .format(params.rel)
+        )
+    else:
+        if params.rel:
+            data = [json_api_get_request(
+                "releases/{0}/"
+                .format(params.rel)
+            )]
+        else:
+            data = json_api_get_request("releases/")
+        print_to_output(
+            data,
+            format_table(
+                data,
+                acceptable_keys=acceptable_keys
+            )
+        )
+
+
+actions = {
+    "release": {
+        "action": release,
+        "args": [
+            get_list_arg("List all available releases."),
+            get_release_arg("Specify release id to configure"),
+        {
+            "args": ["-c", "--config"],
+            "params": {
+                "dest": "config",
+                "action": "store_true",
+                "help": "Configure release with --release",
+                "default": False
+            }
+        }, {
+            "args": ["-U", "--user", "--username"],
+            "params": {
+                "dest": "username",
+                "action": "store",
+                "type": str,
+                "help": "Username for release credentials",
+                "default": None
+            }
+        }, {
+            "args": ["-P", "--pass", "--password"],
+            "params": {
+                "dest": "password",
+                "action": "store",
+                "type": str,
+                "help": "Password for release credentials",
+                "default": None
+            }
+        }, {
+            "args": ["--satellite-server-hostname"],
+            "params": {
+                "dest": "satellite_server_hostname",
+                "action": "store",
+                "type": str,
+                "help": "Satellite server hostname",
+                "default": None
+            }
+        }, {
+            "args": ["--activation-key"],
+            "params": {
+                "dest": "activation_key",
+                "action": "store",
+                "type": str,
+                "help": "activation key",
+                "default": None
+            }
+        }],
+        "examples":
+"""Examples:
+
+    Print all available releases:
+        fuel release --list
+
+    Print release with specific id=1:
+        fuel release --rel 1
+
+    To configure RedHat release:
+        fuel rel --rel <id of RedHat release> -c -U <username> -P <password>
+
+    To configure RedHat release with satellite server:
+        fuel rel --rel <...> -c -U <...> -P <...> """ +
+"""--satellite-server-hostname <hostname> --activation-key <key>
+"""
+    }
+}
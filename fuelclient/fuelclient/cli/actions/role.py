@@ -0,0 +1,62 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import print_function
+
+from fuelclient.cli.arguments import get_list_arg
+from fuelclient.cli.arguments import get_release_arg
+from fuelclient.cli.client import json_api_get_request
+from fuelclient.cli.utils import format_table
+from fuelclient.cli.utils import print_to_output
+
+
+def role(params):
+    """List all roles for specific release
+    """
+    data = json_api_get_request(
+        "releases/{0}/"
+        .format(params.rel)
+    )
+    acceptable_keys = ["name", "conflicts"]
+    roles = [
+        {
+            "name": role_name,
+            "conflicts": ", ".join(
+                metadata.get("conflicts", ["-"])
+            )
+        } for role_name, metadata in data["roles_metadata"].iteritems()]
+    print_to_output(
+        roles,
+        format_table(
+            roles,
+            acceptable_keys=acceptable_keys
+        )
+    )
+
+
+actions = {
+    "role": {
+        "action": role,
+        "args": [
+            get_list_arg("List all roles for specific release"),
+            get_release_arg("Release id", required=True)
+        ],
+        "examples":
+"""Examples:
+
+    Print all available roles and their conflicts for some release with id=1:
+        fuel role --rel 1
+"""
+    }
+}
@@ -0,0 +1,98 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import print_function
+
+import os
+
+from fuelclient.cli.arguments import get_default_arg
+from fuelclient.cli.arguments import get_dir_arg
+from fuelclient.cli.arguments import get_download_arg
+from fuelclient.cli.arguments import get_env_arg
+from fuelclient.cli.arguments import get_upload_arg
+from fuelclient.cli.client import json_api_get_request
+from fuelclient.cli.client import json_api_put_request
+from fuelclient.cli.utils import check_for_one_attribute
+from fuelclient.cli.utils import print_to_output
+from fuelclient.cli.utils import read_from_file
+from fuelclient.cli.utils import write_to_file
+
+
+def settings(params):
+    """Show or modify environment settings
+    """
+    check_for_one_attribute(params, ["default", "download", "upload"])
+    settings_url = "clusters/{0}/attributes".format(params.env)
+    settings_data = json_api_get_request(settings_url)
+    settings_file_path = os.path.join(
+        os.path.abspath(params.dir or os.path.curdir),
+        "settings_{0}".format(params.env)
+    )
+    if params.upload:
+        data, settings_file_path = read_from_file(settings_file_path)
+        put_response = json_api_put_request(
+            settings_url,
+            data
+        )
+        print_to_output(
+            put_response,
+            "Settings configuration from {0} uploaded."
+            .format(settings_file_path)
+        )
+    elif params.default:
+        default_url = settings_url + "/defaults"
+        get_response = json_api_get_request(default_url)
+        settings_file_path = write_to_file(settings_file_path, get_response)
+        print_to_output(
+            get_response,
+            "Default settings configuration downloaded to {0}."
+            .format(settings_file_path)
+        )
+    elif params.download:
+        settings_file_path = write_to_file(
+            settings_file_path,
+            settings_data
+        )
+        print_to_output(
+            settings_data,
+            "Settings configuration for environment with id={0}"
+            " downloaded to {1}"
+            .format(params.env, settings_file_path)
+        )
+
+
+actions = {
+    "settings": {
+        "action": settings,
+        "args": [
+            get_env_arg(required=True),
+            get_download_arg("Modify current configuration."),
+            get_default_arg("Open default configuration."),
+            get_upload_arg("Save current changes in configuration."),
+            get_dir_arg("Directory with configuration data.")
+        ],
+        "examples":
+"""Examples:
+
+    To download settings for some environment in this directory:
+        fuel --env 1 settings --download
+
+    To download default settings for some environment in some directory:
+        fuel --env 1 settings --default --dir path/to/derectory
+
+    To upload settings for some environment from some directory:
+        fuel --env 1 settings --upload --dir path/to/derectory
+"""
+    }
+}
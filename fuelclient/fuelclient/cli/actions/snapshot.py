@@ -0,0 +1,96 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import print_function
+
+from functools import partial
+import os
+import sys
+from time import sleep
+import urllib2
+
+from fuelclient.cli.arguments import get_dir_arg
+from fuelclient.cli.client import json_api_get_request
+from fuelclient.cli.client import json_api_put_request
+from fuelclient.cli.client import ROOT
+from fuelclient.cli.utils import get_bar_for_progress
+from fuelclient.cli.utils import print_error
+
+
+def snapshot(params):
+    """Generate and download snapshot.
+    """
+    dump_task = json_api_put_request(
+        "logs/package",
+        {}
+    )
+    task_id = dump_task["id"]
+    print("Generating dump...")
+    while dump_task["progress"] < 100:
+        dump_task = json_api_get_request("tasks/{0}/".format(task_id))
+        sleep(0.5)
+    download_snapshot_with_progress_bar(
+        ROOT + dump_task["message"],
+        params.dir
+    )
+
+
+def download_snapshot_with_progress_bar(url, directory):
+    directory = directory or os.path.curdir
+    if not os.path.exists(directory):
+        print_error("Folder {0} doesn't exist.".format(directory))
+    file_name = os.path.join(
+        os.path.abspath(directory),
+        url.split('/')[-1]
+    )
+    download_handle = urllib2.urlopen(url)
+    with open(file_name, 'wb') as file_handle:
+        meta = download_handle.info()
+        file_size = int(meta.getheaders("Content-Length")[0])
+        print("Downloading: {0} Bytes: {1}".format(url, file_size))
+        file_size_dl = 0
+        block_size = 8192
+        bar = partial(get_bar_for_progress, 80)
+        while True:
+            data_buffer = download_handle.read(block_size)
+            if not data_buffer:
+                break
+            file_size_dl += len(data_buffer)
+            file_handle.write(data_buffer)
+            progress = int(100 * float(file_size_dl) / file_size)
+            sys.stdout.write("\r{0}".format(
+                bar(progress)
+            ))
+            sys.stdout.flush()
+            sleep(1 / 10)
+        print()
+
+
+actions = {
+    "snapshot": {
+        "action": snapshot,
+        "args": [
+            get_dir_arg("Directory to which download snapshot.")
+        ],
+        "examples":
+"""Examples:
+
+    To download diagnostic snapshot:
+        fuel snapshot
+
+    To download diagnostic snapshot to specific directory:
+        fuel snapshot --dir path/to/directory
+"""
+    }
+}
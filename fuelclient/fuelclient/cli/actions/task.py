@@ -0,0 +1,101 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import print_function
+
+from itertools import chain
+
+from fuelclient.cli.arguments import get_force_arg
+from fuelclient.cli.arguments import parse_ids
+from fuelclient.cli.client import json_api_delete_request
+from fuelclient.cli.client import json_api_get_request
+from fuelclient.cli.utils import check_for_attributes
+from fuelclient.cli.utils import format_table
+from fuelclient.cli.utils import print_to_output
+
+
+def task(params):
+    """Show tasks
+    """
+    if params.delete:
+        check_for_attributes(params, ["tid"])
+        task_ids = list(chain(*params.tid))
+        delete_response = map(
+            lambda tid: json_api_delete_request(
+                "tasks/{0}/?force={1}".format(
+                    tid,
+                    int(params.force),
+                )
+            ),
+            task_ids
+        )
+        print_to_output(
+            delete_response,
+            "Tasks with id's {0} deleted."
+            .format(', '.join(map(str, task_ids)))
+        )
+    else:
+        acceptable_keys = ["id", "status", "name",
+                           "cluster", "progress", "uuid"]
+        tasks = json_api_get_request("tasks/")
+        if params.tid:
+            task_ids = map(int, chain(*params.tid))
+            tasks = [t for t in tasks if t["id"] in task_ids]
+        print_to_output(
+            tasks,
+            format_table(tasks, acceptable_keys=acceptable_keys)
+        )
+
+
+actions = {
+    "task": {
+        "action": task,
+        "args": [
+            get_force_arg(),
+            {
+                "args": ["-d", "--delete"],
+                "params": {
+                    "dest": "delete",
+                    "action": "store_true",
+                    "help": "Delete task with some task-id.",
+                    "default": False
+                }
+            }, {
+                "args": ["-t", "--task-id"],
+                "params": {
+                    "dest": "tid",
+                    "action": "store",
+                    "nargs": '+',
+                    "type": parse_ids,
+                    "help": "Task id.",
+                    "default": None
+                }
+            }],
+        "examples":
+"""Examples:
+
+    To display all tasks:
+        fuel task
+
+    To  display tasks with some ids:
+        fuel task -t 1,2,3
+
+    To delete some tasks:
+        fuel task delete -t 1,2,3
+
+    To delete some tasks forcefully (without considering their state):
+        fuel task delete -f -t 1,6
+"""
+    }
+}
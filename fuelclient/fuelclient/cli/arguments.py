@@ -0,0 +1,245 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Builders of arguments shared by subcommands"""
+
+import argparse
+from itertools import chain
+
+from fuelclient.cli.client import get_nodes
+from fuelclient.cli.utils import print_error
+
+
+class NodeAction(argparse.Action):
+    """Custom argparse.Action subclass to store node identity
+
+    :returns: list of ids
+    """
+    def __call__(self, _parser, namespace, values, option_string=None):
+        if values:
+            node_identities = set(chain(*values))
+            input_macs = set(n for n in node_identities if ":" in n)
+            only_ids = set()
+            for _id in (node_identities - input_macs):
+                try:
+                    only_ids.add(int(_id))
+                except ValueError:
+                    print_error("'{0}' is not valid node id.".format(_id))
+            if input_macs:
+                nodes_mac_to_id_map = dict(
+                    (n["mac"], n["id"])
+                    for n in get_nodes(fields=("id", "mac"))
+                )
+                for short_mac in input_macs:
+                    target_node = None
+                    for mac in nodes_mac_to_id_map:
+                        if mac.endswith(short_mac):
+                            target_node = mac
+                            break
+                    if target_node:
+                        only_ids.add(nodes_mac_to_id_map[target_node])
+                    else:
+                        print_error(
+                            'Node with mac endfix "{0}" was not found.'
+                            .format(short_mac)
+                        )
+            setattr(namespace, self.dest, list(only_ids))
+
+
+class SetAction(argparse.Action):
+    """Custom argparse.Action subclass to store distinct values
+
+    :returns: Set of arguments
+    """
+    def __call__(self, _parser, namespace, values, option_string=None):
+        try:
+            getattr(namespace, self.dest).update(values)
+        except AttributeError:
+            setattr(namespace, self.dest, set(values))
+
+
+def parse_ids(x):
+    """Parse arguments with commas and spaces
+
+    :returns: list of lists with numbers
+    """
+    filtered = [y for y in x.split(",") if y.strip() != '']
+    if len(filtered) > 1:
+        return map(int, filtered)
+    elif len(filtered) == 1:
+        return [int(filtered[0])]
+    else:
+        return None
+
+
+def get_download_arg(help_msg):
+    return {
+        "args": ["-d", "--download"],
+        "params": {
+            "dest": "download",
+            "action": "store_true",
+            "help": help_msg,
+            "default": False
+        }
+    }
+
+
+def get_list_arg(help_msg):
+    return {
+        "args": ["-l", "--list"],
+        "params": {
+            "dest": "list",
+            "action": "store_true",
+            "help": help_msg,
+            "default": False
+        }
+    }
+
+
+def get_dir_arg(help_msg):
+    return {
+        "args": ["--dir"],
+        "params": {
+            "dest": "dir",
+            "action": "store",
+            "help": help_msg,
+            "default": None
+        }
+    }
+
+
+def get_verify_arg(help_msg):
+    return {
+        "args": ["-v", "--verify"],
+        "params": {
+            "dest": "verify",
+            "action": "store_true",
+            "help": help_msg,
+            "default": False
+        }
+    }
+
+
+def get_upload_arg(help_msg):
+    return {
+        "args": ["-u", "--upload"],
+        "params": {
+            "dest": "upload",
+            "action": "store_true",
+            "help": help_msg,
+            "default": False
+        }
+    }
+
+
+def get_default_arg(help_msg):
+    return {
+        "args": ["--default"],
+        "params": {
+            "dest": "default",
+            "action": "store_true",
+            "help": help_msg,
+            "default": False
+        }
+    }
+
+
+def get_set_arg(help_msg):
+    return {
+        "args": ["-s", "--set"],
+        "params": {
+            "dest": "set",
+            "action": "store_true",
+            "help": help_msg,
+            "default": False
+        }
+    }
+
+
+def get_delete_arg(help_msg):
+    return {
+        "args": ["--delete"],
+        "params": {
+            "dest": "delete",
+            "action": "store_true",
+            "help": help_msg,
+            "default": False
+        }
+    }
+
+
+def get_release_arg(help_msg, required=False):
+    return {
+        "args": ["--rel", "--release"],
+        "params": {
+            "dest": "rel",
+            "action": "store",
+            "type": str,
+            "help": help_msg,
+            "default": None,
+            "required": required
+        }
+    }
+
+
+def get_node_arg(help_msg):
+    return {
+        "args": ["--node", "--node-id"],
+        "params": {
+            "dest": "node",
+            "action": NodeAction,
+            "nargs": '+',
+            "type": lambda v: v.split(","),
+            "help": help_msg,
+            "default": None
+        }
+    }
+
+
+def get_env_arg(required=False):
+    return {
+        "args": ["--env", "--env-id"],
+        "params": {
+            "dest": "env",
+            "action": "store",
+            "type": str,
+            "help": "environment id",
+            "default": None,
+            "required": required
+        }
+    }
+
+
+def get_force_arg():
+    return {
+        "args": ["-f", "--force"],
+        "params": {
+            "dest": "force",
+            "action": "store_true",
+            "help": "Bypassing parameter validation.",
+            "default": False
+        }
+    }
+
+
+def get_args_for_facts(fact_type):
+    return [
+        get_env_arg(),
+        get_delete_arg("Delete current {0} data.".format(fact_type)),
+        get_download_arg("Download current {0} data.".format(fact_type)),
+        get_upload_arg("Upload current {0} data.".format(fact_type)),
+        get_default_arg("Download default {0} data.".format(fact_type)),
+        get_dir_arg("Directory with {0} data.".format(fact_type)),
+        get_node_arg("Node ids."),
+    ]
@@ -0,0 +1,278 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Connection settings and requests to Nailgun and OSTF APIs"""
+
+import errno
+import httplib
+import json
+import os
+import socket
+from StringIO import StringIO
+import sys
+import threading
+import urllib2
+import urlparse
+
+from fuelclient.cli.utils import exceptions_decorator
+from fuelclient.cli.utils import print_debug
+
+
+path_to_config = "/etc/fuel-client.yaml"
+defaults = {
+    "LISTEN_ADDRESS": "127.0.0.1",
+    "LISTEN_PORT": "8000"
+}
+if os.path.exists(path_to_config):
+    import yaml
+    with open(path_to_config, "r") as fh:
+        config = yaml.load(fh.read())
+    defaults.update(config)
+else:
+    defaults.update(os.environ)
+ROOT = "http://{LISTEN_ADDRESS}:{LISTEN_PORT}".format(**defaults)
+
+OSTF_ROOT = ROOT + "/ostf/"
+API_ROOT = ROOT + "/api/v1/"
+# maximum number of concurrent requests for per-node operations
+PARALLEL_REQUESTS = int(defaults.get("PARALLEL_REQUESTS", 10))
+
+
+class StaleConnection(Exception):
+    """Reused connection was closed by server before any byte
+    of response was received.
+    """
+
+
+def _nothing_received(exc):
+    """Whether request failed because server closed idle connection,
+    not after the request was processed.
+    """
+    if isinstance(exc, socket.timeout):
+        return False
+    if isinstance(exc, socket.error):
+        return exc.errno in (errno.ECONNRESET, errno.EPIPE,
+                             errno.ECONNABORTED)
+    if isinstance(exc, httplib.BadStatusLine):
+        # status line is empty if connection was closed
+        return exc.line in ("''", '""') or exc.line.startswith(
+            "No status line received")
+    return False
+
+
+class KeepAliveTransport(object):
+    """HTTP transport which reuses connections to server.
+
+    Every thread keeps its own persistent connection per server,
+    so sequential calls don't open new TCP connection each time
+    and concurrent calls from :func:`parallel_map` don't share one.
+    Errors are raised as urllib2 exceptions, so they are reported
+    in the same way as before. Request is repeated only if reused
+    connection turned out to be closed by server before anything
+    was received, so requests are never processed twice.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _connections(self):
+        if not hasattr(self._local, "connections"):
+            self._local.connections = {}
+        return self._local.connections
+
+    def _send(self, netloc, method, path, data, headers):
+        connections = self._connections()
+        reused = netloc in connections
+        if not reused:
+            connections[netloc] = httplib.HTTPConnection(netloc)
+        connection = connections[netloc]
+        try:
+            try:
+                connection.request(method, path, body=data, headers=headers)
+                response = connection.getresponse()
+            except (httplib.HTTPException, socket.error) as exc:
+                if reused and _nothing_received(exc):
+                    raise StaleConnection(exc)
+                raise
+            return response, response.read()
+        except (StaleConnection, httplib.HTTPException, socket.error):
+            connection.close()
+            del connections[netloc]
+            raise
+
+    def request(self, method, url, data=None):
+        """Make HTTP request and return body of response
+
+        :returns: body of response as string
+        """
+        parsed = urlparse.urlsplit(url)
+        path = parsed.path
+        if parsed.query:
+            path = "{0}?{1}".format(path, parsed.query)
+        headers = {"Content-Type": "application/json"}
+        try:
+            try:
+                response, body = self._send(
+                    parsed.netloc, method, path, data, headers)
+            except StaleConnection:
+                # server closed idle keep-alive connection before
+                # the request was sent, so it is safe to repeat it
+                # once with new connection
+                response, body = self._send(
+                    parsed.netloc, method, path, data, headers)
+        except StaleConnection as exc:
+            raise urllib2.URLError(exc.args[0])
+        except (httplib.HTTPException, socket.error) as exc:
+            raise urllib2.URLError(exc)
+        if response.status >= 400:
+            raise urllib2.HTTPError(
+                url,
+                response.status,
+                response.reason,
+                response.msg,
+                StringIO(body)
+            )
+        return body
+
+
+transport = KeepAliveTransport()
+
+
+def parallel_map(func, items, workers=None):
+    """Call func for every item in bounded number of threads
+
+    :returns: list of results in order of items. If some calls
+              failed, exception of the first failed item is raised
+              after all calls are finished.
+    """
+    items = list(items)
+    workers = min(workers or PARALLEL_REQUESTS, len(items))
+    if workers <= 1:
+        return map(func, items)
+
+    results = [None] * len(items)
+    failures = [None] * len(items)
+    queue = iter(enumerate(items))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                try:
+                    index, item = next(queue)
+                except StopIteration:
+                    return
+            try:
+                results[index] = func(item)
+            except Exception:
+                failures[index] = sys.exc_info()
+
+    threads = [threading.Thread(target=worker) for _ in xrange(workers)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for failure in failures:
+        if failure:
+            raise failure[0], failure[1], failure[2]
+    return results
+
+
+def json_api_delete_request(api):
+    """Make DELETE request to specific API with some data
+    """
+    print_debug(
+        "DELETE {0}".format(API_ROOT + api)
+    )
+    transport.request("DELETE", API_ROOT + api)
+    return {}
+
+
+def json_api_put_request(api, data):
+    """Make PUT request to specific API with some data
+    """
+    data_json = json.dumps(data)
+    print_debug(
+        "PUT {0} data={1}"
+        .format(API_ROOT + api, data_json)
+    )
+    return json.loads(
+        transport.request("PUT", API_ROOT + api, data_json)
+    )
+
+
+def json_api_get_request(api, root=API_ROOT):
+    """Make GET request to specific API
+    """
+    url = root + api
+    print_debug(
+        "GET {0}"
+        .format(url)
+    )
+    return json.loads(
+        transport.request("GET", url)
+    )
+
+
+def get_nodes(cluster_id=None, ids=None, fields=None):
+    """Get nodes filtered by cluster and ids on server side.
+    If fields are given, only they are rendered by server.
+    """
+    query = []
+    if cluster_id is not None:
+        query.append("cluster_id={0}".format(cluster_id))
+    if ids:
+        query.append("ids={0}".format(",".join(map(str, ids))))
+    if fields:
+        query.append("fields={0}".format(",".join(fields)))
+    url = "nodes/"
+    if query:
+        url = "{0}?{1}".format(url, "&".join(query))
+    return json_api_get_request(url)
+
+
+def json_ostf_get_request(api):
+    return json_api_get_request(api, root=OSTF_ROOT)
+
+
+def json_ostf_post_request(api, data):
+    return json_api_post_request(api, data, root=OSTF_ROOT)
+
+
+def json_api_post_request(api, data, root=API_ROOT):
+    """Make POST request to specific API with some data
+    """
+    url = root + api
+    data_json = json.dumps(data)
+    print_debug(
+        "POST {0} data={1}"
+        .format(url, data_json)
+    )
+    try:
+        response = json.loads(
+            transport.request("POST", url, data_json)
+        )
+    except ValueError:
+        response = {}
+    return response
+
+
+@exceptions_decorator
+def get_fuel_version():
+    import yaml
+    return yaml.safe_dump(
+        json_api_get_request("version"),
+        default_flow_style=False
+    )
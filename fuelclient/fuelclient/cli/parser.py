@@ -0,0 +1,218 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Entry point of fuel CLI. Only module of the called subcommand
+is imported and only its arguments are added to parser, so every
+call doesn't pay for all subcommands.
+"""
+
+import argparse
+import sys
+
+from fuelclient.cli import utils
+from fuelclient.cli.utils import exceptions_decorator
+from fuelclient.cli.utils import print_error
+
+
+# subcommand: (module in fuelclient.cli.actions, help message)
+ACTIONS = {
+    "release": (
+        "release", "List and modify currently available releases"),
+    "role": (
+        "role", "List all roles for specific release"),
+    "environment": (
+        "environment",
+        "Create, list and modify currently existing environments(clusters)"),
+    "node": (
+        "node", "List and assign available nodes to environments"),
+    "network": (
+        "network", "Show or modify network settings of specific environments"),
+    "settings": (
+        "settings", "Show or modify environment settings"),
+    "task": (
+        "task", "Show tasks"),
+    "snapshot": (
+        "snapshot", "Generate and download snapshot."),
+    "deploy-changes": (
+        "deploy", "Deploy changes to environments"),
+    "health": (
+        "health", "Run health check on environment"),
+    "deployment": (
+        "fact", "Show computed deployment facts for orchestrator"),
+    "provisioning": (
+        "fact", "Show computed provisioning facts for orchestrator"),
+    "stop": (
+        "interrupt", "Stop deployment process for specific environment"),
+    "reset": (
+        "interrupt", "Reset deployed process for specific environment")
+}
+
+substitutions = {
+    #replace from: to
+    "env": "environment",
+    "nodes": "node",
+    "net": "network",
+    "rel": "release",
+    "list": "--list",
+    "set": "--set",
+    "delete": "--delete",
+    "download": "--download",
+    "upload": "--upload",
+    "default": "--default",
+    "create": "--create",
+    "remove": "--delete",
+    "config": "--config",
+    "--roles": "--role"
+}
+
+
+class VersionAction(argparse._VersionAction):
+    """Custom argparse._VersionAction subclass which finds version
+    of client only if it's requested
+
+    :returns: prints fuel client version
+    """
+    def __call__(self, parser, namespace, values, option_string=None):
+        import pkg_resources
+        try:
+            self.version = pkg_resources.get_distribution(
+                "python-fuelclient").version
+        except pkg_resources.DistributionNotFound:
+            self.version = ""
+        super(VersionAction, self).__call__(
+            parser, namespace, values, option_string)
+
+
+class FuelVersionAction(argparse._VersionAction):
+    """Custom argparse._VersionAction subclass to compute fuel server version
+
+    :returns: prints fuel server version
+    """
+    def __call__(self, parser, namespace, values, option_string=None):
+        from fuelclient.cli.client import get_fuel_version
+        parser.exit(message=get_fuel_version())
+
+
+def prepare_args():
+    # replace some args from dict substitutions
+    sys.argv = map(
+        lambda x: substitutions.get(x, x),
+        sys.argv
+    )
+    # move --json and --debug flags before any action
+    for flag in ["--json", "--debug", "--yaml"]:
+        if flag in sys.argv:
+            sys.argv.remove(flag)
+            sys.argv.insert(1, flag)
+
+    for arg in sys.argv:
+        if "--env" in arg:
+            # if declaration with '=' sign (e.g. --env-id=1)
+            if "=" in arg:
+                index_of_env = sys.argv.index(arg)
+                env = sys.argv.pop(index_of_env)
+                sys.argv.append(env)
+            else:
+                try:
+                    index_of_env = sys.argv.index(arg)
+                    sys.argv.pop(index_of_env)
+                    env = sys.argv.pop(index_of_env)
+                    sys.argv.append(arg)
+                    sys.argv.append(env)
+                except IndexError:
+                    print_error(
+                        'Environment id must follow "{0}" flag'
+                        .format(arg)
+                    )
+            break
+
+
+def get_action_name():
+    """Subcommand is the first argument which isn't a flag,
+    because prepare_args moves all global flags before it
+    and environment id to the end.
+    """
+    for arg in sys.argv[1:]:
+        if not arg.startswith("-"):
+            return arg
+
+
+def get_action(name):
+    return __import__(
+        "fuelclient.cli.actions." + ACTIONS[name][0],
+        fromlist=["actions"]
+    ).actions[name]
+
+
+def main():
+    prepare_args()
+    called_action = get_action_name()
+
+    parser = argparse.ArgumentParser(
+        usage="fuel [optional args] <namespace> [action] [flags]"
+    )
+    parser.add_argument("-v", "--version",
+                        action=VersionAction)
+    parser.add_argument("--fuel-version", action=FuelVersionAction)
+    parser.add_argument("--json",
+                        dest="json",
+                        action="store_true",
+                        help="prints to only json to stdout",
+                        default=False)
+    parser.add_argument("--yaml",
+                        dest="yaml",
+                        action="store_true",
+                        help="prints to only yaml to stdout",
+                        default=False)
+    parser.add_argument("--debug",
+                        dest="debug",
+                        action="store_true",
+                        help="prints details of all HTTP request",
+                        default=False)
+    subparsers = parser.add_subparsers(
+        title="Namespaces",
+        metavar="",
+        dest="action",
+        help='actions'
+    )
+
+    for action, (_, help_msg) in sorted(ACTIONS.iteritems()):
+        if action != called_action:
+            # arguments of other subcommands aren't needed
+            subparsers.add_parser(action, help=help_msg)
+            continue
+        parameters = get_action(action)
+        action_parser = subparsers.add_parser(
+            action,
+            prog="fuel {0}".format(action),
+            help=help_msg,
+            formatter_class=argparse.RawTextHelpFormatter,
+            epilog=parameters.get("examples", "")
+        )
+        for argument in parameters.get("args", []):
+            action_parser.add_argument(
+                *argument["args"],
+                **argument["params"]
+            )
+
+    parsed_params, other_params = parser.parse_known_args()
+    utils.DEBUG = parsed_params.debug
+    utils.JSON = parsed_params.json
+    utils.YAML = parsed_params.yaml
+    if parsed_params.action not in ACTIONS:
+        parser.print_help()
+        sys.exit(0)
+    exceptions_decorator(
+        get_action(parsed_params.action)["action"]
+    )(parsed_params)
@@ -0,0 +1,295 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Output, formatting and files helpers shared by subcommands.
+Output format flags are set by parser before subcommand is called.
+"""
+
+from __future__ import print_function
+
+from functools import wraps
+import json
+import math
+import os
+import sys
+import urllib2
+
+
+DEBUG = False
+JSON = False
+YAML = False
+DEFAULT_SERIALIZER = "yaml"
+PASSIVE_ARGUMENTS = ["rel", "env", "action", "debug", "json", "net", "yaml"]
+
+
+def _yaml_dump(data):
+    import yaml
+    return yaml.safe_dump(data, default_flow_style=False)
+
+
+def _yaml_load(data):
+    import yaml
+    return yaml.load(data)
+
+
+# yaml is imported only when data is serialized to yaml
+SERIALIZERS = {
+    "json": {
+        "w": lambda d: json.dumps(d, indent=4),
+        "r": lambda d: json.loads(d)
+    },
+    "yaml": {
+        "w": _yaml_dump,
+        "r": _yaml_load
+    }
+}
+
+
+def handle_exceptions(exc):
+    if isinstance(exc, urllib2.HTTPError):
+        error_body = exc.read()
+        print_error("{0} {1}".format(
+            exc,
+            "({0})".format(error_body or "")
+        ))
+    elif isinstance(exc, urllib2.URLError):
+        print_error("Can't connect to Nailgun server!")
+    else:
+        raise exc
+
+
+def exceptions_decorator(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Exception as exc:
+            handle_exceptions(exc)
+    return wrapper
+
+
+def recur_get(multi_level_dict, key_chain):
+    """Method accesses some field in nested dictionaries
+
+    :returns: value for last key in key_chain in last dictionary
+    """
+    if not isinstance(multi_level_dict[key_chain[0]], dict):
+        return multi_level_dict[key_chain[0]]
+    else:
+        return recur_get(multi_level_dict[key_chain[0]], key_chain[1:])
+
+
+def print_formatted(data):
+    if JSON:
+        print(SERIALIZERS["json"]["w"](data))
+    elif YAML:
+        print(SERIALIZERS["yaml"]["w"](data))
+
+
+def print_to_output(formatted_data, arg, print_method=print):
+    if JSON or YAML:
+        print_formatted(formatted_data)
+    else:
+        print_method(arg)
+
+
+def format_table(data, acceptable_keys=None, subdict_keys=None):
+    """Format list of dicts to ascii table
+
+    :acceptable_keys list(str): list of keys for which to create table
+                                also specifies their order
+    :subdict_keys list(tuple(str)): list of key chains (tuples of key strings)
+                                    which are applied to dictionaries
+                                    to extract values
+    """
+    if subdict_keys:
+        for key_chain in subdict_keys:
+            for data_dict in data:
+                data_dict[key_chain[0]] = recur_get(data_dict, key_chain)
+    if acceptable_keys:
+        rows = [tuple([value[key] for key in acceptable_keys])
+                for value in data]
+        header = tuple(acceptable_keys)
+    else:
+        rows = [tuple(x.values()) for x in data]
+        header = tuple(data[0].keys())
+    number_of_columns = len(header)
+    column_widths = dict(
+        zip(
+            range(number_of_columns),
+            (len(str(x)) for x in header)
+        )
+    )
+
+    for row in rows:
+        column_widths.update(
+            (index, max(column_widths[index], len(str(element))))
+            for index, element in enumerate(row)
+        )
+    row_template = ' | '.join(
+        '%%-%ss' % column_widths[i] for i in range(number_of_columns)
+    )
+
+    return '\n'.join(
+        (row_template % header,
+         '-|-'.join(column_widths[column_index] * '-'
+                    for column_index in range(number_of_columns)),
+         '\n'.join(row_template % x for x in rows))
+    )
+
+
+def has_arguments(params):
+    """Checks whether params has some initialized attributes
+    """
+    current_arguments = [v for k, v in params.__dict__.iteritems()
+                         if k not in PASSIVE_ARGUMENTS]
+    return any(current_arguments)
+
+
+def print_error(message):
+    sys.stderr.write(message + "\n")
+    exit(1)
+
+
+def print_debug(message):
+    if DEBUG:
+        print(message)
+
+
+def check_for_attributes(params, attributes):
+    not_passed_checks = [attribute for attribute in attributes
+                         if not getattr(params, attribute)]
+    if not_passed_checks:
+        print_error(
+            "{0} required!".format(
+                quote_and_join(
+                    map(
+                        lambda attr: "--" + attr,
+                        not_passed_checks
+                    )
+                )
+            )
+        )
+
+
+def check_for_one_attribute(params, attributes):
+    if not any(map(
+        lambda attr: getattr(params, attr),
+        attributes
+    )):
+        print_error(
+            "At least one of {0} is required!".format(
+                ", ".join(
+                    map(
+                        lambda attr: '"--{0}"'.format(attr),
+                        attributes)
+                )
+            )
+        )
+
+
+def quote_and_join(words):
+    words = list(words)
+    if len(words) > 1:
+        return '{0} and "{1}"'.format(
+            ", ".join(
+                map(
+                    lambda x: '"{0}"'.format(x),
+                    words
+                )[0:-1]
+            ),
+            words[-1]
+        )
+    else:
+        return '"{0}"'.format(words[0])
+
+
+def get_bar_for_progress(full_width, progress):
+    number_of_equal_signs = int(
+        math.ceil(progress * float(full_width - 2) / 100)
+    )
+    return "[{0}{1}{2}]".format(
+        "=" * number_of_equal_signs,
+        ">" if number_of_equal_signs < full_width - 2 else "",
+        " " * (full_width - 3 - number_of_equal_signs)
+    )
+
+
+def prepare_path(path):
+    if JSON:
+        serialisation_format = "json"
+    elif YAML:
+        serialisation_format = "yaml"
+    else:
+        serialisation_format = DEFAULT_SERIALIZER
+    return "{0}.{1}".format(
+        path, serialisation_format
+    ), SERIALIZERS[serialisation_format]
+
+
+def write_to_file(path, data):
+    full_path, serializer = prepare_path(path)
+    with open(full_path, "w+") as file_to_write:
+        file_to_write.write(serializer["w"](data))
+    return full_path
+
+
+def is_file_exists(path):
+    dir_path_list = path.split(os.path.sep)
+    name = dir_path_list.pop(-1)
+    folder_path = os.path.sep.join(dir_path_list)
+    files_with_extensions = filter(
+        lambda x: len(x) > 1 and x[0] != '',
+        map(
+            lambda x: str.split(x, "."),
+            os.listdir(folder_path)
+        )
+    )
+    if not files_with_extensions:
+        return False
+    else:
+        return name in map(
+            lambda x: x[0],
+            files_with_extensions
+        )
+
+
+def read_from_file(path):
+    full_path, serializer = prepare_path(path)
+    try:
+        with open(full_path, "r") as file_to_read:
+            return serializer["r"](file_to_read.read()), full_path
+    except IOError:
+        print_error(
+            "File {0} doesn't exist. Try checking serialization format."
+            .format(full_path)
+        )
+
+
+def folder_or_one_up(dir_path):
+    if not os.path.exists(dir_path):
+        path_to_folder = dir_path.split(os.sep)
+        one_folder_up = path_to_folder[:-2] + path_to_folder[-2:-1]
+        dir_path = os.sep.join(one_folder_up)
+    return dir_path
+
+
+def listdir_without_extensions(dir_path):
+    return filter(
+        lambda f: f != "",
+        map(
+            lambda f: f.split(".")[0],
+            os.listdir(dir_path)
+        )
+    )
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from setuptools import find_packages
 from setuptools import setup
 
 setup(
@@ -23,6 +24,7 @@ setup(
     author='Mirantis Inc.',
     author_email='product@mirantis.com',
     url='http://mirantis.com',
+    packages=find_packages(exclude=['tests']),
     install_requires=['PyYAML==3.10'],
     scripts=['fuel']
 )
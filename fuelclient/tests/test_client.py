@@ -150,11 +150,37 @@ class TestFiles(BaseTestCase):
             (
                 "node --node 1 --network --default",
                 ("node_1", "node_1/interfaces.yaml")
+            ),
+            (
+                "node --node 1,2,3 --disk --download",
+                ("node_1/disks.yaml", "node_2/disks.yaml", "node_3/disks.yaml")
             )
         )
         for command, files in node_configs:
             self.check_if_files_created(command, files)
 
+    def test_nodes_attributes_output_order(self):
+        self.load_data_to_nailgun_server()
+        command = "node --node 3,1,2 --disk {0} --dir={1}"
+        downloaded = self.run_cli_command(
+            command.format("--download", self.temp_directory)
+        )
+        self.assertEqual(
+            downloaded.stdout,
+            "".join(
+                "disks configuration downloaded to {0}\n".format(
+                    os.path.join(
+                        self.temp_directory,
+                        "node_{0}/disks.yaml".format(node_id)
+                    )
+                ) for node_id in (1, 2, 3)
+            )
+        )
+        self.check_for_stdout(
+            command.format("--upload", self.temp_directory),
+            "disks configuration uploaded.\n" * 3
+        )
+
     def check_if_files_created(self, command, paths):
         command_in_dir = "{0} --dir={1}".format(command, self.temp_directory)
         self.run_cli_command(command_in_dir)
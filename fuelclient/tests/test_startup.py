@@ -0,0 +1,95 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+try:
+    from unittest.case import TestCase
+except ImportError:
+    # Runing unit-tests in production environment
+    from unittest2.case import TestCase
+
+import logging
+import os
+import subprocess
+import sys
+import time
+
+
+class TestStartup(TestCase):
+    """Startup of CLI doesn't need Nailgun server, so these tests
+    don't reload it.
+    """
+
+    client_path = os.path.abspath(
+        os.path.join(os.path.dirname(__file__), os.path.pardir)
+    )
+    fuel_path = os.path.join(client_path, "fuel")
+
+    # modules which should be imported only by subcommands needing them
+    heavy_modules = ("yaml", "curses", "pkg_resources")
+
+    # generous limit of average startup time, in seconds
+    max_startup_time = 1.0
+
+    def get_imported_modules(self, *args):
+        code = "\n".join((
+            "import sys",
+            "sys.path.insert(0, {0!r})".format(self.client_path),
+            "sys.argv = {0!r}".format(["fuel"] + list(args)),
+            "from fuelclient.cli.parser import main",
+            "try:",
+            "    main()",
+            "except SystemExit:",
+            "    pass",
+            "sys.stderr.write('\\n' + ' '.join(",
+            "    m for m in sys.modules if sys.modules[m]))",
+        ))
+        process = subprocess.Popen(
+            [sys.executable, "-c", code],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        _, stderr = process.communicate()
+        return set(stderr.splitlines()[-1].split())
+
+    def test_subcommand_imports_only_its_module(self):
+        modules = self.get_imported_modules("node", "--help")
+        self.assertIn("fuelclient.cli.actions.node", modules)
+        self.assertFalse(
+            set(m for m in modules if m.startswith("fuelclient.cli.actions."))
+            - set(["fuelclient.cli.actions.node"])
+        )
+        for module in self.heavy_modules:
+            self.assertNotIn(module, modules)
+
+    def test_help_does_not_import_subcommands(self):
+        modules = self.get_imported_modules("--help")
+        self.assertFalse(
+            [m for m in modules if m.startswith("fuelclient.cli.actions.")]
+        )
+
+    def test_startup_time(self):
+        log = logging.getLogger("CliTest.ExecutionLog")
+        runs = 5
+        with open(os.devnull, "w") as devnull:
+            for args in (["--version"], ["node", "--help"], ["--help"]):
+                started = time.time()
+                for _ in xrange(runs):
+                    subprocess.call(
+                        [sys.executable, self.fuel_path] + args,
+                        stdout=devnull,
+                        stderr=devnull
+                    )
+                average = (time.time() - started) / runs
+                log.debug("fuel %s: %.3f s", " ".join(args), average)
+                self.assertLess(average, self.max_startup_time)
@@ -51,33 +51,34 @@ class NodeAssignmentHandler(BaseHandler):
         )
         nodes = self.get_objects_list_or_404(Node, data.keys())
         cluster = self.get_object_or_404(objects.Cluster.model, cluster_id)
-        for node in nodes:
-            node.cluster = cluster
-            node.pending_roles = data[node.id]
-            node.pending_addition = True
-            try:
-                node.attributes.volumes = \
-                    node.volume_manager.gen_volumes_info()
+        with notifier.NotificationsBatch(commit=False) as batch:
+            for node in nodes:
+                node.cluster = cluster
+                node.pending_roles = data[node.id]
+                node.pending_addition = True
+                try:
+                    node.attributes.volumes = \
+                        node.volume_manager.gen_volumes_info()
 
-                objects.Cluster.add_pending_changes(
-                    node.cluster,
-                    "disks",
-                    node_id=node.id
-                )
+                    objects.Cluster.add_pending_changes(
+                        node.cluster,
+                        "disks",
+                        node_id=node.id
+                    )
 
-                network_manager = node.cluster.network_manager
-                network_manager.assign_networks_by_default(node)
-            except Exception as exc:
-                logger.warning(traceback.format_exc())
-                notifier.notify(
-                    "error",
-                    u"Failed to generate attributes for node '{0}': '{1}'"
-                    .format(
-                        node.human_readable_name(),
-                        str(exc) or u"see logs for details"
-                    ),
-                    node_id=node.id
-                )
+                    network_manager = node.cluster.network_manager
+                    network_manager.assign_networks_by_default(node)
+                except Exception as exc:
+                    logger.warning(traceback.format_exc())
+                    batch.notify(
+                        "error",
+                        u"Failed to generate attributes for node '{0}': '{1}'"
+                        .format(
+                            node.human_readable_name,
+                            str(exc) or u"see logs for details"
+                        ),
+                        node_id=node.id
+                    )
 
 
 class NodeUnassignmentHandler(BaseHandler):
@@ -145,8 +145,7 @@ class ClusterAttributesHandler(BaseHandler):
 
         data = self.checked_data()
 
-        for key, value in data.iteritems():
-            setattr(cluster.attributes, key, value)
+        objects.Attributes.update(cluster.attributes, data)
 
         objects.Cluster.add_pending_changes(cluster, "attributes")
         return {"editable": cluster.attributes.editable}
@@ -170,8 +169,10 @@ class ClusterAttributesHandler(BaseHandler):
 
         data = self.checked_data()
 
-        cluster.attributes.editable = utils.dict_merge(
-            cluster.attributes.editable, data['editable'])
+        objects.Attributes.update(cluster.attributes, {
+            "editable": utils.dict_merge(
+                cluster.attributes.editable, data['editable'])
+        })
 
         objects.Cluster.add_pending_changes(cluster, "attributes")
         return {"editable": cluster.attributes.editable}
@@ -221,9 +222,9 @@ class ClusterAttributesDefaultsHandler(BaseHandler):
                          ' found for cluster_id %s' % cluster_id)
             raise self.http(500, "No attributes found!")
 
-        cluster.attributes.editable = cluster.release.attributes_metadata.get(
-            "editable"
-        )
+        objects.Attributes.update(cluster.attributes, {
+            "editable": cluster.release.attributes_metadata.get("editable")
+        })
         db().commit()
         objects.Cluster.add_pending_changes(cluster, "attributes")
 
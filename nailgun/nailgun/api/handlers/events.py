@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright 2013 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Handlers dealing with change feed
+"""
+
+import time
+
+import web
+
+from nailgun.api.handlers.base import BaseHandler
+from nailgun.api.handlers.base import content_json
+from nailgun.api.validators.event import EventValidator
+
+from nailgun.db import db
+from nailgun.errors import errors
+
+from nailgun.objects import EventCollection
+from nailgun.settings import settings
+
+
+class EventCollectionHandler(BaseHandler):
+    """Change feed handler. Returns changes of tasks, nodes
+    and notifications which happened after given cursor.
+    """
+
+    collection = EventCollection
+    validator = EventValidator
+
+    @content_json
+    def GET(self):
+        """May receive cursor, cluster_id, topics (comma separated)
+        and timeout parameters. Without cursor returns current cursor
+        to start from. If there are no events after cursor, request
+        waits for them up to timeout seconds (long polling).
+
+        :returns: {"cursor": ..., "reset": ..., "events": [...]}.
+                  "reset" is true if some events after cursor were
+                  already removed, so client should refetch full state.
+        :http: * 200 (OK)
+               * 400 (invalid parameters)
+        """
+        try:
+            params = self.validator.validate_feed_params(
+                web.input(cursor=None, cluster_id=None,
+                          topics=None, timeout=None)
+            )
+        except errors.InvalidData as exc:
+            raise self.http(400, exc.message)
+
+        min_position, max_position = self.collection.get_cursor_bounds()
+        cursor = params["cursor"]
+        if cursor is None:
+            return {
+                "cursor": max_position or 0,
+                "reset": False,
+                "events": []
+            }
+
+        reset = bool(max_position) and (
+            cursor < min_position - 1 or cursor > max_position
+        )
+        if reset:
+            cursor = min_position - 1
+
+        limit = settings.EVENTS["max_items"]
+        deadline = time.time() + min(
+            params["timeout"],
+            settings.EVENTS["long_poll_timeout"]
+        )
+        while True:
+            events = []
+            if max_position is not None and max_position > cursor:
+                events = self.collection.get_since(
+                    cursor,
+                    until=max_position,
+                    cluster_id=params["cluster_id"],
+                    topics=params["topics"],
+                    limit=limit
+                ).all()
+                if len(events) == limit:
+                    cursor = events[-1].position
+                    break
+                # positions are assigned in commit order, so all events
+                # up to max_position are already visible and there is
+                # nothing else interesting for client, we don't look
+                # at these events again
+                cursor = max_position
+
+            if events or time.time() >= deadline:
+                break
+
+            # finish transaction to see changes made by other processes
+            db().commit()
+            time.sleep(settings.EVENTS["poll_interval"])
+            max_position = self.collection.get_cursor_bounds()[1]
+
+        return {
+            "cursor": cursor,
+            "reset": reset,
+            "events": map(self.collection.single.to_dict, events)
+        }
@@ -18,10 +18,15 @@
 Handlers dealing with nodes
 """
 
+from copy import deepcopy
 from datetime import datetime
 import json
 import traceback
 
+from sqlalchemy import func
+from sqlalchemy import or_
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm import defer
 from sqlalchemy.orm import joinedload
 
 import web
@@ -30,19 +35,24 @@ from nailgun.api.handlers.base import BaseHandler
 from nailgun.api.handlers.base import content_json
 from nailgun.api.serializers.node import NodeInterfacesSerializer
 from nailgun.api.validators.network import NetAssignmentValidator
+from nailgun.api.validators.node import NodesFilterValidator
 from nailgun.api.validators.node import NodeValidator
 
 from nailgun import objects
 
 from nailgun.db import db
+from nailgun.db.sqlalchemy.models import Cluster
 from nailgun.db.sqlalchemy.models import NetworkGroup
 from nailgun.db.sqlalchemy.models import Node
 from nailgun.db.sqlalchemy.models import NodeAttributes
 from nailgun.db.sqlalchemy.models import NodeNICInterface
+from nailgun.db.sqlalchemy.models import Role
 
 from nailgun.logger import logger
 from nailgun.network.manager import NetworkManager
 from nailgun import notifier
+from nailgun.volumes.manager import only_disks
+from nailgun.volumes.manager import volumes_layout_key
 
 
 class NodeHandler(BaseHandler):
@@ -166,20 +176,46 @@ class NodeCollectionHandler(BaseHandler):
 
     validator = NodeValidator
 
+    # computed fields which can be requested in addition to cls.fields
+    extra_fields = ('network_data',)
+
+    # relations which are needed to render fields
+    fields_relations = {
+        'cluster': ('cluster',),
+        'roles': ('role_list',),
+        'pending_roles': ('pending_role_list',),
+        'network_data': (
+            'nic_interfaces',
+            'nic_interfaces.assigned_networks_list',
+            'bond_interfaces',
+            'bond_interfaces.assigned_networks_list'
+        )
+    }
+
     @classmethod
     def render(cls, nodes, fields=None):
+        """Render nodes. If fields are given, network data is
+        rendered only if 'network_data' is one of them.
+        """
+        with_network_data = not fields or 'network_data' in fields
+        fields = tuple(
+            f for f in fields or cls.fields if f not in cls.extra_fields)
         json_list = []
         network_manager = NetworkManager
-        ips_mapped = network_manager.get_grouped_ips_by_node()
-        networks_grouped = network_manager.get_networks_grouped_by_cluster()
+        if with_network_data:
+            ips_mapped = network_manager.get_grouped_ips_by_node()
+            networks_grouped = \
+                network_manager.get_networks_grouped_by_cluster()
         for node in nodes:
             try:
-                json_data = BaseHandler.render(node, fields=cls.fields)
-
-                json_data['network_data'] = network_manager.\
-                    get_node_networks_optimized(
-                        node, ips_mapped.get(node.id, []),
-                        networks_grouped.get(node.cluster_id, []))
+                json_data = BaseHandler.render(
+                    node, fields=fields or ('id',))
+
+                if with_network_data:
+                    json_data['network_data'] = network_manager.\
+                        get_node_networks_optimized(
+                            node, ips_mapped.get(node.id, []),
+                            networks_grouped.get(node.cluster_id, []))
                 json_list.append(json_data)
             except Exception:
                 logger.error(traceback.format_exc())
@@ -188,20 +224,34 @@ class NodeCollectionHandler(BaseHandler):
     @content_json
     def GET(self):
         """May receive cluster_id parameter to filter list
-        of nodes
+        of nodes, ids parameter (comma separated ids) to get
+        only some of nodes and fields parameter (comma separated
+        names) to render only some of node fields. Relations
+        which aren't needed for requested fields aren't loaded.
 
         :returns: Collection of JSONized Node objects.
         :http: * 200 (OK)
+               * 400 (invalid ids specified)
         """
-        cluster_id = web.input(cluster_id=None).cluster_id
-        nodes = db().query(Node).options(
-            joinedload('cluster'),
-            joinedload('nic_interfaces'),
-            joinedload('nic_interfaces.assigned_networks_list'),
-            joinedload('bond_interfaces'),
-            joinedload('bond_interfaces.assigned_networks_list'),
-            joinedload('role_list'),
-            joinedload('pending_role_list'))
+        params = web.input(cluster_id=None, ids=None, fields=None)
+        cluster_id = params.cluster_id
+        fields = None
+        if params.fields:
+            fields = tuple(
+                f for f in params.fields.split(',')
+                if f in self.fields + self.extra_fields)
+        nodes = db().query(Node)
+        # meta is the heaviest column, it's loaded only if required
+        if fields and 'meta' not in fields:
+            nodes = nodes.options(defer('meta'))
+        for field, relations in self.fields_relations.iteritems():
+            if not fields or field in fields:
+                nodes = nodes.options(*map(joinedload, relations))
+        if params.ids:
+            nodes = nodes.filter(Node.id.in_(self.checked_data(
+                NodesFilterValidator.validate,
+                data=params.ids
+            )))
         if cluster_id == '':
             nodes = nodes.filter_by(
                 cluster_id=None).all()
@@ -210,7 +260,7 @@ class NodeCollectionHandler(BaseHandler):
                 cluster_id=cluster_id).all()
         else:
             nodes = nodes.all()
-        return self.render(nodes)
+        return self.render(nodes, fields=fields)
 
     @content_json
     def POST(self):
@@ -233,7 +283,7 @@ class NodeCollectionHandler(BaseHandler):
         node = Node(
             #always produce unified (i.e. with lowercased letters)
             #default name for nodes
-            name="Untitled ({0})".format(data['mac'][-5:].lower()),
+            name=Node.default_name(data['mac']),
             timestamp=datetime.now()
         )
         if "cluster_id" in data:
@@ -330,110 +380,237 @@ class NodeCollectionHandler(BaseHandler):
         """
         data = self.checked_data(self.validator.validate_collection_update)
 
-        q = db().query(Node)
-        nodes_updated = []
-        for nd in data:
-            node = None
-            if nd.get("mac"):
-                node = q.filter_by(mac=nd["mac"]).first() \
-                    or self.validator.validate_existent_node_mac_update(nd)
-            else:
-                node = q.get(nd["id"])
+        nodes = self._get_nodes_for_update(data)
+        clusters = self._get_clusters_for_update(data)
+        roles_by_release = {}
 
+        nodes_updated = []
+        nodes_to_clear_changes = []
+        nodes_to_regenerate = set()
+        moved_nodes = []
+        # node ids grouped by identical values of scalar columns
+        columns_groups = {}
+        for nd, node in zip(data, nodes):
             old_cluster_id = node.cluster_id
+            old_roles = set(node.roles)
+            old_pending_roles = set(node.pending_roles)
+            values = {}
 
             if nd.get("pending_roles") == [] and node.cluster:
-                objects.Cluster.clear_pending_changes(
-                    node.cluster,
-                    node_id=node.id
-                )
+                nodes_to_clear_changes.append(node)
 
             if "cluster_id" in nd:
                 if nd["cluster_id"] is None and node.cluster:
-                    objects.Cluster.clear_pending_changes(
-                        node.cluster,
-                        node_id=node.id
-                    )
-                    node.roles = node.pending_roles = []
-                    node.reset_name_to_default()
+                    nodes_to_clear_changes.append(node)
+                    node.role_list = []
+                    node.pending_role_list = []
+                    values["name"] = Node.default_name(node.mac)
+                # foreign key is set as well, because it's used
+                # before the only flush below
+                node.cluster = clusters.get(nd["cluster_id"])
                 node.cluster_id = nd["cluster_id"]
 
-            regenerate_volumes = any((
-                'roles' in nd and
-                set(nd['roles']) != set(node.roles),
-                'pending_roles' in nd and
-                set(nd['pending_roles']) != set(node.pending_roles),
-                node.cluster_id != old_cluster_id
-            ))
-
             for key, value in nd.iteritems():
-                if key == "meta":
+                if key in ("id", "cluster_id"):
+                    continue
+                elif key == "meta":
                     node.update_meta(value)
-                # don't update node ID
-                elif key != "id":
+                elif key in ("roles", "pending_roles"):
+                    self._set_node_roles(node, key, value, roles_by_release)
+                elif key == "mac":
+                    # node is looked up by MAC, it can differ only
+                    # if node was found by MACs of its interfaces
+                    if value.lower() != node.mac:
+                        values[key] = value.lower()
+                elif key in Node.__table__.c:
+                    values[key] = value
+                else:
                     setattr(node, key, value)
-            db().flush()
-            db().refresh(node)
+
+            if values:
+                columns_groups.setdefault(
+                    tuple(sorted(values.iteritems())), []
+                ).append(node)
+
+            if any((
+                'roles' in nd and set(node.roles) != old_roles,
+                'pending_roles' in nd and
+                set(node.pending_roles) != old_pending_roles,
+                node.cluster_id != old_cluster_id
+            )):
+                nodes_to_regenerate.add(node)
+
+            if 'cluster_id' in nd and nd['cluster_id'] != old_cluster_id:
+                moved_nodes.append((node, old_cluster_id))
+
+            if node not in nodes_updated:
+                nodes_updated.append(node)
+
+        for values, group in columns_groups.iteritems():
+            db().query(Node).filter(
+                Node.id.in_([n.id for n in group])
+            ).update(dict(values), synchronize_session=False)
+            for node in group:
+                for key, value in values:
+                    set_committed_value(node, key, value)
+
+        objects.Cluster.clear_pending_changes_for_nodes(
+            nodes_to_clear_changes)
+
+        for node in nodes_updated:
             if not node.attributes:
                 node.attributes = NodeAttributes()
-                db().flush()
-            if not node.attributes.volumes:
-                node.attributes.volumes = \
-                    node.volume_manager.gen_volumes_info()
-                db().flush()
-            if not node.status in ('provisioning', 'deploying'):
-                variants = (
-                    "disks" in node.meta and
-                    len(node.meta["disks"]) != len(
-                        filter(
-                            lambda d: d["type"] == "disk",
-                            node.attributes.volumes
-                        )
-                    ),
-                    regenerate_volumes
-                )
-                if any(variants):
-                    try:
-                        node.attributes.volumes = \
-                            node.volume_manager.gen_volumes_info()
-                        if node.cluster:
-                            objects.Cluster.add_pending_changes(
-                                node.cluster,
-                                "disks",
-                                node_id=node.id
-                            )
-                    except Exception as exc:
-                        msg = (
-                            "Failed to generate volumes "
-                            "info for node '{0}': '{1}'"
-                        ).format(
-                            node.name or data.get("mac") or data.get("id"),
-                            str(exc) or "see logs for details"
-                        )
-                        logger.warning(traceback.format_exc())
-                        notifier.notify("error", msg, node_id=node.id)
+        db().flush()
 
-                db().flush()
+        self._update_volumes(nodes_updated, nodes_to_regenerate)
 
-            network_manager = NetworkManager
+        network_manager = NetworkManager
+        network_manager.clear_assigned_networks_for_nodes(
+            [node for node, old_cluster_id in moved_nodes if old_cluster_id]
+        )
+        nodes_by_manager = {}
+        for node, old_cluster_id in moved_nodes:
+            if node.cluster:
+                nodes_by_manager.setdefault(
+                    node.cluster.network_manager, []
+                ).append(node)
+        for manager, manager_nodes in nodes_by_manager.iteritems():
+            manager.assign_networks_by_default_for_nodes(manager_nodes)
+        db().flush()
 
-            nodes_updated.append(node.id)
-            if 'cluster_id' in nd and nd['cluster_id'] != old_cluster_id:
-                if old_cluster_id:
-                    network_manager.clear_assigned_networks(node)
-                if node.cluster:
-                    network_manager = node.cluster.network_manager
-                    network_manager.assign_networks_by_default(node)
+        return self.render(nodes_updated)
+
+    def _get_nodes_for_update(self, data):
+        """Load all nodes referenced in collection update data with
+        one query. Nodes which are not found by MAC are looked up
+        by MACs of their interfaces.
+
+        :returns: list of Node objects in the same order as data
+        """
+        ids = [nd["id"] for nd in data if not nd.get("mac")]
+        macs = [nd["mac"].lower() for nd in data if nd.get("mac")]
+        criteria = []
+        if ids:
+            criteria.append(Node.id.in_(ids))
+        if macs:
+            criteria.append(Node.mac.in_(macs))
+
+        loaded = []
+        if criteria:
+            loaded = db().query(Node).options(
+                joinedload('cluster'),
+                joinedload('attributes'),
+                joinedload('role_list'),
+                joinedload('pending_role_list'),
+                joinedload('nic_interfaces'),
+                joinedload('nic_interfaces.assigned_networks_list'),
+                joinedload('bond_interfaces'),
+                joinedload('bond_interfaces.assigned_networks_list')
+            ).filter(or_(*criteria)).all()
+        nodes_by_id = dict((n.id, n) for n in loaded)
+        nodes_by_mac = dict((n.mac, n) for n in loaded)
+
+        nodes = []
+        for nd in data:
+            if nd.get("mac"):
+                node = nodes_by_mac.get(nd["mac"].lower()) \
+                    or self.validator.validate_existent_node_mac_update(nd)
+            else:
+                node = nodes_by_id.get(nd["id"])
+            nodes.append(node)
+        return nodes
+
+    def _get_clusters_for_update(self, data):
+        """Load all clusters nodes are moved to with one query.
+
+        :returns: dict of Cluster objects by ids
+        """
+        clusters_ids = set(
+            nd["cluster_id"] for nd in data if nd.get("cluster_id"))
+        if not clusters_ids:
+            return {}
+        return dict(
+            (c.id, c) for c in db().query(Cluster).filter(
+                Cluster.id.in_(clusters_ids))
+        )
 
-        # we need eagerload everything that is used in render
-        nodes = db().query(Node).options(
-            joinedload('cluster'),
-            joinedload('nic_interfaces'),
-            joinedload('nic_interfaces.assigned_networks_list'),
-            joinedload('bond_interfaces'),
-            joinedload('bond_interfaces.assigned_networks_list')).\
-            filter(Node.id.in_(nodes_updated)).all()
-        return self.render(nodes)
+    def _set_node_roles(self, node, key, names, roles_by_release):
+        """The same as assignment to Node.roles or Node.pending_roles
+        but roles of every release are loaded only once.
+        """
+        if not node.cluster:
+            logger.warning(
+                u"Attempting to assign {0} to node "
+                u"'{1}' which isn't added to cluster".format(
+                    key, node.name or node.id
+                )
+            )
+            return
+        release_id = node.cluster.release_id
+        if release_id not in roles_by_release:
+            roles_by_release[release_id] = db().query(Role).filter_by(
+                release_id=release_id
+            ).order_by(Role.id).all()
+        roles = [r for r in roles_by_release[release_id] if r.name in names]
+        if key == "roles":
+            node.role_list = roles
+        else:
+            node.pending_role_list = roles
+
+    def _update_volumes(self, nodes, nodes_to_regenerate):
+        """Generate volumes for nodes which don't have them yet and
+        regenerate volumes for nodes which disks or roles have been
+        changed. Volumes are generated once for every distinct
+        layout of disks, RAM and roles.
+        """
+        nodes_to_generate = []
+        nodes_with_changes = []
+        for node in nodes:
+            if not node.attributes.volumes:
+                nodes_to_generate.append(node)
+            if node.status in ('provisioning', 'deploying'):
+                continue
+            if node in nodes_to_regenerate or (
+                    node.attributes.volumes and
+                    "disks" in node.meta and
+                    len(node.meta["disks"]) != len(only_disks(
+                        node.attributes.volumes))):
+                if node not in nodes_to_generate:
+                    nodes_to_generate.append(node)
+                nodes_with_changes.append(node)
+
+        layouts = {}
+        layouts_errors = {}
+        failed_nodes = set()
+        batch = notifier.NotificationsBatch(commit=False)
+        for node in nodes_to_generate:
+            key = volumes_layout_key(node)
+            if key not in layouts and key not in layouts_errors:
+                try:
+                    layouts[key] = node.volume_manager.gen_volumes_info()
+                except Exception as exc:
+                    logger.warning(traceback.format_exc())
+                    layouts_errors[key] = str(exc) or "see logs for details"
+            if key in layouts_errors:
+                failed_nodes.add(node)
+                msg = (
+                    u"Failed to generate volumes "
+                    u"info for node '{0}': '{1}'"
+                ).format(node.name or node.mac, layouts_errors[key])
+                batch.notify("error", msg, node_id=node.id)
+            else:
+                node.attributes.volumes = deepcopy(layouts[key])
+
+        batch.send()
+
+        logger.debug(
+            u"Volumes generated for %s nodes with %s distinct layouts",
+            len(nodes_to_generate), len(layouts) + len(layouts_errors)
+        )
+        objects.Cluster.add_pending_changes_for_nodes(
+            "disks",
+            [n for n in nodes_with_changes if n not in failed_nodes]
+        )
 
 
 class NodeAgentHandler(BaseHandler):
@@ -471,6 +648,7 @@ class NodeAgentHandler(BaseHandler):
             msg = u"Node '{0}' is back online".format(node.human_readable_name)
             logger.info(msg)
             notifier.notify("discover", msg, node_id=node.id)
+            objects.Event.publish_node(node)
         db().flush()
 
         if 'agent_checksum' in nd and (
@@ -664,8 +842,8 @@ class NodesAllocationStatsHandler(BaseHandler):
         """:returns: Total and unallocated nodes count.
         :http: * 200 (OK)
         """
-        unallocated_nodes = db().query(Node).filter_by(cluster_id=None).count()
-        total_nodes = \
-            db().query(Node).count()
+        unallocated_nodes = db().query(func.count(Node.id)).filter_by(
+            cluster_id=None).scalar()
+        total_nodes = db().query(func.count(Node.id)).scalar()
         return {'total': total_nodes,
                 'unallocated': unallocated_nodes}
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright 2013 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from nailgun.api.serializers.base import BasicSerializer
+
+
+class EventSerializer(BasicSerializer):
+
+    fields = (
+        "id",
+        "position",
+        "topic",
+        "action",
+        "object_id",
+        "cluster_id",
+        "data"
+    )
+
+    @classmethod
+    def serialize(cls, instance, fields=None):
+        data_dict = super(EventSerializer, cls).serialize(
+            instance,
+            fields=fields
+        )
+        data_dict["datetime"] = instance.datetime.isoformat()
+        return data_dict
@@ -35,6 +35,8 @@ from nailgun.api.handlers.disks import NodeDefaultsDisksHandler
 from nailgun.api.handlers.disks import NodeDisksHandler
 from nailgun.api.handlers.disks import NodeVolumesInformationHandler
 
+from nailgun.api.handlers.events import EventCollectionHandler
+
 from nailgun.api.handlers.logs import LogEntryCollectionHandler
 from nailgun.api.handlers.logs import LogPackageHandler
 from nailgun.api.handlers.logs import LogSourceByNodeCollectionHandler
@@ -167,6 +169,9 @@ urls = (
     r'/notifications/(?P<notification_id>\d+)/?$',
     NotificationHandler,
 
+    r'/events/?$',
+    EventCollectionHandler,
+
     r'/logs/?$',
     LogEntryCollectionHandler,
     r'/logs/package/?$',
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#    Copyright 2013 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from nailgun import consts
+
+from nailgun.api.validators.base import BasicValidator
+from nailgun.errors import errors
+
+
+class EventValidator(BasicValidator):
+
+    @classmethod
+    def validate_feed_params(cls, params):
+        """Validate query parameters of events feed request
+
+        :param params: web.input() storage
+        :returns: dict with cursor, cluster_id, topics and timeout
+        """
+        data = {}
+        for name in ("cursor", "cluster_id"):
+            value = params.get(name)
+            if value in (None, u''):
+                data[name] = None
+                continue
+            try:
+                data[name] = int(value)
+            except ValueError:
+                raise errors.InvalidData(
+                    u"Invalid {0} value: '{1}'".format(name, value)
+                )
+
+        try:
+            data["timeout"] = float(params.get("timeout") or 0)
+        except ValueError:
+            raise errors.InvalidData(
+                u"Invalid timeout value: '{0}'".format(params.get("timeout"))
+            )
+
+        topics = params.get("topics")
+        data["topics"] = topics.split(",") if topics else None
+        for topic in data["topics"] or []:
+            if topic not in consts.EVENT_TOPICS:
+                raise errors.InvalidData(
+                    u"Invalid event topic: '{0}'".format(topic)
+                )
+        return data
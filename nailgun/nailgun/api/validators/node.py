@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from sqlalchemy import or_
+
 from nailgun.api.validators.base import BasicValidator
 from nailgun.api.validators.json_schema.disks import disks_simple_format_schema
 from nailgun.api.validators.json_schema.node import node_format_schema
@@ -162,7 +164,7 @@ class NodeValidator(BasicValidator):
             MetaValidator.validate_update)
 
     @classmethod
-    def validate_roles(cls, data, node):
+    def validate_roles(cls, data):
         if 'roles' in data:
             if not isinstance(data['roles'], list) or \
                     any(not isinstance(role, (
@@ -180,13 +182,30 @@ class NodeValidator(BasicValidator):
                 "Invalid status for node",
                 log_message=True
             )
-        if 'roles' in d and 'id' in d:
-            node = db().query(Node).get(d['id'])
-            cls.validate_roles(d, node)
+        cls.validate_roles(d)
         if 'meta' in d:
             d['meta'] = MetaValidator.validate_update(d['meta'])
         return d
 
+    @classmethod
+    def _get_existent_ids_and_macs(cls, data):
+        """Look up all nodes referenced in collection update data
+        with one query.
+
+        :returns: (set of ids, set of MACs) of existent nodes
+        """
+        ids = set(nd["id"] for nd in data if nd.get("id"))
+        macs = set(nd["mac"].lower() for nd in data if nd.get("mac"))
+        criteria = []
+        if ids:
+            criteria.append(Node.id.in_(ids))
+        if macs:
+            criteria.append(Node.mac.in_(macs))
+        if not criteria:
+            return set(), set()
+        existent = db().query(Node.id, Node.mac).filter(or_(*criteria)).all()
+        return set(n.id for n in existent), set(n.mac for n in existent)
+
     @classmethod
     def validate_collection_update(cls, data):
         d = cls.validate_json(data)
@@ -196,7 +215,6 @@ class NodeValidator(BasicValidator):
                 log_message=True
             )
 
-        q = db().query(Node)
         for nd in d:
             if not nd.get("mac") and not nd.get("id"):
                 raise errors.InvalidData(
@@ -208,24 +226,21 @@ class NodeValidator(BasicValidator):
                     "Null MAC is specified",
                     log_message=True
                 )
-            else:
-                if nd.get("mac"):
-                    existent_node = q.filter_by(mac=nd["mac"]).first() \
-                        or cls.validate_existent_node_mac_update(nd)
-                    if not existent_node:
-                        raise errors.InvalidData(
-                            "Invalid MAC specified",
-                            log_message=True
-                        )
-                if nd.get("id"):
-                    existent_node = q.get(nd["id"])
-                    if not existent_node:
-                        raise errors.InvalidData(
-                            "Invalid ID specified",
-                            log_message=True
-                        )
-                if 'roles' in nd:
-                    cls.validate_roles(nd, existent_node)
+
+        existent_ids, existent_macs = cls._get_existent_ids_and_macs(d)
+        for nd in d:
+            if nd.get("mac") and nd["mac"].lower() not in existent_macs \
+                    and not cls.validate_existent_node_mac_update(nd):
+                raise errors.InvalidData(
+                    "Invalid MAC specified",
+                    log_message=True
+                )
+            if nd.get("id") and nd["id"] not in existent_ids:
+                raise errors.InvalidData(
+                    "Invalid ID specified",
+                    log_message=True
+                )
+            cls.validate_roles(nd)
             if 'meta' in nd:
                 nd['meta'] = MetaValidator.validate_update(nd['meta'])
         return d
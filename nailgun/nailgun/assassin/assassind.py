@@ -19,43 +19,191 @@ import sys
 
 sys.path.insert(0, os.path.dirname(__file__))
 
+import heapq
 import time
 
 from datetime import datetime
 from datetime import timedelta
+from sqlalchemy.orm import defer
+from sqlalchemy.sql import and_
 from sqlalchemy.sql import not_
 
 from nailgun import notifier
+from nailgun import objects
 
 from nailgun.db import db
 from nailgun.db.sqlalchemy.models import Node
 from nailgun.logger import logger
+from nailgun.openstack.common import timeutils
 from nailgun.settings import settings
 
 
-def update_nodes_status(timeout):
+def mark_nodes_offline(criterion):
+    """Switch online nodes which match criterion to offline.
+    Notifications, events and nodes updates are written
+    with batched queries in one transaction.
+
+    :param criterion: filter criterion for nodes
+    :returns: list of ids of nodes switched to offline
+    """
     to_update = db().query(Node).filter(
-        not_(Node.status == 'provisioning')
-    ).filter(
-        datetime.now() > (Node.timestamp + timedelta(seconds=timeout))
-    ).filter_by(online=True)
-    for node_db in to_update:
-        notifier.notify(
-            "error",
-            u"Node '{0}' has gone away".format(
-                node_db.human_readable_name),
-            node_id=node_db.id
+        and_(Node.online == (True), criterion)
+    )
+    events = []
+    with notifier.NotificationsBatch() as batch:
+        for node_db in to_update.options(defer('meta')):
+            batch.notify(
+                "error",
+                u"Node '{0}' has gone away".format(
+                    node_db.human_readable_name),
+                node_id=node_db.id
+            )
+            events.append((node_db.id, {"online": False}, node_db.cluster_id))
+        if events:
+            objects.Event.publish_bulk("node", events)
+            to_update.update(
+                {"online": False},
+                synchronize_session="fetch"
+            )
+    return [event[0] for event in events]
+
+
+def _is_dead(deadline):
+    # comparison of column with constant can use index on timestamp
+    return and_(
+        not_(Node.status == 'provisioning'),
+        Node.timestamp < deadline
+    )
+
+
+def update_nodes_status(timeout):
+    """Switch to offline all nodes which haven't sent anything
+    for timeout seconds. Scans all online nodes.
+    """
+    mark_nodes_offline(
+        _is_dead(datetime.now() - timedelta(seconds=timeout))
+    )
+
+
+class LivenessTracker(object):
+    """Tracks deadlines of online nodes and switches nodes to offline
+    at their deadlines instead of scanning all nodes periodically.
+
+    Deadlines are kept in a min-heap. Heartbeats are fed from the
+    database: :meth:`sync` reads only nodes whose timestamp changed
+    since the previous sync, using index on nodes.timestamp.
+    :meth:`expire` checks nodes whose deadlines passed with one query
+    and switches dead ones to offline in one batch.
+    """
+
+    def __init__(self, timeout, interval):
+        self.timeout = timedelta(seconds=timeout)
+        self.interval = timedelta(seconds=interval)
+        self._heap = []
+        self._deadlines = {}
+        self._seen = {}
+        self._synced_at = None
+
+    def _push(self, node_id, deadline):
+        self._deadlines[node_id] = deadline
+        heapq.heappush(self._heap, (deadline, node_id))
+
+    def _track(self, node_id, timestamp):
+        self._seen[node_id] = timestamp
+        self._push(node_id, timestamp + self.timeout)
+
+    def _forget(self, node_id):
+        self._seen.pop(node_id, None)
+        self._deadlines.pop(node_id, None)
+
+    def sync(self, now=None):
+        """Read heartbeats written since previous sync. The first
+        sync reads all online nodes. Heartbeats are read with
+        overlap of one interval, so timestamps which were committed
+        late aren't missed.
+        """
+        now = now or datetime.now()
+        query = db().query(Node.id, Node.timestamp).filter(
+            Node.online == (True)
         )
-    to_update.update({"online": False})
+        if self._synced_at is not None:
+            query = query.filter(
+                Node.timestamp >= self._synced_at - self.interval
+            )
+        self._synced_at = now
+        for node_id, timestamp in query:
+            if self._seen.get(node_id) != timestamp:
+                self._track(node_id, timestamp)
+
+    def expire(self, now=None):
+        """Switch to offline nodes whose deadlines passed.
+
+        :returns: list of ids of nodes switched to offline
+        """
+        now = now or datetime.now()
+        expired = set()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, node_id = heapq.heappop(self._heap)
+            # heap may keep outdated deadlines of the same node
+            if self._deadlines.get(node_id) == deadline:
+                expired.add(node_id)
+        if not expired:
+            return []
+
+        for node_id in expired:
+            self._forget(node_id)
+        dead_ids = []
+        for node_id, status, timestamp in db().query(
+            Node.id, Node.status, Node.timestamp
+        ).filter(
+            Node.id.in_(expired),
+            Node.online == (True)
+        ):
+            if timestamp + self.timeout > now:
+                self._track(node_id, timestamp)
+            elif status == 'provisioning':
+                # agent doesn't work during provisioning,
+                # node is checked again after provisioning
+                self._seen[node_id] = timestamp
+                self._push(node_id, now + self.interval)
+            else:
+                dead_ids.append(node_id)
+
+        if not dead_ids:
+            return []
+        return mark_nodes_offline(and_(
+            Node.id.in_(dead_ids),
+            _is_dead(now - self.timeout)
+        ))
+
+    def seconds_to_next_deadline(self, now=None):
+        """Seconds before the nearest deadline, but not more
+        than interval, so new heartbeats are read in time.
+        """
+        now = now or datetime.now()
+        deadline = now + self.interval
+        if self._heap:
+            deadline = min(deadline, self._heap[0][0])
+        return max(timeutils.delta_seconds(now, deadline), 0)
+
+
+def prune_events(ttl):
+    objects.EventCollection.prune(ttl)
     db().commit()
 
 
 def run():
     logger.info('Running Assassind...')
+    tracker = LivenessTracker(
+        settings.KEEPALIVE['timeout'],
+        settings.KEEPALIVE['interval']
+    )
     try:
         while True:
-            update_nodes_status(settings.KEEPALIVE['timeout'])
-            time.sleep(settings.KEEPALIVE['interval'])
+            tracker.sync()
+            tracker.expire()
+            prune_events(settings.EVENTS['ttl'])
+            time.sleep(tracker.seconds_to_next_deadline())
     except (KeyboardInterrupt, SystemExit):
         logger.info('Stopping Assassind...')
         sys.exit(1)
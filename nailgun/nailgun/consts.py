@@ -87,6 +87,18 @@ OVS_BOND_MODES = Enum(
     )
 )
 
+EVENT_TOPICS = Enum(
+    'task',
+    'node',
+    'notification'
+)
+
+EVENT_ACTIONS = Enum(
+    'create',
+    'update',
+    'delete'
+)
+
 TASK_STATUSES = Enum(
     'ready',
     'running',
@@ -182,6 +182,55 @@ def upgrade():
         'agent_checksum', sa.String(40), nullable=True
     ))
 
+    op.execute(sa.schema.CreateSequence(sa.Sequence('events_position_seq')))
+    op.create_table(
+        'events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=True),
+        sa.Column(
+            'topic',
+            sa.Enum(
+                'task',
+                'node',
+                'notification',
+                name='event_topic'
+            ),
+            nullable=False
+        ),
+        sa.Column(
+            'action',
+            sa.Enum(
+                'create',
+                'update',
+                'delete',
+                name='event_action'
+            ),
+            nullable=False
+        ),
+        sa.Column('object_id', sa.Integer(), nullable=False),
+        sa.Column('cluster_id', sa.Integer(), nullable=True),
+        sa.Column('data', JSON(), nullable=True),
+        sa.Column('datetime', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('position')
+    )
+    op.create_index(
+        'ix_events_cluster_id',
+        'events',
+        ['cluster_id']
+    )
+    op.create_table(
+        'cache_versions',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.create_index(
+        'ix_nodes_timestamp',
+        'nodes',
+        ['timestamp']
+    )
+
     ### end Alembic commands ###
 
 
@@ -313,4 +362,11 @@ def downgrade():
     op.drop_table('net_bond_assignments')
     op.drop_table('node_bond_interfaces')
     op.drop_column('nodes', 'agent_checksum')
+    op.drop_index('ix_events_cluster_id', 'events')
+    op.drop_table('events')
+    op.execute(sa.schema.DropSequence(sa.Sequence('events_position_seq')))
+    op.execute('DROP TYPE event_topic')
+    op.execute('DROP TYPE event_action')
+    op.drop_table('cache_versions')
+    op.drop_index('ix_nodes_timestamp', 'nodes')
     ### end Alembic commands ###
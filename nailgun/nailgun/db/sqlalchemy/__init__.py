@@ -77,8 +77,17 @@ def dropdb():
         """)]
     for type_ in types:
         db().execute("DROP TYPE IF EXISTS %s CASCADE" % type_)
+
+    sequences = [name for (name,) in db().execute(
+        "SELECT sequence_name FROM information_schema.sequences "
+        "WHERE sequence_schema = 'public'")]
+    for sequence in sequences:
+        db().execute("DROP SEQUENCE IF EXISTS %s CASCADE" % sequence)
     db().commit()
 
+    from nailgun.db.sqlalchemy.cache import cache
+    cache.clear()
+
 
 def flush():
     """Delete all data from all tables within nailgun metadata
@@ -89,3 +98,6 @@ def flush():
         for table in reversed(Base.metadata.sorted_tables):
             con.execute(table.delete())
         trans.commit()
+
+    from nailgun.db.sqlalchemy.cache import cache
+    cache.clear()
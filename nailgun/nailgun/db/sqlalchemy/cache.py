@@ -0,0 +1,110 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+from sqlalchemy.orm.util import identity_key
+
+from nailgun.db.sqlalchemy import db
+from nailgun.db.sqlalchemy.models.base import CacheVersion
+
+
+class VersionedCache(object):
+    """Process-wide cache of rarely changing entities (admin
+    network group, releases metadata).
+
+    Values are grouped by namespaces. Every namespace has a version
+    stamp stored in database, which is bumped by :meth:`invalidate`.
+    Stamps are read with one query at most once per database
+    transaction of a thread, so changes made by other processes
+    (API and receiver) are noticed in the next transaction, and
+    within a transaction cached values are returned without queries.
+
+    Cached values are shared between threads and must not be
+    modified by callers.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._local = threading.local()
+
+    def _get_versions(self):
+        transaction = db().transaction
+        if getattr(self._local, 'transaction', None) is not transaction:
+            self._local.versions = dict(db().query(
+                CacheVersion.name,
+                CacheVersion.version
+            ))
+            self._local.transaction = transaction
+        return self._local.versions
+
+    def get(self, namespace, key, loader):
+        """Get value from cache or load and store it.
+
+        :param namespace: name of the group of values
+        :param key: key of value inside namespace
+        :param loader: callable without arguments which loads value
+        :returns: cached or loaded value
+        """
+        version = self._get_versions().get(namespace, 0)
+        cached = self._values.get((namespace, key))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        value = loader()
+        self._values[(namespace, key)] = (version, value)
+        return value
+
+    def invalidate(self, namespace):
+        """Bump version stamp of namespace in current transaction
+        and drop values cached by this process.
+
+        :param namespace: name of the group of values
+        :returns: None
+        """
+        updated = db().query(CacheVersion).filter_by(
+            name=namespace
+        ).update(
+            {'version': CacheVersion.version + 1},
+            synchronize_session=False
+        )
+        if not updated:
+            db().add(CacheVersion(name=namespace, version=1))
+            db().flush()
+        self._local.transaction = None
+        self.clear(namespace)
+
+    def clear(self, namespace=None):
+        """Drop cached values of namespace or all values
+        without touching version stamps.
+        """
+        if namespace is None:
+            self._values.clear()
+            return
+        for key in self._values.keys():
+            if key[0] == namespace:
+                self._values.pop(key, None)
+
+
+def get_instance(model, ident):
+    """Get object from session identity map or from database
+    if it was not loaded in this session yet. Unlike Query.get,
+    it doesn't refresh already loaded objects.
+    """
+    instance = db().identity_map.get(identity_key(model, ident))
+    if instance is None:
+        instance = db().query(model).filter_by(id=ident).first()
+    return instance
+
+
+cache = VersionedCache()
@@ -14,20 +14,24 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+try:
+    from collections import OrderedDict
+except ImportError:
+    # python 2.6 or earlier use backport
+    from ordereddict import OrderedDict
 from datetime import datetime
 import itertools
 import jinja2
 import json
 import os.path
-import Queue
 import StringIO
 import sys
 import yaml
 
-from sqlalchemy import orm
 import sqlalchemy.types
 
 from nailgun.db import db
+from nailgun.db.sqlalchemy.cache import cache
 from nailgun.db.sqlalchemy import models
 from nailgun.logger import logger
 from nailgun.network.manager import NetworkManager
@@ -68,122 +72,161 @@ def load_fixture(fileobj, loader=None):
     return fixture
 
 
+def _get_fk_model(model, field):
+    """Model referred by relationship field or None
+    if field isn't a relationship.
+    """
+    f = getattr(model, field)
+    try:
+        if hasattr(f.comparator.prop, "argument"):
+            if hasattr(f.comparator.prop.argument, "__call__"):
+                return f.comparator.prop.argument()
+            else:
+                return f.comparator.prop.argument.class_
+    except AttributeError:
+        pass
+    return None
+
+
+def _sort_models(dependencies):
+    """Topological sort of fixture models.
+
+    :param dependencies: OrderedDict of model -> set of referred models
+    :returns: list of models where referred models go first
+    """
+    ordered = []
+    pending = OrderedDict(
+        (model, (deps & set(dependencies)) - set([model]))
+        for model, deps in dependencies.iteritems()
+    )
+    while pending:
+        ready = [model for model, deps in pending.iteritems() if not deps]
+        if not ready:
+            logger.error(
+                u"Circular dependency between fixture models: "
+                "{0}".format(", ".join(m.__name__ for m in pending)))
+            ready = pending.keys()
+        for model in ready:
+            ordered.append(model)
+            del pending[model]
+        for deps in pending.itervalues():
+            deps.difference_update(ready)
+    return ordered
+
+
+def _create_object(obj, keys):
+    model = obj['model']
+    new_obj = model()
+
+    for field, value in obj["fields"].iteritems():
+        f = getattr(model, field)
+        fk_model = _get_fk_model(model, field)
+
+        if fk_model:
+            if not value:
+                continue
+            related = keys.get(fk_model.__tablename__, {})
+            pks = value if isinstance(value, list) else [value]
+            if any(pk not in related for pk in pks):
+                logger.error(
+                    u"Can't resolve foreign key "
+                    "'{0}' for object '{1}'".format(
+                        field,
+                        obj["model"]
+                    )
+                )
+                continue
+            if isinstance(value, list):
+                getattr(new_obj, field).extend(related[pk] for pk in pks)
+            else:
+                setattr(new_obj, field, related[value])
+        elif hasattr(f, 'property') and isinstance(
+            f.property.columns[0].type, sqlalchemy.types.DateTime
+        ):
+            if value:
+                setattr(
+                    new_obj,
+                    field,
+                    datetime.strptime(value, "%d-%m-%Y %H:%M:%S")
+                )
+            else:
+                setattr(
+                    new_obj,
+                    field,
+                    datetime.now()
+                )
+        else:
+            setattr(new_obj, field, value)
+
+    return new_obj
+
+
+def _process_nodes(nodes):
+    """Generate attributes, volumes and interfaces
+    for nodes uploaded from fixture.
+    """
+    for node in nodes:
+        node.attributes = models.NodeAttributes()
+    db().flush()
+    for node in nodes:
+        node.attributes.volumes = node.volume_manager.gen_volumes_info()
+    NetworkManager.update_interfaces_info_for_nodes(nodes)
+
+
 def upload_fixture(fileobj, loader=None):
+    """Upload fixture in one transaction. Models are processed
+    in order of their dependencies, already uploaded objects
+    are found with one query per model.
+    """
     fixture = load_fixture(fileobj, loader)
 
-    queue = Queue.Queue()
-    keys = {}
+    # releases and network groups are created bypassing
+    # objects layer, so cached values are dropped explicitly
+    cache.invalidate('release')
+    cache.invalidate('admin_network')
 
+    objects_by_model = OrderedDict()
     for obj in fixture:
-        pk = obj['pk']
         model_name = obj["model"].split(".")[1]
-
-        try:
-            itertools.dropwhile(
-                lambda m: not hasattr(models, m),
-                [model_name.capitalize(),
-                 "".join(map(lambda n: n.capitalize(), model_name.split("_")))]
-            ).next()
-        except StopIteration:
+        model = getattr(models, capitalize_model_name(model_name), None)
+        if model is None:
             raise Exception("Couldn't find model {0}".format(model_name))
+        obj['model'] = model
+        objects_by_model.setdefault(model, []).append(obj)
 
-        obj['model'] = getattr(models, capitalize_model_name(model_name))
-        keys[obj['model'].__tablename__] = {}
-
-        # Check if it's already uploaded
-        obj_from_db = db().query(obj['model']).get(pk)
-        if obj_from_db:
-            logger.info("Fixture model '%s' with pk='%s' already"
-                        " uploaded. Skipping", model_name, pk)
-            continue
-        queue.put(obj)
-
-    pending_objects = []
-
-    while True:
-        try:
-            obj = queue.get_nowait()
-        except Exception:
-            break
-
-        new_obj = obj['model']()
-
-        fk_fields = {}
-        for field, value in obj["fields"].iteritems():
-            f = getattr(obj['model'], field)
-            impl = getattr(f, 'impl', None)
-            fk_model = None
-            try:
-                if hasattr(f.comparator.prop, "argument"):
-                    if hasattr(f.comparator.prop.argument, "__call__"):
-                        fk_model = f.comparator.prop.argument()
-                    else:
-                        fk_model = f.comparator.prop.argument.class_
-            except AttributeError:
-                pass
-
-            if fk_model:
-                if value not in keys[fk_model.__tablename__]:
-                    if obj not in pending_objects:
-                        queue.put(obj)
-                        pending_objects.append(obj)
-                        continue
-                    else:
-                        logger.error(
-                            u"Can't resolve foreign key "
-                            "'{0}' for object '{1}'".format(
-                                field,
-                                obj["model"]
-                            )
-                        )
-                        break
-                else:
-                    value = keys[fk_model.__tablename__][value].id
-
-            if isinstance(impl, orm.attributes.ScalarObjectAttributeImpl):
-                if value:
-                    fk_fields[field] = (value, fk_model)
-            elif isinstance(impl, orm.attributes.CollectionAttributeImpl):
-                if value:
-                    fk_fields[field] = (value, fk_model)
-            elif hasattr(f, 'property') and isinstance(
-                f.property.columns[0].type, sqlalchemy.types.DateTime
-            ):
-                if value:
-                    setattr(
-                        new_obj,
-                        field,
-                        datetime.strptime(value, "%d-%m-%Y %H:%M:%S")
-                    )
-                else:
-                    setattr(
-                        new_obj,
-                        field,
-                        datetime.now()
-                    )
-            else:
-                setattr(new_obj, field, value)
-
-        for field, data in fk_fields.iteritems():
-            if isinstance(data[0], int):
-                setattr(new_obj, field, db().query(data[1]).get(data[0]))
-            elif isinstance(data[0], list):
-                for v in data[0]:
-                    getattr(new_obj, field).append(
-                        db().query(data[1]).get(v)
-                    )
-        db().add(new_obj)
-        db().commit()
-        keys[obj['model'].__tablename__][obj["pk"]] = new_obj
+    dependencies = OrderedDict()
+    for model, objs in objects_by_model.iteritems():
+        fields = set(itertools.chain.from_iterable(
+            obj['fields'] for obj in objs))
+        dependencies[model] = set(
+            filter(None, (_get_fk_model(model, f) for f in fields)))
+
+    keys = {}
+    new_nodes = []
+    for model in _sort_models(dependencies):
+        objs = objects_by_model[model]
+        keys[model.__tablename__] = {}
+
+        pk_column = model.__mapper__.primary_key[0]
+        uploaded = set(pk for (pk,) in db().query(pk_column).filter(
+            pk_column.in_([obj['pk'] for obj in objs])
+        ))
 
-        # UGLY HACK for testing
-        if new_obj.__class__.__name__ == 'Node':
-            new_obj.attributes = models.NodeAttributes()
-            db().commit()
-            new_obj.attributes.volumes = \
-                new_obj.volume_manager.gen_volumes_info()
-            NetworkManager.update_interfaces_info(new_obj)
-            db().commit()
+        for obj in objs:
+            if obj['pk'] in uploaded:
+                logger.info("Fixture model '%s' with pk='%s' already"
+                            " uploaded. Skipping", model.__name__, obj['pk'])
+                continue
+            new_obj = _create_object(obj, keys)
+            db().add(new_obj)
+            keys[model.__tablename__][obj['pk']] = new_obj
+            if isinstance(new_obj, models.Node):
+                new_nodes.append(new_obj)
+        db().flush()
+
+    if new_nodes:
+        _process_nodes(new_nodes)
+    db().commit()
 
 
 def upload_fixtures():
@@ -207,24 +250,35 @@ def upload_fixtures():
         logger.info("Fixture has been uploaded from file: %s" % fn)
 
 
-def dump_fixture(model_name):
-    dump = []
+def dump_fixture(model_name, stream=None, batch_size=1000):
+    """Dump all objects of model as fixture. Objects are
+    loaded and written by batches, so the whole table
+    isn't kept in memory.
+    """
+    stream = stream or sys.stdout
     app_name = 'nailgun'
     model = getattr(models, capitalize_model_name(model_name))
-    for obj in db().query(model).all():
+    pk_column = model.__mapper__.primary_key[0]
+    columns = [
+        str(prop.key) for prop in model.__mapper__.iterate_properties
+        if isinstance(prop, sqlalchemy.orm.ColumnProperty)
+    ]
+
+    stream.write('[')
+    query = db().query(model).order_by(pk_column).yield_per(batch_size)
+    for i, obj in enumerate(query):
         obj_dump = {}
-        obj_dump['pk'] = getattr(obj, model.__mapper__.primary_key[0].name)
+        obj_dump['pk'] = getattr(obj, pk_column.name)
         obj_dump['model'] = "%s.%s" % (app_name, model_name)
         obj_dump['fields'] = {}
-        dump.append(obj_dump)
-        for prop in model.__mapper__.iterate_properties:
-            if isinstance(prop, sqlalchemy.orm.ColumnProperty):
-                field = str(prop.key)
-                value = getattr(obj, field)
-                if value is None:
-                    continue
-                if not isinstance(value, (
-                        list, dict, str, unicode, int, float, bool)):
-                    value = ""
-                obj_dump['fields'][field] = value
-    sys.stdout.write(json.dumps(dump, indent=4))
+        for field in columns:
+            value = getattr(obj, field)
+            if value is None:
+                continue
+            if not isinstance(value, (
+                    list, dict, str, unicode, int, float, bool)):
+                value = ""
+            obj_dump['fields'][field] = value
+        stream.write(',\n' if i else '\n')
+        stream.write(json.dumps(obj_dump, indent=4))
+    stream.write('\n]')
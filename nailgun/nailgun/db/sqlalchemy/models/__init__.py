@@ -13,6 +13,7 @@
 #    under the License.
 
 
+from nailgun.db.sqlalchemy.models.base import CacheVersion
 from nailgun.db.sqlalchemy.models.base import CapacityLog
 
 from nailgun.db.sqlalchemy.models.cluster import Attributes
@@ -39,6 +40,8 @@ from nailgun.db.sqlalchemy.models.neutron import NeutronConfig
 
 from nailgun.db.sqlalchemy.models.notification import Notification
 
+from nailgun.db.sqlalchemy.models.event import Event
+
 from nailgun.db.sqlalchemy.models.task import Task
 
 from nailgun.db.sqlalchemy.models.redhat import RedHatAccount
@@ -19,6 +19,7 @@ from datetime import datetime
 from sqlalchemy import Column
 from sqlalchemy import DateTime
 from sqlalchemy import Integer
+from sqlalchemy import String
 
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -36,3 +37,13 @@ class CapacityLog(Base):
     id = Column(Integer, primary_key=True)
     report = Column(JSON)
     datetime = Column(DateTime, default=lambda: datetime.now())
+
+
+class CacheVersion(Base):
+    """Version stamp of namespace of
+    nailgun.db.sqlalchemy.cache.VersionedCache
+    """
+    __tablename__ = 'cache_versions'
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
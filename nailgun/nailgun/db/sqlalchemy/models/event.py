@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright 2013 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import Enum
+from sqlalchemy import Integer
+from sqlalchemy import Sequence
+
+from nailgun import consts
+from nailgun.db.sqlalchemy.models.base import Base
+from nailgun.db.sqlalchemy.models.fields import JSON
+
+
+# position of event in the change feed, see Event.position
+position_seq = Sequence('events_position_seq', metadata=Base.metadata)
+
+
+class Event(Base):
+    """Record of the change feed. Clients use position as a cursor.
+    Unlike id, which is taken at insert time, position is assigned
+    when the transaction which added the event commits, so a client
+    can't miss an event committed later than events after it.
+    """
+    __tablename__ = 'events'
+
+    id = Column(Integer, primary_key=True)
+    # NULL until the transaction which added the event commits
+    position = Column(Integer, unique=True)
+    topic = Column(
+        Enum(*consts.EVENT_TOPICS, name='event_topic'),
+        nullable=False
+    )
+    action = Column(
+        Enum(*consts.EVENT_ACTIONS, name='event_action'),
+        nullable=False,
+        default='update'
+    )
+    object_id = Column(Integer, nullable=False)
+    # not a foreign key: events should survive removal of
+    # the objects they describe
+    cluster_id = Column(Integer, index=True)
+    data = Column(JSON, default={})
+    datetime = Column(DateTime, nullable=False)
@@ -23,7 +23,7 @@ from sqlalchemy import Integer
 from sqlalchemy import String
 from sqlalchemy import Unicode
 from sqlalchemy import UniqueConstraint
-from sqlalchemy.orm import relationship, backref
+from sqlalchemy.orm import relationship, backref, deferred
 
 from nailgun import consts
 from nailgun.db import db
@@ -100,7 +100,7 @@ class Node(Base):
     changes = relationship("ClusterChanges", backref="node")
     error_type = Column(Enum(*NODE_ERRORS, name='node_error_type'))
     error_msg = Column(String(255))
-    timestamp = Column(DateTime, nullable=False)
+    timestamp = Column(DateTime, nullable=False, index=True)
     online = Column(Boolean, default=True)
     role_list = relationship(
         "Role",
@@ -281,12 +281,18 @@ class Node(Base):
         data["interfaces"] = result
         self.meta = data
 
+    @staticmethod
+    def default_name(mac):
+        """Name of a node which has not been named by user
+        """
+        return u'Untitled ({0})'.format(mac[-5:].lower())
+
     def reset_name_to_default(self):
         """Reset name to default
         TODO(el): move to node REST object which
         will be introduced in 5.0 release
         """
-        self.name = u'Untitled ({0})'.format(self.mac[-5:])
+        self.name = self.default_name(self.mac)
 
 
 class NodeAttributes(Base):
@@ -294,7 +300,8 @@ class NodeAttributes(Base):
     id = Column(Integer, primary_key=True)
     node_id = Column(Integer, ForeignKey('nodes.id'))
     volumes = Column(JSON, default=[])
-    interfaces = Column(JSON, default={})
+    # isn't used by nailgun itself, so it's loaded only on access
+    interfaces = deferred(Column(JSON, default={}))
 
 
 class NodeNICInterface(Base):
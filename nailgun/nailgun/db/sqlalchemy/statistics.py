@@ -0,0 +1,120 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Aggregate statistics computed by database with single queries,
+so callers never load node objects just to count them.
+"""
+
+from sqlalchemy import case
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.sql.expression import literal_column
+
+from nailgun.db.sqlalchemy import db
+from nailgun.db.sqlalchemy.models import Node
+from nailgun.db.sqlalchemy.models import NodeRoles
+from nailgun.db.sqlalchemy.models import Role
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case([(condition, 1)], else_=0)), 0)
+
+
+def _sum_if(condition, value):
+    return func.coalesce(func.sum(case([(condition, value)], else_=0)), 0)
+
+
+def weighted_average(terms, *criteria):
+    """Average of values of nodes which match criteria.
+
+    Every term is a pair of condition and value expression.
+    Each node contributes its value once for every matching term,
+    so one node may be counted several times. Everything is
+    computed with one query.
+
+    :param terms: list of (condition, value) pairs
+    :param criteria: filter criteria for nodes
+    :returns: integer average or None if no nodes match any term
+    """
+    columns = []
+    for condition, value in terms:
+        columns.append(_count_if(condition))
+        columns.append(_sum_if(condition, value))
+    row = db().query(*columns).filter(*criteria).one()
+
+    count = sum(row[::2])
+    if count:
+        return int(float(sum(row[1::2])) / count)
+
+
+def deployment_progress(cluster_id):
+    """Deployment progress of cluster nodes. Nodes which are not
+    deployed yet (discover, provisioned) have progress 0,
+    offline nodes are treated as finished ones.
+    """
+    progress = func.coalesce(Node.progress, 0)
+    return weighted_average(
+        [
+            (Node.status == 'discover', 0),
+            (Node.online == (False), 100),
+            (Node.status == 'provisioned', 0),
+            (Node.status.in_(['deploying', 'ready']), progress)
+        ],
+        Node.cluster_id == cluster_id
+    )
+
+
+def provisioning_progress(cluster_id):
+    """Provisioning progress of cluster nodes."""
+    progress = func.coalesce(Node.progress, 0)
+    return weighted_average(
+        [(Node.status.in_(['provisioning', 'provisioned']), progress)],
+        Node.cluster_id == cluster_id
+    )
+
+
+def allocation_stats():
+    """Numbers of nodes assigned and not assigned to clusters.
+
+    :returns: dict with 'allocated' and 'unallocated' keys
+    """
+    allocated, unallocated = db().query(
+        _count_if(Node.cluster_id != (None)),
+        _count_if(Node.cluster_id == (None))
+    ).one()
+    return {'allocated': int(allocated), 'unallocated': int(unallocated)}
+
+
+def roles_combinations_stats():
+    """Numbers of nodes for every combination of roles.
+    Combination is a '+' joined sorted list of role names.
+    Nodes without roles are not counted.
+
+    :returns: dict with combinations as keys and numbers as values
+    """
+    node_roles = NodeRoles.__table__
+    roles = Role.__table__
+    combinations = select(
+        [literal_column(
+            "string_agg(roles.name, '+' ORDER BY roles.name)"
+        ).label('combination')],
+        from_obj=node_roles.join(roles, node_roles.c.role == roles.c.id)
+    ).group_by(node_roles.c.node).alias('combinations')
+
+    return dict(
+        (combination, int(count)) for combination, count in db().query(
+            combinations.c.combination,
+            func.count()
+        ).group_by(combinations.c.combination)
+    )
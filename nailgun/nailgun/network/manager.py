@@ -28,13 +28,17 @@ from netaddr import IPRange
 
 from sqlalchemy.orm import joinedload
 from sqlalchemy.sql import not_
+from sqlalchemy.sql import or_
 
 from nailgun import objects
 
 from nailgun import consts
 from nailgun.db import db
+from nailgun.db.sqlalchemy.cache import cache
+from nailgun.db.sqlalchemy.cache import get_instance
 from nailgun.db.sqlalchemy.models import IPAddr
 from nailgun.db.sqlalchemy.models import IPAddrRange
+from nailgun.db.sqlalchemy.models import NetworkBondAssignment
 from nailgun.db.sqlalchemy.models import NetworkGroup
 from nailgun.db.sqlalchemy.models import NetworkNICAssignment
 from nailgun.db.sqlalchemy.models import Node
@@ -72,7 +76,7 @@ class NetworkManager(object):
         :returns: Admin NetworkGroup ID or None.
         :raises: errors.AdminNetworkNotFound
         """
-        return cls.get_admin_network_group().id
+        return cls._get_admin_network_group_info()['id']
 
     @classmethod
     def get_admin_network_group(cls):
@@ -82,12 +86,39 @@ class NetworkManager(object):
         :returns: Admin NetworkGroup or None.
         :raises: errors.AdminNetworkNotFound
         """
-        admin_ng = db().query(NetworkGroup).filter_by(
+        admin_ng = get_instance(
+            NetworkGroup,
+            cls.get_admin_network_group_id()
+        )
+        if not admin_ng:
+            raise errors.AdminNetworkNotFound()
+        return admin_ng
+
+    @classmethod
+    def _get_admin_network_group_info(cls):
+        """Id and cidr of Admin NetworkGroup kept in
+        process-wide cache.
+
+        :raises: errors.AdminNetworkNotFound
+        """
+        return cache.get(
+            'admin_network', 'info', cls._load_admin_network_info)
+
+    @classmethod
+    def _load_admin_network_info(cls):
+        admin_ng = db().query(
+            NetworkGroup.id,
+            NetworkGroup.cidr
+        ).filter_by(
             name="fuelweb_admin"
         ).first()
         if not admin_ng:
             raise errors.AdminNetworkNotFound()
-        return admin_ng
+        return {
+            'id': admin_ng.id,
+            'cidr': admin_ng.cidr,
+            'network': IPNetwork(admin_ng.cidr)
+        }
 
     @classmethod
     def cleanup_network_group(cls, nw_group):
@@ -381,12 +412,46 @@ class NetworkManager(object):
         db().flush()
 
     @classmethod
-    def get_default_networks_assignment(cls, node):
-        """Return default Networks-to-NICs assignment for given node based on
-        networks metadata
+    def clear_assigned_networks_for_nodes(cls, nodes):
+        """Remove networks assignments from all interfaces
+        of given nodes using two DELETE queries.
+
+        :param nodes: list of Node objects
+        :returns: None
         """
-        nics = []
-        ngs = node.cluster.network_groups + [cls.get_admin_network_group()]
+        nics = [nic for n in nodes for nic in n.nic_interfaces]
+        bonds = [bond for n in nodes for bond in n.bond_interfaces]
+        # pending changes of assignments should not be
+        # flushed after bulk deletion
+        db().flush()
+        if nics:
+            db().query(NetworkNICAssignment).filter(
+                NetworkNICAssignment.interface_id.in_(
+                    [nic.id for nic in nics])
+            ).delete(synchronize_session=False)
+        if bonds:
+            db().query(NetworkBondAssignment).filter(
+                NetworkBondAssignment.bond_id.in_(
+                    [bond.id for bond in bonds])
+            ).delete(synchronize_session=False)
+        for iface in chain(nics, bonds):
+            db().expire(iface, ['assigned_networks_list'])
+
+    @classmethod
+    def _get_default_assignment_layout(cls, ngs, admin_ng_id,
+                                       nics_count, admin_nic_index):
+        """Default Networks-to-NICs assignment for nodes with given
+        number of NICs and given index of admin NIC. It depends only
+        on these values and on cluster networks, so it can be shared
+        between nodes with the same layout.
+
+        :param ngs: list of NetworkGroup objects including admin network
+        :param admin_ng_id: id of admin NetworkGroup
+        :param nics_count: number of node NICs
+        :param admin_nic_index: index of admin NIC in node NICs list
+        :returns: list of network groups ids lists - one for each NIC
+        """
+        layout = [[] for i in xrange(nics_count)]
         ngs_by_id = dict((ng.id, ng) for ng in ngs)
         # sort Network Groups ids by map_priority
         to_assign_ids = list(
@@ -396,8 +461,70 @@ class NetworkManager(object):
                 key=lambda x: x[1]))[0]
         )
         ng_ids = set(ng.id for ng in ngs)
-        ng_wo_admin_ids = ng_ids ^ set([cls.get_admin_network_group_id()])
-        for nic in node.nic_interfaces:
+        ng_wo_admin_ids = ng_ids ^ set([admin_ng_id])
+        for index in xrange(nics_count):
+            if not to_assign_ids:
+                break
+            allowed_ids = \
+                ng_wo_admin_ids if index != admin_nic_index else ng_ids
+            can_assign = [ng_id for ng_id in to_assign_ids
+                          if ng_id in allowed_ids]
+            assigned_ids = set()
+            untagged_cnt = 0
+            same_nic_groups = set()
+            for ng_id in can_assign:
+                ng = ngs_by_id[ng_id]
+                dedicated = ng.meta.get('dedicated_nic')
+                untagged = (ng.vlan_start is None) \
+                    and not ng.meta.get('neutron_vlan_range')
+                same_nic = ng.meta.get('use_same_vlan_nic')
+                if dedicated:
+                    if not assigned_ids:
+                        assigned_ids.add(ng_id)
+                        break
+                elif untagged:
+                    if untagged_cnt == 0 or same_nic in same_nic_groups:
+                        assigned_ids.add(ng_id)
+                        untagged_cnt += 1
+                        if same_nic:
+                            same_nic_groups.add(same_nic)
+                else:
+                    assigned_ids.add(ng_id)
+
+            for ng_id in assigned_ids:
+                layout[index].append(ng_id)
+                to_assign_ids.remove(ng_id)
+
+        if to_assign_ids and layout:
+            # Assign remaining networks to NIC #0
+            # as all the networks must be assigned.
+            # But network check will not pass if we get here.
+            logger.warn("Cannot assign all networks appropriately for"
+                        " nodes with %s NICs. Set all unassigned networks"
+                        " to the first interface", nics_count)
+            layout[0].extend(to_assign_ids)
+        return layout
+
+    @classmethod
+    def get_default_networks_assignment(cls, node):
+        """Return default Networks-to-NICs assignment for given node based on
+        networks metadata
+        """
+        admin_ng = cls.get_admin_network_group()
+        ngs = node.cluster.network_groups + [admin_ng]
+        ngs_by_id = dict((ng.id, ng) for ng in ngs)
+        admin_interface = node.admin_interface
+        nic_interfaces = node.nic_interfaces
+        admin_nic_index = None
+        for index, nic in enumerate(nic_interfaces):
+            if nic == admin_interface:
+                admin_nic_index = index
+
+        layout = cls._get_default_assignment_layout(
+            ngs, admin_ng.id, len(nic_interfaces), admin_nic_index)
+
+        nics = []
+        for nic, ng_ids in zip(nic_interfaces, layout):
             nic_dict = {
                 "id": nic.id,
                 "name": nic.name,
@@ -406,51 +533,10 @@ class NetworkManager(object):
                 "current_speed": nic.current_speed,
                 "type": nic.type,
             }
-
-            if to_assign_ids:
-                allowed_ids = \
-                    ng_wo_admin_ids if nic != node.admin_interface else ng_ids
-                can_assign = [ng_id for ng_id in to_assign_ids
-                              if ng_id in allowed_ids]
-                assigned_ids = set()
-                untagged_cnt = 0
-                same_nic_groups = set()
-                for ng_id in can_assign:
-                    ng = ngs_by_id[ng_id]
-                    dedicated = ng.meta.get('dedicated_nic')
-                    untagged = (ng.vlan_start is None) \
-                        and not ng.meta.get('neutron_vlan_range')
-                    same_nic = ng.meta.get('use_same_vlan_nic')
-                    if dedicated:
-                        if not assigned_ids:
-                            assigned_ids.add(ng_id)
-                            break
-                    elif untagged:
-                        if untagged_cnt == 0 or same_nic in same_nic_groups:
-                            assigned_ids.add(ng_id)
-                            untagged_cnt += 1
-                            if same_nic:
-                                same_nic_groups.add(same_nic)
-                    else:
-                        assigned_ids.add(ng_id)
-
-                for ng_id in assigned_ids:
-                    nic_dict.setdefault('assigned_networks', []).append(
-                        {'id': ng_id, 'name': ngs_by_id[ng_id].name})
-                    to_assign_ids.remove(ng_id)
-
-            nics.append(nic_dict)
-
-        if to_assign_ids:
-            # Assign remaining networks to NIC #0
-            # as all the networks must be assigned.
-            # But network check will not pass if we get here.
-            logger.warn("Cannot assign all networks appropriately for"
-                        " node %r. Set all unassigned networks to the"
-                        " interface %r", node.name, nics[0]['name'])
-            for ng_id in to_assign_ids:
-                nics[0].setdefault('assigned_networks', []).append(
+            for ng_id in ng_ids:
+                nic_dict.setdefault('assigned_networks', []).append(
                     {'id': ng_id, 'name': ngs_by_id[ng_id].name})
+            nics.append(nic_dict)
         return nics
 
     @classmethod
@@ -467,6 +553,61 @@ class NetworkManager(object):
                         NetworkGroup.id.in_(ng_ids)))
         db().flush()
 
+    @classmethod
+    def assign_networks_by_default_for_nodes(cls, nodes):
+        """Bulk version of assign_networks_by_default. Default
+        assignment is computed once per distinct NICs layout
+        (number of NICs and admin NIC index) and all assignments
+        are written with one multi-row INSERT.
+
+        :param nodes: list of Node objects added to clusters
+        :returns: None
+        """
+        if not nodes:
+            return
+        cls.clear_assigned_networks_for_nodes(nodes)
+
+        admin_ng = cls.get_admin_network_group()
+        admin_net = IPNetwork(admin_ng.cidr)
+        cluster_ngs = {}
+        layouts = {}
+        rows = []
+        for node in nodes:
+            nics = node.nic_interfaces
+            if not nics:
+                continue
+            # networks are cleared, so admin NIC is found only by IP,
+            # the same way as Node.admin_interface does it
+            admin_nic_index = 0
+            for index, nic in enumerate(nics):
+                if nic.ip_addr and IPAddress(nic.ip_addr) in admin_net:
+                    admin_nic_index = index
+                    break
+
+            if node.cluster_id not in cluster_ngs:
+                cluster_ngs[node.cluster_id] = \
+                    node.cluster.network_groups + [admin_ng]
+            key = (node.cluster_id, len(nics), admin_nic_index)
+            if key not in layouts:
+                layouts[key] = cls._get_default_assignment_layout(
+                    cluster_ngs[node.cluster_id],
+                    admin_ng.id,
+                    len(nics),
+                    admin_nic_index
+                )
+            for nic, ng_ids in zip(nics, layouts[key]):
+                rows.extend(
+                    {'interface_id': nic.id, 'network_id': ng_id}
+                    for ng_id in ng_ids
+                )
+
+        if rows:
+            db().execute(NetworkNICAssignment.__table__.insert(), rows)
+        logger.debug(
+            u"Default networks assignment: %s rows for %s nodes "
+            u"with %s distinct layouts", len(rows), len(nodes), len(layouts)
+        )
+
     @classmethod
     def get_cluster_networkgroups_by_node(cls, node):
         """Method for receiving cluster network groups by node.
@@ -728,21 +869,94 @@ class NetworkManager(object):
         """Update interfaces in case of correct interfaces
         in meta field in node's model
         """
-        try:
-            cls.__check_interfaces_correctness(node)
-        except errors.InvalidInterfacesInfo as e:
-            logger.warn("Cannot update interfaces: %s" % str(e))
-            return
+        return cls.update_interfaces_info_for_nodes([node])
 
-        for interface in node.meta["interfaces"]:
-            interface_db = db().query(NodeNICInterface).filter_by(
-                mac=interface['mac']).first()
-            if interface_db:
-                cls.__update_existing_interface(interface_db.id, interface)
-            else:
-                cls.__add_new_interface(node, interface)
+    @classmethod
+    def update_interfaces_info_for_nodes(cls, nodes):
+        """Reconcile NIC interfaces of nodes with interfaces
+        from their meta. Existing interfaces of all nodes are
+        loaded with one query and compared by MAC, so only
+        changed interfaces are written: new ones with one
+        INSERT, removed ones with one DELETE.
+
+        :param nodes: list of Node objects
+        :returns: True if any interface was changed, False otherwise
+        """
+        nodes_to_update = []
+        for node in nodes:
+            try:
+                cls.__check_interfaces_correctness(node)
+            except errors.InvalidInterfacesInfo as e:
+                logger.warn("Cannot update interfaces: %s" % str(e))
+                continue
+            nodes_to_update.append(node)
+
+        if not nodes_to_update:
+            return False
 
-        cls.__delete_not_found_interfaces(node, node.meta["interfaces"])
+        macs = set(
+            interface['mac'].lower()
+            for node in nodes_to_update
+            for interface in node.meta['interfaces']
+        )
+        existing_interfaces = db().query(NodeNICInterface).filter(
+            or_(
+                NodeNICInterface.node_id.in_(
+                    [n.id for n in nodes_to_update]
+                ),
+                NodeNICInterface.mac.in_(macs)
+            )
+        ).all()
+        interfaces_by_mac = dict(
+            (i.mac, i) for i in existing_interfaces
+        )
+
+        new_interfaces = {}
+        changed_nodes = set()
+        for node in nodes_to_update:
+            node_macs = set()
+            for interface in node.meta['interfaces']:
+                mac = interface['mac'].lower()
+                node_macs.add(mac)
+                interface_attrs = cls.__get_interface_attributes(interface)
+                interface_db = interfaces_by_mac.get(mac)
+                if interface_db is None:
+                    if mac in new_interfaces:
+                        continue
+                    interface_attrs['node_id'] = node.id
+                    new_interfaces[mac] = interface_attrs
+                    changed_nodes.add(node)
+                elif cls.__update_interface_attributes(
+                        interface_db, interface_attrs):
+                    changed_nodes.add(node)
+
+            interfaces_to_delete = [
+                i for i in existing_interfaces
+                if i.node_id == node.id and i.mac not in node_macs
+            ]
+            if interfaces_to_delete:
+                logger.info("Interfaces %s removed from node %s" % (
+                    ' '.join(i.mac for i in interfaces_to_delete),
+                    node.name or node.mac))
+                db().query(NodeNICInterface).filter(
+                    NodeNICInterface.id.in_(
+                        [i.id for i in interfaces_to_delete]
+                    )
+                ).delete(synchronize_session='fetch')
+                changed_nodes.add(node)
+
+        if not changed_nodes:
+            return False
+
+        if new_interfaces:
+            db().execute(
+                NodeNICInterface.__table__.insert(),
+                new_interfaces.values()
+            )
+        db().flush()
+        for node in changed_nodes:
+            db().expire(node, ['nic_interfaces'])
+        return True
 
     @classmethod
     def __check_interfaces_correctness(cls, node):
@@ -779,57 +993,35 @@ class NetworkManager(object):
 
     @classmethod
     def is_ip_belongs_to_admin_subnet(cls, ip_addr):
-        admin_cidr = cls.get_admin_network_group().cidr
-        if ip_addr and IPAddress(ip_addr) in IPNetwork(admin_cidr):
+        admin_network = cls._get_admin_network_group_info()['network']
+        if ip_addr and IPAddress(ip_addr) in admin_network:
             return True
         return False
 
     @classmethod
-    def __add_new_interface(cls, node, interface_attrs):
-        interface = NodeNICInterface()
-        interface.node_id = node.id
-        cls.__set_interface_attributes(interface, interface_attrs)
-        db().add(interface)
-        db().commit()
-        node.nic_interfaces.append(interface)
-
-    @classmethod
-    def __update_existing_interface(cls, interface_id, interface_attrs):
-        interface = db().query(NodeNICInterface).get(interface_id)
-        cls.__set_interface_attributes(interface, interface_attrs)
-        db().commit()
-
-    @classmethod
-    def __set_interface_attributes(cls, interface, interface_attrs):
-        interface.name = interface_attrs['name']
-        interface.mac = interface_attrs['mac']
-
-        interface.current_speed = interface_attrs.get('current_speed')
-        interface.max_speed = interface_attrs.get('max_speed')
-        interface.ip_addr = interface_attrs.get('ip')
-        interface.netmask = interface_attrs.get('netmask')
-        interface.state = interface_attrs.get('state')
+    def __get_interface_attributes(cls, interface_attrs):
+        return {
+            'name': interface_attrs['name'],
+            'mac': interface_attrs['mac'].lower(),
+            'current_speed': interface_attrs.get('current_speed'),
+            'max_speed': interface_attrs.get('max_speed'),
+            'ip_addr': interface_attrs.get('ip'),
+            'netmask': interface_attrs.get('netmask'),
+            'state': interface_attrs.get('state')
+        }
 
     @classmethod
-    def __delete_not_found_interfaces(cls, node, interfaces):
-        interfaces_mac_addresses = map(
-            lambda interface: interface['mac'], interfaces)
+    def __update_interface_attributes(cls, interface, attrs):
+        """Set only attributes which differ from given ones.
 
-        interfaces_to_delete = db().query(NodeNICInterface).filter(
-            NodeNICInterface.node_id == node.id
-        ).filter(
-            not_(NodeNICInterface.mac.in_(interfaces_mac_addresses))
-        ).all()
-
-        if interfaces_to_delete:
-            mac_addresses = ' '.join(
-                map(lambda i: i.mac, interfaces_to_delete))
-
-            node_name = node.name or node.mac
-            logger.info("Interfaces %s removed from node %s" % (
-                mac_addresses, node_name))
-
-            map(db().delete, interfaces_to_delete)
+        :returns: True if interface was changed
+        """
+        changed = False
+        for name, value in attrs.iteritems():
+            if getattr(interface, name) != value:
+                setattr(interface, name, value)
+                changed = True
+        return changed
 
     @classmethod
     def get_admin_ip_for_node(cls, node):
@@ -989,9 +1181,10 @@ class NetworkManager(object):
         :returns: None
         """
         cluster_db = objects.Cluster.get_by_uid(cluster_id)
-        networks_metadata = cluster_db.release.networks_metadata
+        networks_metadata = objects.Release.get_metadata(
+            cluster_db.release_id, 'networks_metadata')
         networks_list = networks_metadata[cluster_db.net_provider]["networks"]
-        used_nets = [IPNetwork(cls.get_admin_network_group().cidr)]
+        used_nets = [cls._get_admin_network_group_info()['network']]
 
         def check_range_in_use_already(cidr_range):
             for n in used_nets:
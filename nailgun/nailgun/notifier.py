@@ -16,41 +16,131 @@
 
 from datetime import datetime
 
+from sqlalchemy import func
+from sqlalchemy import select
+
 from nailgun.db import db
 from nailgun.db.sqlalchemy.models import Notification
 from nailgun.db.sqlalchemy.models import Task
 from nailgun.errors import errors
 from nailgun.logger import logger
+from nailgun import objects
+
+
+class NotificationsBatch(object):
+    """Collects notifications and writes them at once: tasks are
+    resolved with one query, duplicates are dropped and all rows
+    are written with one multi-row INSERT.
+
+    If something was written, transaction is committed, as
+    :func:`notify` does. Handlers pass commit=False, so
+    notifications are committed or rolled back with the request.
+
+    Usage::
+
+        with NotificationsBatch() as batch:
+            for node in nodes:
+                batch.notify("error", message, node_id=node.id)
+    """
+
+    def __init__(self, commit=True):
+        self.commit = commit
+        self.notifications = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.send()
+
+    def notify(self, topic, message,
+               cluster_id=None, node_id=None, task_uuid=None):
+        if topic == 'discover' and node_id is None:
+            raise errors.CannotFindNodeIDForDiscovering(
+                "No node id in discover notification")
+        notification = (topic, message, cluster_id, node_id, task_uuid)
+        if notification not in self.notifications:
+            self.notifications.append(notification)
+
+    def _get_tasks_ids(self):
+        uuids = set(n[4] for n in self.notifications if n[4])
+        if not uuids:
+            return {}
+        return dict(db().query(Task.uuid, Task.id).filter(
+            Task.uuid.in_(uuids)))
+
+    def _get_existing(self, tasks_ids):
+        """Notifications about nodes which have been already sent
+        within the same task aren't sent again.
+        """
+        nodes_ids = set(n[3] for n in self.notifications if n[3])
+        if not nodes_ids or not tasks_ids:
+            return set()
+        return set(db().query(
+            Notification.node_id,
+            Notification.message,
+            Notification.task_id
+        ).filter(
+            Notification.node_id.in_(nodes_ids),
+            Notification.task_id.in_(tasks_ids.values())
+        ))
+
+    def send(self):
+        """Write collected notifications and commit them
+        unless batch was created with commit=False
+        """
+        tasks_ids = self._get_tasks_ids()
+        existing = self._get_existing(tasks_ids)
+
+        rows = []
+        now = datetime.now()
+        for topic, message, cluster_id, node_id, task_uuid in \
+                self.notifications:
+            task_id = tasks_ids.get(task_uuid)
+            if node_id and task_id:
+                if (node_id, message, task_id) in existing:
+                    continue
+                existing.add((node_id, message, task_id))
+            rows.append({
+                'topic': topic,
+                'message': message,
+                'cluster_id': cluster_id,
+                'node_id': node_id,
+                'task_id': task_id,
+                'status': 'unread',
+                'datetime': now
+            })
+
+        if rows:
+            ids = [r[0] for r in db().execute(
+                select([func.nextval('notifications_id_seq')]).select_from(
+                    func.generate_series(1, len(rows)))
+            )]
+            for row_id, row in zip(ids, rows):
+                row['id'] = row_id
+            db().execute(Notification.__table__.insert(), rows)
+            objects.Event.publish_bulk(
+                "notification",
+                [(row['id'],
+                  dict((k, row[k]) for k in (
+                      'topic', 'message', 'status', 'node_id', 'task_id')),
+                  row['cluster_id']) for row in rows],
+                action="create"
+            )
+            if self.commit:
+                db().commit()
+            else:
+                db().flush()
+        for row in rows:
+            logger.info(
+                "Notification: topic: %s message: %s",
+                row['topic'], row['message']
+            )
+        self.notifications = []
 
 
 def notify(topic, message,
            cluster_id=None, node_id=None, task_uuid=None):
-    if topic == 'discover' and node_id is None:
-        raise errors.CannotFindNodeIDForDiscovering(
-            "No node id in discover notification")
-    task = None
-    if task_uuid:
-        task = db().query(Task).filter_by(uuid=task_uuid).first()
-
-    exist = None
-    if node_id and task:
-        exist = db().query(Notification).filter_by(
-            node_id=node_id,
-            message=message,
-            task=task
-        ).first()
-
-    if not exist:
-        notification = Notification()
-        notification.topic = topic
-        notification.message = message
-        notification.cluster_id = cluster_id
-        notification.node_id = node_id
-        if task:
-            notification.task_id = task.id
-        notification.datetime = datetime.now()
-        db().add(notification)
-        db().commit()
-        logger.info(
-            "Notification: topic: %s message: %s" % (topic, message)
-        )
+    with NotificationsBatch() as batch:
+        batch.notify(topic, message, cluster_id, node_id, task_uuid)
@@ -26,3 +26,6 @@ from nailgun.objects.cluster import ClusterCollection
 
 from nailgun.objects.task import Task
 from nailgun.objects.task import TaskCollection
+
+from nailgun.objects.event import Event
+from nailgun.objects.event import EventCollection
@@ -14,11 +14,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from sqlalchemy.orm import joinedload
+
 from nailgun import consts
 
 from nailgun.api.serializers.cluster import ClusterSerializer
 
 from nailgun.db import db
+from nailgun.db.sqlalchemy.cache import cache
 
 from nailgun.db.sqlalchemy import models
 
@@ -36,6 +39,12 @@ class Attributes(NailgunObject):
 
     model = models.Attributes
 
+    @classmethod
+    def update(cls, instance, data):
+        super(Attributes, cls).update(instance, data)
+        cache.invalidate("cluster_attributes")
+        return instance
+
     @classmethod
     def generate_fields(cls, instance):
         instance.generated = traverse(
@@ -44,17 +53,43 @@ class Attributes(NailgunObject):
         )
         db().add(instance)
         db().flush()
+        cache.invalidate("cluster_attributes")
 
     @classmethod
     def merged_attrs(cls, instance):
-        return dict_merge(
-            instance.generated,
-            instance.editable
-        )
+        """Generated attributes merged with editable ones.
+        Merged view is computed once per attributes revision
+        and kept in process-wide cache. Returned dict and its groups
+        are copies of cached view, so keys of both levels may be
+        changed, deeper values are shared and must not be modified.
+        """
+        return cls._copy_view(cache.get(
+            "cluster_attributes",
+            (instance.id, "merged"),
+            lambda: dict_merge(instance.generated, instance.editable)
+        ))
 
     @classmethod
     def merged_attrs_values(cls, instance):
-        attrs = cls.merged_attrs(instance)
+        """Merged attributes flattened to values. Cached
+        in the same way as :meth:`merged_attrs`.
+        """
+        return cls._copy_view(cache.get(
+            "cluster_attributes",
+            (instance.id, "values"),
+            lambda: cls._merged_attrs_values(instance)
+        ))
+
+    @classmethod
+    def _copy_view(cls, attrs):
+        return dict(
+            (key, dict(value) if isinstance(value, dict) else value)
+            for key, value in attrs.iteritems()
+        )
+
+    @classmethod
+    def _merged_attrs_values(cls, instance):
+        attrs = dict_merge(instance.generated, instance.editable)
         for group_attrs in attrs.itervalues():
             for attr, value in group_attrs.iteritems():
                 if isinstance(value, dict) and 'value' in value:
@@ -213,6 +248,52 @@ class Cluster(NailgunObject):
         map(db().delete, chs.all())
         db().flush()
 
+    @classmethod
+    def add_pending_changes_for_nodes(cls, changes_type, nodes):
+        """Add pending changes of given type for all nodes
+        which belong to clusters. Existing changes are found
+        with one query and are not duplicated.
+
+        :param changes_type: name of changes
+        :param nodes: list of Node objects
+        :returns: None
+        """
+        nodes = [n for n in nodes if n.cluster_id]
+        if not nodes:
+            return
+        existing = set(db().query(
+            models.ClusterChanges.cluster_id,
+            models.ClusterChanges.node_id
+        ).filter(
+            models.ClusterChanges.name == changes_type,
+            models.ClusterChanges.node_id.in_([n.id for n in nodes])
+        ))
+        for node in nodes:
+            if (node.cluster_id, node.id) in existing:
+                continue
+            db().add(models.ClusterChanges(
+                cluster_id=node.cluster_id,
+                node_id=node.id,
+                name=changes_type
+            ))
+            existing.add((node.cluster_id, node.id))
+        db().flush()
+
+    @classmethod
+    def clear_pending_changes_for_nodes(cls, nodes):
+        """Remove all pending changes of given nodes
+        with one DELETE query.
+
+        :param nodes: list of Node objects
+        :returns: None
+        """
+        if not nodes:
+            return
+        db().query(models.ClusterChanges).filter(
+            models.ClusterChanges.node_id.in_([n.id for n in nodes])
+        ).delete(synchronize_session='fetch')
+        db().flush()
+
     @classmethod
     def update(cls, instance, data):
         nodes = data.pop("nodes", None)
@@ -223,18 +304,20 @@ class Cluster(NailgunObject):
 
     @classmethod
     def update_nodes(cls, instance, nodes_ids):
-        # TODO(NAME): sepatate nodes
-        #for deletion and addition by set().
-        new_nodes = []
-        if nodes_ids:
-            new_nodes = db().query(models.Node).filter(
-                models.Node.id.in_(nodes_ids)
-            )
+        new_ids = set(nodes_ids or [])
+        current_ids = set(n.id for n in instance.nodes)
 
+        ids_to_remove = current_ids - new_ids
         nodes_to_remove = [n for n in instance.nodes
-                           if n not in new_nodes]
-        nodes_to_add = [n for n in new_nodes
-                        if n not in instance.nodes]
+                           if n.id in ids_to_remove]
+        nodes_to_add = []
+        if new_ids - current_ids:
+            nodes_to_add = db().query(models.Node).filter(
+                models.Node.id.in_(new_ids - current_ids)
+            ).options(
+                joinedload('nic_interfaces'),
+                joinedload('bond_interfaces')
+            ).order_by(models.Node.id).all()
 
         for node in nodes_to_add:
             if not node.online:
@@ -243,16 +326,14 @@ class Cluster(NailgunObject):
                     u"'{0}' to environment".format(node.id)
                 )
 
-        map(instance.nodes.remove, nodes_to_remove)
-        map(instance.nodes.append, nodes_to_add)
-        map(
-            instance.network_manager.clear_assigned_networks,
-            nodes_to_remove
-        )
-        map(
-            instance.network_manager.assign_networks_by_default,
-            nodes_to_add
-        )
+        instance.nodes = [
+            n for n in instance.nodes if n.id not in ids_to_remove
+        ] + nodes_to_add
+        db().flush()
+
+        netmanager = instance.network_manager
+        netmanager.clear_assigned_networks_for_nodes(nodes_to_remove)
+        netmanager.assign_networks_by_default_for_nodes(nodes_to_add)
         db().flush()
 
 
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright 2013 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from datetime import datetime
+from datetime import timedelta
+import weakref
+
+from sqlalchemy import event as sa_event
+from sqlalchemy import func
+from sqlalchemy import text
+
+from nailgun.api.serializers.event import EventSerializer
+
+from nailgun.db import db
+from nailgun.db.sqlalchemy.models import Event as DBEvent
+from nailgun.db.sqlalchemy.models.event import position_seq
+
+from nailgun import consts
+
+from nailgun.objects import NailgunCollection
+from nailgun.objects import NailgunObject
+
+
+# key of advisory lock which serializes commits of events
+POSITION_LOCK_KEY = 0x6576656e74
+
+# sessions with events added in current transaction as keys
+_publishing_sessions = weakref.WeakKeyDictionary()
+
+
+class Event(NailgunObject):
+    """Change feed record. Events are added into the current
+    session and committed together with the change they describe,
+    so a client never sees an event for a rolled back change.
+
+    Positions of events in the feed are assigned right before
+    commit under a transaction level lock, which is released only
+    by the commit itself. So transactions get positions in the
+    order they become visible, and once a client sees some position
+    all smaller ones are already visible too.
+    """
+
+    model = DBEvent
+    serializer = EventSerializer
+
+    schema = {
+        "$schema": "http://json-schema.org/draft-04/schema#",
+        "title": "Event",
+        "description": "Serialized Event object",
+        "type": "object",
+        "properties": {
+            "id": {"type": "number"},
+            "position": {"type": "number"},
+            "topic": {
+                "type": "string",
+                "enum": list(consts.EVENT_TOPICS)
+            },
+            "action": {
+                "type": "string",
+                "enum": list(consts.EVENT_ACTIONS)
+            },
+            "object_id": {"type": "number"},
+            "cluster_id": {"type": "number"},
+            "data": {"type": "object"}
+        }
+    }
+
+    # fields which are sent to clients on node state change
+    node_fields = (
+        "status",
+        "progress",
+        "online",
+        "error_type",
+        "error_msg",
+        "pending_addition",
+        "pending_deletion"
+    )
+
+    task_fields = (
+        "name",
+        "status",
+        "progress",
+        "message",
+        "parent_id"
+    )
+
+    @classmethod
+    def publish(cls, topic, object_id, data=None,
+                cluster_id=None, action="update"):
+        event = cls.model(
+            topic=topic,
+            action=action,
+            object_id=object_id,
+            cluster_id=cluster_id,
+            data=data or {},
+            datetime=datetime.now()
+        )
+        db().add(event)
+        _publishing_sessions[db()] = True
+        return event
+
+    @classmethod
+    def publish_bulk(cls, topic, events, action="update"):
+        """Write events with one multi-row INSERT
+
+        :param topic: topic of all events
+        :param events: list of (object_id, data, cluster_id) tuples
+        """
+        now = datetime.now()
+        db().execute(cls.model.__table__.insert(), [
+            {
+                "topic": topic,
+                "action": action,
+                "object_id": object_id,
+                "cluster_id": cluster_id,
+                "data": data or {},
+                "datetime": now
+            } for object_id, data, cluster_id in events
+        ])
+        _publishing_sessions[db()] = True
+
+    @classmethod
+    def assign_positions(cls, session):
+        """Assign feed positions to events added in current
+        transaction. Called before commit, the lock taken here
+        is held until the end of transaction.
+        """
+        session.flush()
+        session.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"),
+            {"key": POSITION_LOCK_KEY}
+        )
+        count = session.query(cls.model).filter_by(position=None).count()
+        if not count:
+            return
+        # nobody else takes values of the sequence while we hold the lock
+        last = session.execute(
+            text("SELECT setval(:seq, nextval(:seq) + :count - 1)"),
+            {"seq": position_seq.name, "count": count}
+        ).scalar()
+        session.execute(
+            text(
+                "UPDATE events SET position = numbered.position "
+                "FROM (SELECT id, :first + row_number() OVER (ORDER BY id)"
+                " - 1 AS position FROM events WHERE position IS NULL)"
+                " AS numbered WHERE events.id = numbered.id"
+            ),
+            {"first": last - count + 1}
+        )
+
+    @classmethod
+    def publish_node(cls, node, fields=None, action="update"):
+        return cls.publish(
+            "node",
+            node.id,
+            dict(
+                (f, getattr(node, f)) for f in (fields or cls.node_fields)
+            ),
+            cluster_id=node.cluster_id,
+            action=action
+        )
+
+    @classmethod
+    def publish_task(cls, task, action="update"):
+        return cls.publish(
+            "task",
+            task.id,
+            dict((f, getattr(task, f)) for f in cls.task_fields),
+            cluster_id=task.cluster_id,
+            action=action
+        )
+
+
+class EventCollection(NailgunCollection):
+
+    single = Event
+
+    @classmethod
+    def get_since(cls, cursor, until=None, cluster_id=None,
+                  topics=None, limit=None):
+        """Events newer than cursor ordered by position
+
+        :param cursor: position of the last event client has seen
+        :param until: max position of returned events
+        :param cluster_id: return only events of this cluster
+        :param topics: return only events with these topics
+        :param limit: max number of events
+        :returns: query object
+        """
+        query = db().query(cls.single.model).filter(
+            cls.single.model.position > cursor
+        )
+        if until is not None:
+            query = query.filter(cls.single.model.position <= until)
+        if cluster_id is not None:
+            query = query.filter_by(cluster_id=cluster_id)
+        if topics:
+            query = query.filter(cls.single.model.topic.in_(topics))
+        query = query.order_by(cls.single.model.position)
+        if limit:
+            query = query.limit(limit)
+        return query
+
+    @classmethod
+    def get_cursor_bounds(cls):
+        """:returns: (min position, max position) of stored events
+        """
+        return db().query(
+            func.min(cls.single.model.position),
+            func.max(cls.single.model.position)
+        ).first()
+
+    @classmethod
+    def prune(cls, ttl):
+        """Delete events older than ttl seconds
+        """
+        return db().query(cls.single.model).filter(
+            cls.single.model.datetime < datetime.now() - timedelta(
+                seconds=ttl
+            )
+        ).delete(synchronize_session=False)
+
+
+def _before_commit(session):
+    if _publishing_sessions.pop(session, False):
+        Event.assign_positions(session)
+
+
+def _after_rollback(session):
+    _publishing_sessions.pop(session, None)
+
+
+sa_event.listen(db.session_factory, 'before_commit', _before_commit)
+sa_event.listen(db.session_factory, 'after_rollback', _after_rollback)
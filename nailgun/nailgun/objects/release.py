@@ -21,6 +21,7 @@ from nailgun import consts
 from nailgun.api.serializers.release import ReleaseSerializer
 
 from nailgun.db import db
+from nailgun.db.sqlalchemy.cache import cache
 
 from nailgun.db.sqlalchemy.models import Release as DBRelease
 from nailgun.db.sqlalchemy.models import Role as DBRole
@@ -69,6 +70,7 @@ class Release(NailgunObject):
         new_obj = super(Release, cls).create(data)
         if roles:
             cls.update_roles(new_obj, roles)
+        cache.invalidate("release")
         return new_obj
 
     @classmethod
@@ -77,8 +79,32 @@ class Release(NailgunObject):
         super(Release, cls).update(instance, data)
         if roles is not None:
             cls.update_roles(instance, roles)
+        cache.invalidate("release")
         return instance
 
+    @classmethod
+    def delete(cls, instance):
+        super(Release, cls).delete(instance)
+        cache.invalidate("release")
+
+    @classmethod
+    def get_metadata(cls, release_id, field):
+        """Get metadata field of release (e.g. "volumes_metadata",
+        "networks_metadata", "roles_metadata") from process-wide
+        cache without loading and decoding the whole release row.
+        Returned value is shared and must not be modified.
+
+        :param release_id: Release ID
+        :param field: name of metadata column
+        :returns: decoded value of column
+        """
+        def load():
+            return db().query(
+                getattr(cls.model, field)
+            ).filter_by(id=release_id).scalar()
+
+        return cache.get("release", (release_id, field), load)
+
     @classmethod
     def update_roles(cls, instance, roles):
         db().query(DBRole).filter(
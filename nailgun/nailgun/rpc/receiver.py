@@ -22,6 +22,7 @@ import os
 import traceback
 
 from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
 
 from nailgun import notifier
 from nailgun import objects
@@ -34,6 +35,8 @@ from nailgun.db.sqlalchemy.models import Task
 from nailgun.logger import logger
 from nailgun.network.manager import NetworkManager
 from nailgun.task.helpers import TaskHelper
+from nailgun.utils import compact_vlans
+from nailgun.utils import expand_vlans
 
 
 class NailgunReceiver(object):
@@ -60,6 +63,7 @@ class NailgunReceiver(object):
                     str(node)
                 )
                 break
+            objects.Event.publish_node(node_db, fields=(), action="delete")
             db().delete(node_db)
 
         for node in inaccessible_nodes:
@@ -69,6 +73,8 @@ class NailgunReceiver(object):
                 logger.warn(
                     u'Node %s not answered by RPC, removing from db',
                     node_db.human_readable_name)
+                objects.Event.publish_node(
+                    node_db, fields=(), action="delete")
                 db().delete(node_db)
 
         for node in error_nodes:
@@ -81,6 +87,7 @@ class NailgunReceiver(object):
                 break
             node_db.pending_deletion = False
             node_db.status = 'error'
+            objects.Event.publish_node(node_db)
             db().add(node_db)
             node['name'] = node_db.name
         db().commit()
@@ -179,7 +186,9 @@ class NailgunReceiver(object):
         if not status:
             status = task.status
 
-        # First of all, let's update nodes in database
+        # First of all, let's update nodes in database,
+        # failures notifications are sent with the nodes changes
+        batch = notifier.NotificationsBatch()
         for node in nodes:
             node_db = db().query(Node).get(node['uid'])
 
@@ -219,7 +228,7 @@ class NailgunReceiver(object):
                                 and not node_db.error_msg:
                             node_db.error_msg = u"Node is offline"
                         # Notification on particular node failure
-                        notifier.notify(
+                        batch.notify(
                             "error",
                             u"Failed to deploy node '{0}': {1}".format(
                                 node_db.name,
@@ -230,8 +239,10 @@ class NailgunReceiver(object):
                             task_uuid=task_uuid
                         )
 
+            objects.Event.publish_node(node_db)
             db().add(node_db)
-            db().commit()
+        batch.send()
+        db().commit()
 
         # We should calculate task progress by nodes info
         task = TaskHelper.get_task_by_uuid(task_uuid)
@@ -277,6 +288,7 @@ class NailgunReceiver(object):
             else:
                 node_db.status = node.get('status')
                 node_db.progress = node.get('progress')
+            objects.Event.publish_node(node_db)
 
         db().commit()
 
@@ -289,7 +301,7 @@ class NailgunReceiver(object):
     @classmethod
     def _generate_error_message(cls, task, error_types, names_only=False):
         nodes_info = []
-        error_nodes = db().query(Node).filter_by(
+        error_nodes = db().query(Node.name, Node.error_msg).filter_by(
             cluster_id=task.cluster_id
         ).filter(
             or_(
@@ -299,11 +311,11 @@ class NailgunReceiver(object):
         ).filter(
             Node.error_type.in_(error_types)
         ).all()
-        for n in error_nodes:
+        for name, error_msg in error_nodes:
             if names_only:
-                nodes_info.append(u"'{0}'".format(n.name))
+                nodes_info.append(u"'{0}'".format(name))
             else:
-                nodes_info.append(u"'{0}': {1}".format(n.name, n.error_msg))
+                nodes_info.append(u"'{0}': {1}".format(name, error_msg))
         if nodes_info:
             if names_only:
                 message = u", ".join(nodes_info)
@@ -469,6 +481,7 @@ class NailgunReceiver(object):
 
             for n in update_nodes:
                 n.roles, n.pending_roles = n.pending_roles, n.roles
+                objects.Event.publish_node(n)
 
             db().commit()
 
@@ -549,6 +562,7 @@ class NailgunReceiver(object):
 
             for n in update_nodes:
                 n.roles, n.pending_roles = n.pending_roles, n.roles
+                objects.Event.publish_node(n)
 
             db().commit()
 
@@ -645,75 +659,9 @@ class NailgunReceiver(object):
                     )
                 status = 'error'
             else:
-                error_nodes = []
-                for node in nodes:
-                    cached_nodes_filtered = filter(
-                        lambda n: str(n['uid']) == str(node['uid']),
-                        cached_nodes
-                    )
-
-                    if not cached_nodes_filtered:
-                        logger.warning(
-                            "verify_networks_resp: arguments contain node "
-                            "data which is not in the task cache: %r",
-                            node
-                        )
-                        continue
-
-                    cached_node = cached_nodes_filtered[0]
-
-                    for cached_network in cached_node['networks']:
-                        received_networks_filtered = filter(
-                            lambda n: n['iface'] == cached_network['iface'],
-                            node.get('networks', [])
-                        )
-
-                        if received_networks_filtered:
-                            received_network = received_networks_filtered[0]
-                            absent_vlans = list(
-                                set(cached_network['vlans']) -
-                                set(received_network['vlans'])
-                            )
-                        else:
-                            logger.warning(
-                                "verify_networks_resp: arguments don't contain"
-                                " data for interface: uid=%s iface=%s",
-                                node['uid'], cached_network['iface']
-                            )
-                            absent_vlans = cached_network['vlans']
-
-                        if absent_vlans:
-                            data = {'uid': node['uid'],
-                                    'interface': cached_network['iface'],
-                                    'absent_vlans': absent_vlans}
-                            node_db = db().query(Node).get(node['uid'])
-                            if node_db:
-                                data['name'] = node_db.name
-                                db_nics = filter(
-                                    lambda i:
-                                    i.name == cached_network['iface'],
-                                    node_db.interfaces
-                                )
-                                if db_nics:
-                                    data['mac'] = db_nics[0].mac
-                                else:
-                                    logger.warning(
-                                        "verify_networks_resp: can't find "
-                                        "interface %r for node %r in DB",
-                                        cached_network['iface'], node_db.id
-                                    )
-                                    data['mac'] = 'unknown'
-                            else:
-                                logger.warning(
-                                    "verify_networks_resp: can't find node "
-                                    "%r in DB",
-                                    node['uid']
-                                )
-
-                            error_nodes.append(data)
-
-                if error_nodes:
-                    result = error_nodes
+                result = cls._get_verify_networks_absent_vlans(
+                    cached_nodes, nodes)
+                if result:
                     status = 'error'
         else:
             error_msg = (error_msg or
@@ -728,6 +676,80 @@ class NailgunReceiver(object):
             TaskHelper.update_verify_networks(task_uuid, status, progress,
                                               error_msg, result)
 
+    @classmethod
+    def _get_verify_networks_absent_vlans(cls, cached_nodes, nodes):
+        """Compare VLANs sent to nodes with VLANs received by them.
+        Cached and received data are indexed by node uid and interface
+        name, names and MACs of nodes with absent VLANs are fetched
+        with one query.
+
+        :returns: list of dicts with absent VLANs for interfaces
+        """
+        cached_by_uid = dict((str(n['uid']), n) for n in cached_nodes)
+        error_nodes = []
+        for node in nodes:
+            cached_node = cached_by_uid.get(str(node['uid']))
+            if not cached_node:
+                logger.warning(
+                    "verify_networks_resp: arguments contain node "
+                    "data which is not in the task cache: %r",
+                    node
+                )
+                continue
+
+            received_by_iface = dict(
+                (n['iface'], n) for n in reversed(node.get('networks', [])))
+            for cached_network in cached_node['networks']:
+                cached_vlans = expand_vlans(cached_network['vlans'])
+                received_network = received_by_iface.get(
+                    cached_network['iface'])
+                if received_network:
+                    absent_vlans = set(cached_vlans) - set(
+                        expand_vlans(received_network['vlans']))
+                else:
+                    logger.warning(
+                        "verify_networks_resp: arguments don't contain"
+                        " data for interface: uid=%s iface=%s",
+                        node['uid'], cached_network['iface']
+                    )
+                    absent_vlans = cached_vlans
+
+                if absent_vlans:
+                    error_nodes.append({
+                        'uid': node['uid'],
+                        'interface': cached_network['iface'],
+                        'absent_vlans': compact_vlans(absent_vlans)})
+
+        if not error_nodes:
+            return error_nodes
+
+        nodes_db = dict(
+            (n.id, n) for n in db().query(Node).options(
+                joinedload('nic_interfaces'),
+                joinedload('bond_interfaces')
+            ).filter(
+                Node.id.in_(set(int(d['uid']) for d in error_nodes))))
+        for data in error_nodes:
+            node_db = nodes_db.get(int(data['uid']))
+            if not node_db:
+                logger.warning(
+                    "verify_networks_resp: can't find node %r in DB",
+                    data['uid']
+                )
+                continue
+            data['name'] = node_db.name
+            db_nics = dict((i.name, i) for i in node_db.interfaces)
+            if data['interface'] in db_nics:
+                data['mac'] = db_nics[data['interface']].mac
+            else:
+                logger.warning(
+                    "verify_networks_resp: can't find "
+                    "interface %r for node %r in DB",
+                    data['interface'], node_db.id
+                )
+                data['mac'] = 'unknown'
+        return error_nodes
+
     @classmethod
     def _master_networks_gen(cls, ifaces):
         for iface in ifaces:
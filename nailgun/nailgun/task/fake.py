@@ -34,6 +34,8 @@ from nailgun.db.sqlalchemy.models import NodeAttributes
 from nailgun.network.manager import NetworkManager
 from nailgun.rpc.receiver import NailgunReceiver
 from nailgun.settings import settings
+from nailgun.utils import compact_vlans
+from nailgun.utils import expand_vlans
 
 
 class FSMNodeFlow(Fysom):
@@ -499,8 +501,9 @@ class FakeVerificationThread(FakeThread):
         # verification will fail if you specified 404 as VLAN id in any net
         for n in self.data['args']['nodes']:
             for iface in n['networks']:
-                if 404 in iface['vlans']:
-                    iface['vlans'] = list(set(iface['vlans']) ^ set([404]))
+                vlans = expand_vlans(iface['vlans'])
+                if 404 in vlans:
+                    iface['vlans'] = compact_vlans(set(vlans) ^ set([404]))
 
         while not ready and not self.stoprequest.isSet():
             kwargs['progress'] += randrange(
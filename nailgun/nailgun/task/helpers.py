@@ -17,6 +17,7 @@
 import os
 import shutil
 
+from sqlalchemy import and_
 from sqlalchemy import or_
 
 from nailgun import objects
@@ -25,6 +26,7 @@ from nailgun.db import db
 from nailgun.db.sqlalchemy.models import IPAddr
 from nailgun.db.sqlalchemy.models import Node
 from nailgun.db.sqlalchemy.models import Task
+from nailgun.db.sqlalchemy import statistics
 from nailgun.errors import errors
 from nailgun.logger import logger
 from nailgun.network.manager import NetworkManager
@@ -52,22 +54,46 @@ class TaskHelper(object):
 
     @classmethod
     def prepare_syslog_dir(cls, node, prefix=None):
-        logger.debug("Preparing syslog directories for node: %s", node.fqdn)
+        cls.prepare_syslog_dirs([node], prefix)
+
+    @classmethod
+    def prepare_syslog_dirs(cls, nodes, prefix=None):
+        """Prepare syslog directories for nodes going to be provisioned:
+        bootstrap directory of every node is renamed into its fqdn and
+        symlinks from admin IPs of the node are created. Admin IPs of all
+        nodes are fetched with one query and rsyslog is signaled once.
+        """
+        if not nodes:
+            return
         if not prefix:
             prefix = settings.SYSLOG_DIR
         logger.debug("prepare_syslog_dir prefix=%s", prefix)
 
+        admin_net_id = NetworkManager.get_admin_network_group_id()
+        admin_ips = {}
+        for node_id, ip_addr in db().query(
+            IPAddr.node, IPAddr.ip_addr
+        ).filter(
+            IPAddr.node.in_([n.id for n in nodes])
+        ).filter_by(network=admin_net_id):
+            admin_ips.setdefault(node_id, []).append(ip_addr)
+
+        # all directories are in the same parent directory, so
+        # there is no use in doing these operations in parallel
+        for node in nodes:
+            cls._prepare_node_syslog_dir(
+                node, prefix, admin_ips.get(node.id, []))
+
+        os.system("/usr/bin/pkill -HUP rsyslog")
+
+    @classmethod
+    def _prepare_node_syslog_dir(cls, node, prefix, admin_ips):
+        logger.debug("Preparing syslog directories for node: %s", node.fqdn)
+
         old = os.path.join(prefix, str(node.ip))
         bak = os.path.join(prefix, "%s.bak" % str(node.fqdn))
         new = os.path.join(prefix, str(node.fqdn))
-
-        admin_net_id = NetworkManager.get_admin_network_group_id()
-        links = map(
-            lambda i: os.path.join(prefix, i.ip_addr),
-            db().query(IPAddr.ip_addr).
-            filter_by(node=node.id).
-            filter_by(network=admin_net_id).all()
-        )
+        links = [os.path.join(prefix, ip) for ip in admin_ips]
 
         logger.debug("prepare_syslog_dir old=%s", old)
         logger.debug("prepare_syslog_dir new=%s", new)
@@ -113,8 +139,6 @@ class TaskHelper(object):
             logger.debug("Creating symlink %s -> %s", l, new)
             os.symlink(str(node.fqdn), l)
 
-        os.system("/usr/bin/pkill -HUP rsyslog")
-
     @classmethod
     def update_task_status(cls, uuid, status, progress,
                            msg="", result=None):
@@ -134,6 +158,7 @@ class TaskHelper(object):
                 logger.info(
                     u"Task {0} ({1}) {2} is set to {3}".format(
                         task.uuid, task.name, key, value))
+        objects.Event.publish_task(task)
         db().commit()
 
         if task.cluster_id:
@@ -169,6 +194,7 @@ class TaskHelper(object):
         task.result = result or task.result
         # join messages if not None or ""
         task.message = '\n'.join([m for m in messages if m])
+        objects.Event.publish_task(task)
         db().commit()
         if previous_status != task.status and task.cluster_id:
             logger.debug("Updating cluster status: "
@@ -197,6 +223,7 @@ class TaskHelper(object):
                 task.message = u'\n'.join(map(
                     lambda s: s.message, filter(
                         lambda s: s.message is not None, subtasks)))
+                objects.Event.publish_task(task)
                 db().commit()
                 cls.update_cluster_status(uuid)
             elif any(map(lambda s: s.status in ('error',), subtasks)):
@@ -205,6 +232,7 @@ class TaskHelper(object):
                         subtask.status = 'error'
                         subtask.progress = 100
                         subtask.message = 'Task aborted'
+                        objects.Event.publish_task(subtask)
 
                 task.status = 'error'
                 task.progress = 100
@@ -215,6 +243,7 @@ class TaskHelper(object):
                             # TODO: make this check less ugly
                             s.message == 'Task aborted'
                         ), subtasks)))))
+                objects.Event.publish_task(task)
                 db().commit()
                 cls.update_cluster_status(uuid)
             else:
@@ -236,6 +265,7 @@ class TaskHelper(object):
                     )
                 else:
                     task.progress = 0
+                objects.Event.publish_task(task)
                 db().commit()
 
     @classmethod
@@ -252,6 +282,7 @@ class TaskHelper(object):
                     if n.status == 'deploying':
                         n.status = 'ready'
                         n.progress = 100
+                        objects.Event.publish_node(n)
 
                 cls.__set_cluster_status(cluster, 'operational')
                 objects.Cluster.clear_pending_changes(cluster)
@@ -323,60 +354,50 @@ class TaskHelper(object):
             node.status = 'error'
             node.progress = 0
             node.error_type = error_type
+            objects.Event.publish_node(node)
 
     @classmethod
     def recalculate_deployment_task_progress(cls, task):
-        cluster_nodes = db().query(Node).filter_by(cluster_id=task.cluster_id)
-        nodes_progress = []
-        nodes_progress.extend(
-            cluster_nodes.filter_by(status='discover').count() * [0])
-        nodes_progress.extend(
-            cluster_nodes.filter_by(online=False).count() * [100])
-
-        # Progress of provisioned node is 0
-        # because deployment not started yet
-        nodes_progress.extend(
-            cluster_nodes.filter_by(status='provisioned').count() * [0])
-
-        nodes_progress.extend([
-            n.progress for n in
-            cluster_nodes.filter(
-                Node.status.in_(['deploying', 'ready']))])
-
-        if nodes_progress:
-            return int(float(sum(nodes_progress)) / len(nodes_progress))
+        return statistics.deployment_progress(task.cluster_id)
 
     @classmethod
     def recalculate_provisioning_task_progress(cls, task):
-        cluster_nodes = db().query(Node).filter_by(cluster_id=task.cluster_id)
-        nodes_progress = [
-            n.progress for n in
-            cluster_nodes.filter(
-                Node.status.in_(['provisioning', 'provisioned']))]
+        return statistics.provisioning_progress(task.cluster_id)
 
-        if nodes_progress:
-            return int(float(sum(nodes_progress)) / len(nodes_progress))
+    @classmethod
+    def _get_cluster_nodes(cls, cluster, *criteria):
+        """Nodes of cluster which match criteria. Filtering is done
+        by database, so nodes which don't need any actions
+        are not loaded.
+        """
+        return db().query(Node).filter(
+            Node.cluster_id == cluster.id,
+            or_(*criteria)
+        ).order_by(Node.id).all()
 
     @classmethod
     def nodes_to_delete(cls, cluster):
-        return filter(
-            lambda n: any([
-                n.pending_deletion,
-                n.needs_redeletion
-            ]),
-            cluster.nodes
+        return cls._get_cluster_nodes(
+            cluster,
+            Node.pending_deletion == (True),
+            and_(Node.status == 'error', Node.error_type == 'deletion')
         )
 
     @classmethod
     def nodes_to_deploy(cls, cluster):
-        nodes_to_deploy = sorted(filter(
-            lambda n: any([
-                n.pending_addition,
-                n.needs_reprovision,
-                n.needs_redeploy
-            ]),
-            cluster.nodes
-        ), key=lambda n: n.id)
+        nodes_to_deploy = cls._get_cluster_nodes(
+            cluster,
+            Node.pending_addition == (True),
+            and_(
+                Node.status == 'error',
+                Node.error_type == 'provision',
+                Node.pending_deletion == (False)
+            ),
+            and_(
+                or_(Node.status == 'error', Node.pending_role_list.any()),
+                Node.pending_deletion == (False)
+            )
+        )
 
         if cluster.is_ha_mode:
             return cls.__nodes_to_deploy_ha(cluster, nodes_to_deploy)
@@ -385,13 +406,15 @@ class TaskHelper(object):
 
     @classmethod
     def nodes_to_provision(cls, cluster):
-        return sorted(filter(
-            lambda n: any([
-                n.pending_addition,
-                n.needs_reprovision
-            ]),
-            cluster.nodes
-        ), key=lambda n: n.id)
+        return cls._get_cluster_nodes(
+            cluster,
+            Node.pending_addition == (True),
+            and_(
+                Node.status == 'error',
+                Node.error_type == 'provision',
+                Node.pending_deletion == (False)
+            )
+        )
 
     @classmethod
     def nodes_in_provisioning(cls, cluster):
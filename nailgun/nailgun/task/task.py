@@ -14,6 +14,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
+
 import netaddr
 
 from sqlalchemy import func
@@ -32,7 +34,9 @@ from nailgun.db.sqlalchemy.models import Cluster
 from nailgun.db.sqlalchemy.models import Node
 from nailgun.db.sqlalchemy.models import RedHatAccount
 from nailgun.db.sqlalchemy.models import Release
+from nailgun.db.sqlalchemy import statistics
 from nailgun.errors import errors
+from nailgun.errors import NailgunException
 from nailgun.logger import logger
 from nailgun.network.checker import NetworkCheck
 from nailgun.orchestrator import deployment_serializers
@@ -40,6 +44,7 @@ from nailgun.orchestrator import provisioning_serializers
 from nailgun.settings import settings
 from nailgun.task.fake import FAKE_THREADS
 from nailgun.task.helpers import TaskHelper
+from nailgun.utils import compact_vlans
 
 
 def fake_cast(queue, messages, **kwargs):
@@ -150,11 +155,8 @@ class ProvisionTask(object):
             provisioning_serializers.serialize(
                 task.cluster, nodes_to_provisioning)
 
-        for node in nodes_to_provisioning:
-            if settings.FAKE_TASKS or settings.FAKE_TASKS_AMQP:
-                continue
-
-            TaskHelper.prepare_syslog_dir(node)
+        if not (settings.FAKE_TASKS or settings.FAKE_TASKS_AMQP):
+            TaskHelper.prepare_syslog_dirs(nodes_to_provisioning)
 
         message = {
             'method': 'provision',
@@ -343,8 +345,16 @@ class VerifyNetworksTask(object):
 
     @classmethod
     def _message(cls, task, data):
+        vlans_by_network = dict((ng['name'], ng['vlans']) for ng in data)
+        cluster_nodes = db().query(Node).options(
+            joinedload('nic_interfaces'),
+            joinedload('nic_interfaces.assigned_networks_list'),
+            joinedload('nic_interfaces.bond'),
+            joinedload('nic_interfaces.bond.assigned_networks_list')
+        ).filter_by(cluster_id=task.cluster_id).order_by(Node.id)
+
         nodes = []
-        for n in task.cluster.nodes:
+        for n in cluster_nodes:
             node_json = {'uid': n.id, 'networks': []}
 
             for nic in n.nic_interfaces:
@@ -359,17 +369,17 @@ class VerifyNetworksTask(object):
                     if not ng.cluster_id:
                         vlans.append(0)
                         continue
-                    data_ng = filter(lambda i: i['name'] == ng.name, data)[0]
-                    if data_ng['vlans']:
-                        vlans.extend(data_ng['vlans'])
+                    if vlans_by_network[ng.name]:
+                        vlans.extend(vlans_by_network[ng.name])
                     else:
                         # in case absence of vlans net_probe will
                         # send packages on untagged iface
                         vlans.append(0)
                 if not vlans:
                     continue
+                # long VLAN ranges are sent as "start-end" strings
                 node_json['networks'].append(
-                    {'iface': nic.name, 'vlans': vlans}
+                    {'iface': nic.name, 'vlans': compact_vlans(vlans)}
                 )
             nodes.append(node_json)
         return {
@@ -406,12 +416,41 @@ class CheckBeforeDeploymentTask(object):
 
     @classmethod
     def execute(cls, task):
-        cls._check_nodes_are_online(task)
-        cls._check_controllers_count(task)
-        cls._check_disks(task)
-        cls._check_ceph(task)
-        cls._check_volumes(task)
-        cls._check_network(task)
+        cls._load_cluster_nodes(task)
+
+        # all checks are run and their failures are reported together
+        failures = []
+        for check in (
+            cls._check_nodes_are_online,
+            cls._check_controllers_count,
+            cls._check_disks_and_volumes,
+            cls._check_ceph,
+            cls._check_network
+        ):
+            try:
+                check(task)
+            except NailgunException as exc:
+                failures.append(exc)
+
+        if len(failures) == 1:
+            raise failures[0]
+        elif failures:
+            raise errors.CheckBeforeDeploymentError(
+                u'\n'.join(f.message for f in failures))
+
+    @classmethod
+    def _load_cluster_nodes(cls, task):
+        """Load cluster nodes with everything required by checks
+        with one query
+        """
+        db().query(Cluster).options(
+            joinedload('release'),
+            joinedload('attributes'),
+            joinedload('nodes'),
+            joinedload('nodes.attributes'),
+            joinedload('nodes.role_list'),
+            joinedload('nodes.pending_role_list')
+        ).filter_by(id=task.cluster_id).first()
 
     @classmethod
     def _check_nodes_are_online(cls, task):
@@ -447,25 +486,58 @@ class CheckBeforeDeploymentTask(object):
 
     @classmethod
     def _check_disks(cls, task):
-        try:
-            for node in task.cluster.nodes:
-                if cls._is_disk_checking_required(node):
-                    node.volume_manager.check_disk_space_for_deployment()
-        except errors.NotEnoughFreeSpace:
-            raise errors.NotEnoughFreeSpace(
-                u"Node '%s' has insufficient disk space" %
-                node.human_readable_name)
+        cls._check_disks_and_volumes(task, check_volumes=False)
 
     @classmethod
     def _check_volumes(cls, task):
+        cls._check_disks_and_volumes(task, check_disks=False)
+
+    @classmethod
+    def _check_disks_and_volumes(cls, task,
+                                 check_disks=True, check_volumes=True):
+        """Check disks space and volumes sizes of all nodes which
+        are not provisioned yet. Nodes with the same disks, roles and
+        volumes are checked only once. Volumes sizes aren't checked
+        for nodes with insufficient disks space.
+
+        :raises: errors.NotEnoughFreeSpace with messages for all nodes
+        """
+        results = {}
+        messages = []
+        for node in task.cluster.nodes:
+            if not cls._is_disk_checking_required(node):
+                continue
+            volume_manager = node.volume_manager
+            key = (
+                volume_manager.fingerprint,
+                json.dumps(volume_manager.volumes, sort_keys=True)
+            )
+            if key not in results:
+                results[key] = cls._get_disks_and_volumes_error(
+                    volume_manager, check_disks, check_volumes)
+            if results[key] is not None:
+                messages.append(
+                    u"Node '%s' has insufficient disk space%s" % (
+                        node.human_readable_name, results[key]))
+
+        if messages:
+            raise errors.NotEnoughFreeSpace(u'\n'.join(messages))
+
+    @classmethod
+    def _get_disks_and_volumes_error(cls, volume_manager,
+                                     check_disks, check_volumes):
+        """:returns: None if checks are passed or details of failure
+        """
         try:
-            for node in task.cluster.nodes:
-                if cls._is_disk_checking_required(node):
-                    node.volume_manager.check_volume_sizes_for_deployment()
+            if check_disks:
+                volume_manager.check_disk_space_for_deployment()
+        except errors.NotEnoughFreeSpace:
+            return u''
+        try:
+            if check_volumes:
+                volume_manager.check_volume_sizes_for_deployment()
         except errors.NotEnoughFreeSpace as e:
-            raise errors.NotEnoughFreeSpace(
-                u"Node '%s' has insufficient disk space\n%s" % (
-                    node.human_readable_name, e.message))
+            return u'\n%s' % e.message
 
     @classmethod
     def _check_ceph(cls, task):
@@ -655,34 +727,20 @@ class GenerateCapacityLogTask(object):
     @classmethod
     def execute(cls, task):
         logger.debug("GenerateCapacityLogTask: task=%s" % task.uuid)
-        unallocated_nodes = db().query(Node).filter_by(cluster_id=None).count()
-        # Use Node.cluster_id != (None) for PEP-8 accordance.
-        allocated_nodes = db().query(Node).\
-            filter(Node.cluster_id != (None)).count()
-        node_allocation = db().query(Cluster, func.count(Node.id)).\
-            outerjoin(Node).group_by(Cluster)
+        node_allocation = db().query(Cluster.name, func.count(Node.id)).\
+            outerjoin(Node).group_by(Cluster.id, Cluster.name)
         env_stats = []
-        for allocation in node_allocation:
-            env_stats.append({'cluster': allocation[0].name,
-                              'nodes': allocation[1]})
-        allocation_stats = {'allocated': allocated_nodes,
-                            'unallocated': unallocated_nodes}
+        for name, count in node_allocation:
+            env_stats.append({'cluster': name,
+                              'nodes': count})
 
         fuel_data = {
             "release": settings.VERSION['release'],
             "uuid": settings.FUEL_KEY
         }
 
-        nodes = db().query(Node).options(
-            joinedload('role_list'))
-        roles_stat = {}
-        for node in nodes:
-            if node.roles:
-                roles_list = '+'.join(sorted(node.roles))
-                if roles_list in roles_stat:
-                    roles_stat[roles_list] += 1
-                else:
-                    roles_stat[roles_list] = 1
+        allocation_stats = statistics.allocation_stats()
+        roles_stat = statistics.roles_combinations_stats()
 
         capacity_data = {'environment_stats': env_stats,
                          'allocation_stats': allocation_stats,
@@ -14,6 +14,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from datetime import datetime
+from datetime import timedelta
+
 from nailgun.assassin import assassind
 from nailgun.test.base import BaseIntegrationTest
 
@@ -42,3 +45,63 @@ class TestKeepalive(BaseIntegrationTest):
         )
         assassind.update_nodes_status(self.ZERO_TIMEOUT)
         self.assertEqual(node.online, True)
+
+
+class TestLivenessTracker(BaseIntegrationTest):
+
+    TIMEOUT = 180
+    INTERVAL = 30
+
+    def setUp(self):
+        super(TestLivenessTracker, self).setUp()
+        self.tracker = assassind.LivenessTracker(self.TIMEOUT, self.INTERVAL)
+        self.now = datetime.now()
+
+    def create_node(self, seconds_ago, **kwargs):
+        node = self.env.create_node(**kwargs)
+        node.timestamp = self.now - timedelta(seconds=seconds_ago)
+        self.db.commit()
+        return node
+
+    def test_nodes_go_offline_at_deadlines(self):
+        fresh = self.create_node(0)
+        stale = self.create_node(170)
+        self.tracker.sync(self.now)
+
+        self.assertEquals(self.tracker.seconds_to_next_deadline(self.now), 10)
+        self.assertEquals(self.tracker.expire(self.now), [])
+
+        later = self.now + timedelta(seconds=11)
+        self.assertEquals(self.tracker.expire(later), [stale.id])
+        self.db.refresh(fresh)
+        self.db.refresh(stale)
+        self.assertTrue(fresh.online)
+        self.assertFalse(stale.online)
+
+    def test_heartbeat_moves_deadline(self):
+        node = self.create_node(170)
+        self.tracker.sync(self.now)
+
+        later = self.now + timedelta(seconds=20)
+        node.timestamp = later
+        self.db.commit()
+        self.tracker.sync(later)
+
+        self.assertEquals(self.tracker.expire(later), [])
+        self.db.refresh(node)
+        self.assertTrue(node.online)
+        self.assertEquals(
+            self.tracker.seconds_to_next_deadline(later), self.INTERVAL)
+
+    def test_provisioning_node_checked_again(self):
+        node = self.create_node(200, status='provisioning')
+        self.tracker.sync(self.now)
+
+        self.assertEquals(self.tracker.expire(self.now), [])
+        self.db.refresh(node)
+        self.assertTrue(node.online)
+
+        node.status = 'provisioned'
+        self.db.commit()
+        later = self.now + timedelta(seconds=self.INTERVAL)
+        self.assertEquals(self.tracker.expire(later), [node.id])
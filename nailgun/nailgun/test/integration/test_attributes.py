@@ -16,6 +16,8 @@
 
 import json
 
+from mock import patch
+
 from nailgun import objects
 
 from nailgun.db.sqlalchemy.models import Release
@@ -220,6 +222,31 @@ class TestAttributes(BaseIntegrationTest):
                 else:
                     self.assertEquals(orig_value, value)
 
+    def test_merged_attrs_cached_until_update(self):
+        cluster = self.env.create_cluster(api=True)
+        cluster_db = objects.Cluster.get_by_uid(cluster['id'])
+        attrs = objects.Cluster.get_attributes(cluster_db)
+
+        values = objects.Attributes.merged_attrs_values(attrs)
+        values['deployment_id'] = cluster['id']
+        with patch('nailgun.objects.cluster.dict_merge') as dict_merge:
+            cached = objects.Attributes.merged_attrs_values(attrs)
+            self.assertFalse(dict_merge.called)
+        self.assertNotIn('deployment_id', cached)
+
+        resp = self.app.patch(
+            reverse(
+                'ClusterAttributesHandler',
+                kwargs={'cluster_id': cluster['id']}),
+            params=json.dumps({'editable': {"foo": {"bar": {"value": 1}}}}),
+            headers=self.default_headers
+        )
+        self.assertEquals(200, resp.status_code)
+        attrs = objects.Cluster.get_attributes(cluster_db)
+        self.assertEquals(
+            objects.Attributes.merged_attrs_values(attrs)['foo'],
+            {"bar": 1})
+
     def _compare(self, d1, d2):
         if isinstance(d1, dict) and isinstance(d2, dict):
             for s_field, s_value in d1.iteritems():
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright 2013 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from datetime import datetime
+import json
+
+from nailgun.assassin import assassind
+from nailgun.db import db
+from nailgun.db.sqlalchemy.models import Event
+from nailgun import notifier
+from nailgun import objects
+from nailgun.task.helpers import TaskHelper
+from nailgun.test.base import BaseIntegrationTest
+from nailgun.test.base import reverse
+
+
+class TestEventsHandler(BaseIntegrationTest):
+
+    def get_events(self, expect_errors=False, **params):
+        resp = self.app.get(
+            reverse('EventCollectionHandler'),
+            params=params,
+            headers=self.default_headers,
+            expect_errors=expect_errors
+        )
+        if expect_errors:
+            return resp
+        self.assertEquals(200, resp.status_code)
+        return json.loads(resp.body)
+
+    def test_cursor_without_events(self):
+        response = self.get_events()
+        self.assertEquals(response["events"], [])
+        self.assertEquals(response["cursor"], 0)
+        self.assertFalse(response["reset"])
+
+    def test_initial_request_returns_last_cursor(self):
+        notifier.notify("done", "First")
+        notifier.notify("done", "Second")
+        last = self.db.query(Event).order_by(Event.id.desc()).first()
+
+        response = self.get_events()
+        self.assertEquals(response["cursor"], last.position)
+        self.assertEquals(response["events"], [])
+
+    def test_events_after_cursor(self):
+        cursor = self.get_events()["cursor"]
+        notifier.notify("done", "Deployed")
+
+        response = self.get_events(cursor=cursor)
+        self.assertEquals(len(response["events"]), 1)
+        event = response["events"][0]
+        self.assertEquals(event["topic"], "notification")
+        self.assertEquals(event["action"], "create")
+        self.assertEquals(event["data"]["message"], "Deployed")
+        self.assertEquals(response["cursor"], event["position"])
+
+        response = self.get_events(cursor=response["cursor"])
+        self.assertEquals(response["events"], [])
+        self.assertEquals(response["cursor"], event["position"])
+
+    def test_event_committed_later_is_not_skipped(self):
+        cursor = self.get_events()["cursor"]
+        # takes smaller id, but commits after the next event
+        other = db.session_factory()
+        other.add(Event(
+            topic="notification",
+            action="create",
+            object_id=0,
+            data={"message": "Slow"},
+            datetime=datetime.now()
+        ))
+        other.flush()
+        notifier.notify("done", "Fast")
+
+        response = self.get_events(cursor=cursor)
+        self.assertEquals(
+            [e["data"]["message"] for e in response["events"]],
+            ["Fast"]
+        )
+
+        objects.Event.assign_positions(other)
+        other.commit()
+        other.close()
+
+        response = self.get_events(cursor=response["cursor"])
+        self.assertEquals(
+            [e["data"]["message"] for e in response["events"]],
+            ["Slow"]
+        )
+
+    def test_task_status_update_is_published(self):
+        cluster = self.env.create_cluster(api=False)
+        task = self.env.create_task(
+            name="deploy",
+            cluster_id=cluster.id,
+            status="running"
+        )
+        cursor = self.get_events()["cursor"]
+
+        TaskHelper.update_task_status(task.uuid, "running", 42)
+
+        events = self.get_events(cursor=cursor, topics="task")["events"]
+        self.assertEquals(len(events), 1)
+        self.assertEquals(events[0]["object_id"], task.id)
+        self.assertEquals(events[0]["cluster_id"], cluster.id)
+        self.assertEquals(events[0]["data"]["progress"], 42)
+        self.assertEquals(events[0]["data"]["status"], "running")
+
+    def test_offline_node_is_published(self):
+        node = self.env.create_node(status="discover")
+        cursor = self.get_events()["cursor"]
+
+        assassind.update_nodes_status(0)
+
+        events = self.get_events(cursor=cursor, topics="node")["events"]
+        self.assertEquals(len(events), 1)
+        self.assertEquals(events[0]["object_id"], node.id)
+        self.assertEquals(events[0]["data"], {"online": False})
+
+    def test_filter_by_cluster(self):
+        cluster = self.env.create_cluster(api=False)
+        cursor = self.get_events()["cursor"]
+        notifier.notify("done", "Other")
+        notifier.notify("done", "Mine", cluster_id=cluster.id)
+
+        response = self.get_events(cursor=cursor, cluster_id=cluster.id)
+        self.assertEquals(
+            [e["data"]["message"] for e in response["events"]],
+            ["Mine"]
+        )
+
+    def test_reset_after_prune(self):
+        notifier.notify("done", "Old")
+        cursor = self.get_events()["cursor"]
+        notifier.notify("done", "Lost")
+        notifier.notify("done", "Kept")
+        lost = self.db.query(Event).filter(Event.position > cursor).\
+            order_by(Event.position).first()
+        self.db.delete(lost)
+        self.db.query(Event).filter(Event.position <= cursor).delete()
+        self.db.commit()
+
+        response = self.get_events(cursor=cursor)
+        self.assertTrue(response["reset"])
+        self.assertEquals(
+            [e["data"]["message"] for e in response["events"]],
+            ["Kept"]
+        )
+
+    def test_prune(self):
+        notifier.notify("done", "Old")
+        assassind.prune_events(60)
+        self.assertEquals(self.db.query(Event).count(), 1)
+        assassind.prune_events(-60)
+        self.assertEquals(self.db.query(Event).count(), 0)
+
+    def test_long_poll_timeout(self):
+        cursor = self.get_events()["cursor"]
+        response = self.get_events(cursor=cursor, timeout=0.1)
+        self.assertEquals(response["events"], [])
+        self.assertEquals(response["cursor"], cursor)
+
+    def test_invalid_params(self):
+        for params in (
+            {"cursor": "abc"},
+            {"cluster_id": "abc"},
+            {"cursor": 0, "topics": "cluster"},
+            {"cursor": 0, "timeout": "forever"}
+        ):
+            resp = self.get_events(expect_errors=True, **params)
+            self.assertEquals(400, resp.status_code)
@@ -18,7 +18,9 @@ import cStringIO
 import json
 import yaml
 
+from nailgun.db.sqlalchemy.fixman import dump_fixture
 from nailgun.db.sqlalchemy.fixman import upload_fixture
+from nailgun.db.sqlalchemy.models import NetworkGroup
 from nailgun.db.sqlalchemy.models import Node
 from nailgun.db.sqlalchemy.models import Release
 from nailgun.test.base import BaseIntegrationTest
@@ -140,3 +142,63 @@ class TestFixture(BaseIntegrationTest):
         self.assertEqual(len(prev_rel), 1)
         self.assertEqual(list(prev_rel[0].roles),
                          ["compute", "ceph-osd", "controller", "cinder"])
+
+    def test_fixture_dependencies_order(self):
+        data = '''[{
+            "pk": 2,
+            "model": "nailgun.i_p_addr_range",
+            "fields": {
+                "first": "10.30.0.2",
+                "last": "10.30.0.254",
+                "network_group": 2
+            }
+        }, {
+            "pk": 2,
+            "model": "nailgun.network_group",
+            "fields": {
+                "name": "storage",
+                "cidr": "10.30.0.0/24",
+                "netmask": "255.255.255.0",
+                "network_size": 256
+            }
+        }]'''
+
+        upload_fixture(cStringIO.StringIO(data), loader=json)
+        ng = self.db.query(NetworkGroup).filter_by(
+            cidr="10.30.0.0/24").one()
+        self.assertEqual(
+            [(r.first, r.last) for r in ng.ip_ranges],
+            [("10.30.0.2", "10.30.0.254")])
+
+    def test_already_uploaded_objects_skipped(self):
+        node = self.db.query(Node).first()
+        data = json.dumps([{
+            "pk": node.id,
+            "model": "nailgun.node",
+            "fields": {"mac": "00:25:90:6a:b1:ff"}
+        }, {
+            "pk": 2,
+            "model": "nailgun.release",
+            "fields": {
+                "name": "SkippedNodeRelease",
+                "version": "0.0.1",
+                "operating_system": "CentOS"
+            }
+        }])
+
+        upload_fixture(cStringIO.StringIO(data), loader=json)
+        self.assertEqual(self.db.query(Node).count(), 8)
+        self.assertEqual(
+            self.db.query(Release).filter_by(
+                name="SkippedNodeRelease").count(),
+            1)
+
+    def test_dump_fixture(self):
+        stream = cStringIO.StringIO()
+        dump_fixture('node', stream=stream, batch_size=3)
+        dump = json.loads(stream.getvalue())
+        nodes = self.db.query(Node).order_by(Node.id).all()
+        self.assertEqual([d['pk'] for d in dump], [n.id for n in nodes])
+        self.assertEqual(
+            set(d['model'] for d in dump), set(['nailgun.node']))
+        self.assertEqual(dump[0]['fields']['mac'], nodes[0].mac)
@@ -14,6 +14,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
 import itertools
 import json
 
@@ -26,6 +27,8 @@ from sqlalchemy import not_
 
 import nailgun
 
+from nailgun import objects
+
 from nailgun.db.sqlalchemy.models import IPAddr
 from nailgun.db.sqlalchemy.models import IPAddrRange
 from nailgun.db.sqlalchemy.models import NetworkGroup
@@ -385,6 +388,50 @@ class TestNetworkManager(BaseIntegrationTest):
             itertools.product((0, 1), ('eth0',))
         )
 
+    def test_update_interfaces_info_noop_if_unchanged(self):
+        node = self.env.create_node(api=True)
+        node_db = self.db.query(Node).get(node['id'])
+        interfaces_ids = sorted(i.id for i in node_db.nic_interfaces)
+
+        self.assertFalse(
+            self.env.network_manager.update_interfaces_info(node_db))
+        self.assertEquals(
+            sorted(i.id for i in node_db.nic_interfaces),
+            interfaces_ids)
+
+    def test_update_interfaces_info_for_nodes(self):
+        for _ in xrange(2):
+            self.env.create_node(api=True)
+        nodes = self.db.query(Node).order_by(Node.id).all()
+
+        meta = copy.deepcopy(nodes[0].meta)
+        removed = meta['interfaces'].pop()
+        meta['interfaces'][0]['current_speed'] = 10
+        meta['interfaces'].append({
+            'name': 'eth9',
+            'mac': self.env.generate_random_mac().upper()
+        })
+        nodes[0].meta = meta
+
+        self.assertTrue(
+            self.env.network_manager.update_interfaces_info_for_nodes(nodes))
+        self.db.commit()
+
+        interfaces = self.db.query(NodeNICInterface).filter_by(
+            node_id=nodes[0].id).all()
+        self.assertEquals(
+            set(i.mac for i in interfaces),
+            set(i['mac'].lower() for i in meta['interfaces']))
+        self.assertNotIn(removed['mac'].lower(),
+                         [i.mac for i in nodes[0].nic_interfaces])
+        self.assertEquals(
+            [i.current_speed for i in interfaces
+             if i.mac == meta['interfaces'][0]['mac'].lower()],
+            [10])
+        self.assertEquals(
+            len(nodes[1].nic_interfaces),
+            len(nodes[1].meta['interfaces']))
+
 
 class TestNovaNetworkManager(BaseIntegrationTest):
 
@@ -424,6 +471,30 @@ class TestNovaNetworkManager(BaseIntegrationTest):
             set(other_nets),
             set([n['name'] for n in def_other_nic[0]['assigned_networks']]))
 
+    def test_assign_networks_by_default_for_nodes(self):
+        nodes = self.env.create_nodes_w_interfaces_count(3, if_count=3)
+        objects.Cluster.update_nodes(
+            self.env.clusters[0], [n.id for n in nodes + [self.node_db]])
+        self.db.commit()
+
+        for node in nodes:
+            default = dict(
+                (nic['id'], set(
+                    ng['name'] for ng in nic.get('assigned_networks', [])))
+                for nic in NovaNetworkManager.
+                get_default_networks_assignment(node)
+            )
+            assigned = dict(
+                (nic.id, set(ng.name for ng in nic.assigned_networks_list))
+                for nic in node.nic_interfaces
+            )
+            self.assertEquals(default, assigned)
+
+        self.env.network_manager.clear_assigned_networks_for_nodes(nodes)
+        for node in nodes:
+            for nic in node.interfaces:
+                self.assertEquals(nic.assigned_networks_list, [])
+
 
 class TestNeutronManager(BaseIntegrationTest):
 
@@ -69,6 +69,72 @@ class TestHandlers(BaseIntegrationTest):
             response[0]['id']
         )
 
+    def test_node_get_with_fields(self):
+        self.env.create_node(api=True)
+
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            params={'fields': 'id,status,unknown'},
+            headers=self.default_headers
+        )
+        self.assertEquals(200, resp.status_code)
+        response = json.loads(resp.body)
+        self.assertEquals(1, len(response))
+        self.assertEquals(
+            set(response[0].keys()),
+            set(['id', 'status']))
+        self.assertEquals(self.env.nodes[0].id, response[0]['id'])
+
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            params={'fields': 'id,network_data'},
+            headers=self.default_headers
+        )
+        self.assertEquals(
+            set(json.loads(resp.body)[0].keys()),
+            set(['id', 'network_data']))
+
+    def test_node_get_with_ids(self):
+        self.env.create(
+            cluster_kwargs={},
+            nodes_kwargs=[{}, {}, {"cluster_id": None}]
+        )
+        node_ids = [n.id for n in self.env.nodes]
+
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            params={
+                'ids': '{0},{1}'.format(node_ids[0], node_ids[2]),
+                'fields': 'id,status,progress'
+            },
+            headers=self.default_headers
+        )
+        self.assertEquals(200, resp.status_code)
+        self.assertEquals(
+            sorted(n['id'] for n in json.loads(resp.body)),
+            [node_ids[0], node_ids[2]])
+
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            params={
+                'ids': ','.join(map(str, node_ids)),
+                'cluster_id': self.env.clusters[0].id
+            },
+            headers=self.default_headers
+        )
+        self.assertEquals(
+            sorted(n['id'] for n in json.loads(resp.body)),
+            node_ids[:2])
+
+    def test_node_get_with_invalid_ids(self):
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            params={'ids': '1,a'},
+            headers=self.default_headers,
+            expect_errors=True
+        )
+        self.assertEquals(400, resp.status_code)
+
     def test_node_get_with_cluster_None(self):
         self.env.create(
             cluster_kwargs={"api": True},
@@ -463,6 +529,48 @@ class TestHandlers(BaseIntegrationTest):
         self.assertEquals(node.cluster, None)
         self.assertEquals(node.pending_roles, [])
 
+    def test_bulk_nodes_update(self):
+        cluster = self.env.create_cluster(api=False)
+        nodes = [self.env.create_node(api=False) for _ in range(3)]
+
+        resp = self.app.put(
+            reverse('NodeCollectionHandler'),
+            json.dumps([
+                {'id': nodes[0].id,
+                 'cluster_id': cluster.id,
+                 'pending_roles': ['controller'],
+                 'pending_addition': True},
+                {'mac': nodes[1].mac.upper(),
+                 'cluster_id': cluster.id,
+                 'pending_roles': ['controller'],
+                 'pending_addition': True},
+                {'id': nodes[2].id,
+                 'cluster_id': cluster.id,
+                 'pending_roles': ['compute'],
+                 'pending_addition': True,
+                 'name': 'compute'}]),
+            headers=self.default_headers)
+        self.assertEquals(200, resp.status_code)
+        response = dict((n['id'], n) for n in json.loads(resp.body))
+        self.assertEquals(set(response), set(n.id for n in nodes))
+
+        self.db.expire_all()
+        for node in nodes:
+            self.assertEquals(node.cluster_id, cluster.id)
+            self.assertTrue(node.pending_addition)
+            self.assertEquals(response[node.id]['cluster'], cluster.id)
+            self.assertEquals(
+                response[node.id]['pending_roles'], node.pending_roles)
+            self.assertTrue(node.network_data)
+            self.assertEquals(
+                [c.name for c in node.changes], ['disks'])
+        self.assertEquals(nodes[2].name, 'compute')
+        self.assertEquals(nodes[2].pending_roles, ['compute'])
+        self.assertEquals(
+            nodes[0].attributes.volumes, nodes[1].attributes.volumes)
+        self.assertNotEquals(
+            nodes[0].attributes.volumes, nodes[2].attributes.volumes)
+
     def test_discovered_node_unified_name(self):
         node_mac = self.env.generate_random_mac()
 
@@ -17,6 +17,9 @@
 import json
 import uuid
 
+from mock import patch
+
+from nailgun.db import db
 from nailgun.db.sqlalchemy.models import Notification
 from nailgun.db.sqlalchemy.models import Task
 from nailgun.errors import errors
@@ -163,3 +166,65 @@ class TestNotification(BaseIntegrationTest):
             notifications[0].message,
             "Cluster deletion fake error"
         )
+
+    def test_notifications_batch(self):
+        cluster = self.env.create_cluster(api=False)
+        node1 = self.env.create_node(api=False, cluster_id=cluster.id)
+        node2 = self.env.create_node(api=False, cluster_id=cluster.id)
+        task = Task(
+            uuid=str(uuid.uuid4()),
+            name="super",
+            cluster_id=cluster.id
+        )
+        self.db.add(task)
+        self.db.commit()
+        notifier.notify("error", "node failed", cluster.id,
+                        node_id=node1.id, task_uuid=task.uuid)
+
+        with notifier.NotificationsBatch() as batch:
+            for node in (node1, node2, node2):
+                batch.notify("error", "node failed", cluster.id,
+                             node_id=node.id, task_uuid=task.uuid)
+            batch.notify("done", "all done", cluster.id)
+            self.assertEqual(
+                self.db.query(Notification).count(), 1)
+
+        notifications = self.db.query(Notification).order_by(
+            Notification.id).all()
+        self.assertEqual(
+            [(n.topic, n.node_id, n.task_id) for n in notifications],
+            [("error", node1.id, task.id),
+             ("error", node2.id, task.id),
+             ("done", None, None)])
+        self.assertTrue(all(n.status == "unread" for n in notifications))
+
+        resp = self.app.get(
+            reverse('NotificationCollectionHandler'),
+            headers=self.default_headers
+        )
+        self.assertEqual(len(json.loads(resp.body)), 3)
+
+    def test_notifications_batch_commits_only_written_rows(self):
+        with patch.object(db(), 'commit') as commit:
+            notifier.NotificationsBatch().send()
+            self.assertFalse(commit.called)
+
+            with notifier.NotificationsBatch() as batch:
+                batch.notify("done", "all done")
+            self.assertEqual(commit.call_count, 1)
+
+    def test_notifications_batch_without_commit(self):
+        with notifier.NotificationsBatch(commit=False) as batch:
+            batch.notify("done", "all done")
+        self.assertEqual(self.db.query(Notification).count(), 1)
+
+        self.db.rollback()
+        self.assertEqual(self.db.query(Notification).count(), 0)
+
+    def test_notifications_batch_discover_no_node_fails(self):
+        batch = notifier.NotificationsBatch()
+        self.assertRaises(
+            errors.CannotFindNodeIDForDiscovering,
+            batch.notify,
+            "discover",
+            "discover message")
@@ -111,6 +111,46 @@ class TestVerifyNetworks(BaseIntegrationTest):
         self.assertEqual(task.message, '')
         self.assertEqual(task.result, error_nodes)
 
+    def test_verify_networks_resp_vlan_ranges(self):
+        self.env.create(
+            cluster_kwargs={},
+            nodes_kwargs=[
+                {"api": False},
+                {"api": False}
+            ]
+        )
+        cluster_db = self.env.clusters[0]
+        node1, node2 = self.env.nodes
+        nets_sent = [{'iface': 'eth0', 'vlans': [0, '100-1099']}]
+
+        task = Task(
+            name="verify_networks",
+            cluster_id=cluster_db.id
+        )
+        task.cache = {
+            "args": {
+                'nodes': [{'uid': node1.id, 'networks': nets_sent},
+                          {'uid': node2.id, 'networks': nets_sent}]
+            }
+        }
+        self.db.add(task)
+        self.db.commit()
+
+        kwargs = {'task_uuid': task.uuid,
+                  'status': 'ready',
+                  'nodes': [{'uid': node1.id, 'networks': [
+                      {'iface': 'eth0', 'vlans': range(0, 1100)}]},
+                      {'uid': node2.id, 'networks': [
+                          {'iface': 'eth0',
+                           'vlans': [0, '100-499', 501, '503-1099']}]}]}
+        self.receiver.verify_networks_resp(**kwargs)
+        self.db.refresh(task)
+        self.assertEqual(task.status, "error")
+        self.assertEqual(task.result, [{
+            'uid': node2.id, 'interface': 'eth0',
+            'name': node2.name, 'mac': node2.interfaces[0].mac,
+            'absent_vlans': [500, 502]}])
+
     def test_verify_networks_resp_error_with_removed_node(self):
         self.env.create(
             cluster_kwargs={},
@@ -315,7 +355,7 @@ class TestVerifyNetworks(BaseIntegrationTest):
         self.assertEqual(task.status, "error")
         self.assertEqual(task.message, u'DHCP ERROR')
         self.assertEqual(task.result, [{
-            u'absent_vlans': [100, 101, 102, 103, 104],
+            u'absent_vlans': ['100-104'],
             u'interface': 'eth0',
             u'mac': node2.interfaces[0].mac,
             u'name': None,
@@ -405,7 +445,7 @@ class TestVerifyNetworks(BaseIntegrationTest):
         self.assertEqual(task.message, '')
         error_nodes = [{'uid': node2.id, 'interface': 'eth0',
                         'name': node2.name, 'mac': node2.interfaces[0].mac,
-                        'absent_vlans': nets_sent[0]['vlans']},
+                        'absent_vlans': ['100-104']},
                        {'uid': node2.id, 'interface': 'eth1',
                         'name': node2.name, 'mac': 'unknown',
                         'absent_vlans': nets_sent[1]['vlans']},
@@ -455,7 +495,7 @@ class TestVerifyNetworks(BaseIntegrationTest):
         self.assertEqual(task.message, '')
         error_nodes = [{'uid': node1.id, 'interface': 'eth0',
                         'name': node1.name, 'mac': node1.interfaces[0].mac,
-                        'absent_vlans': nets_sent[0]['vlans']}]
+                        'absent_vlans': ['100-104']}]
         self.assertEqual(task.result, error_nodes)
 
     def test_verify_networks_resp_without_vlans_only(self):
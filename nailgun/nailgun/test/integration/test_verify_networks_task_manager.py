@@ -22,6 +22,7 @@ from nailgun.consts import OVS_BOND_MODES
 from nailgun.test.base import BaseIntegrationTest
 from nailgun.test.base import fake_tasks
 from nailgun.test.base import reverse
+from nailgun.utils import expand_vlans
 
 
 @patch('nailgun.rpc.receiver.NailgunReceiver._get_master_macs')
@@ -397,5 +398,6 @@ class TestVerifyNeutronVlan(BaseIntegrationTest):
         for node in task.cache['args']['nodes']:
             for net in node['networks']:
                 if net['iface'] == priv_nics[node['uid']]:
-                    self.assertTrue(vlan_rng <= set(net['vlans']))
+                    self.assertTrue(
+                        vlan_rng <= set(expand_vlans(net['vlans'])))
                     break
@@ -24,8 +24,11 @@ from nailgun.test.base import BaseIntegrationTest
 from nailgun.test.base import reverse
 from nailgun.volumes.manager import Disk
 from nailgun.volumes.manager import DisksFormatConvertor
+from nailgun.volumes.manager import layouts_cache
 from nailgun.volumes.manager import only_disks
 from nailgun.volumes.manager import only_vg
+from nailgun.volumes.manager import VolumeManager
+from nailgun.volumes.manager import VolumesLayoutsCache
 
 
 class TestNodeDisksHandlers(BaseIntegrationTest):
@@ -696,6 +699,57 @@ class TestVolumeManager(BaseIntegrationTest):
 
         self.update_ram_and_assert_swap_size(node, 81920, 4096)
 
+    def test_gen_volumes_info_uses_layouts_cache(self):
+        layouts_cache.clear()
+        self.env.create(
+            cluster_kwargs={},
+            nodes_kwargs=[
+                {'pending_roles': ['compute'], 'pending_addition': True},
+                {'pending_roles': ['compute'], 'pending_addition': True}])
+        layouts_cache.clear()
+        node1, node2 = self.env.nodes
+
+        with patch.object(VolumeManager, '_allocate_size_for_volume',
+                          autospec=True,
+                          wraps=VolumeManager._allocate_size_for_volume
+                          ) as allocate_mock:
+            volumes1 = node1.volume_manager.gen_volumes_info()
+            calls_count = allocate_mock.call_count
+            self.assertGreater(calls_count, 0)
+
+            volume_manager = node2.volume_manager
+            volumes2 = volume_manager.gen_volumes_info()
+            self.assertEquals(allocate_mock.call_count, calls_count)
+
+        self.assertEquals(volumes1, volumes2)
+        self.assertEquals(len(layouts_cache), 1)
+        # disks state is restored, so sizes can be changed further
+        self.assertEquals(
+            [d.render() for d in volume_manager.disks],
+            only_disks(volumes2))
+
+        # returned volumes aren't shared with cache
+        volumes2[0]['volumes'] = []
+        self.assertEquals(
+            node2.volume_manager.gen_volumes_info(), volumes1)
+
+        # cache key depends on node disks
+        self.add_disk_to_node(node2, 65536)
+        self.assertNotEquals(
+            node2.volume_manager.gen_volumes_info(), volumes1)
+        self.assertEquals(len(layouts_cache), 2)
+
+    def test_layouts_cache_eviction(self):
+        cache = VolumesLayoutsCache(2)
+        cache.put('a', [1])
+        cache.put('b', [2])
+        self.assertEquals(cache.get('a'), [1])
+        cache.put('c', [3])
+        self.assertIsNone(cache.get('b'))
+        self.assertEquals(cache.get('a'), [1])
+        self.assertEquals(cache.get('c'), [3])
+        self.assertEquals(len(cache), 2)
+
 
 class TestDisks(BaseIntegrationTest):
 
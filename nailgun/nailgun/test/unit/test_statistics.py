@@ -0,0 +1,65 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from nailgun.db.sqlalchemy import statistics
+from nailgun.test.base import BaseUnitTest
+
+
+class TestStatistics(BaseUnitTest):
+
+    def test_deployment_progress_counts_offline_nodes_as_done(self):
+        cluster = self.env.create(
+            nodes_kwargs=[
+                {'status': 'deploying', 'progress': 50},
+                {'status': 'ready', 'progress': 100},
+                {'status': 'discover', 'online': False}])
+
+        # offline node in discover is counted twice: as 0 and as 100
+        self.assertEquals(
+            statistics.deployment_progress(cluster['id']), 62)
+
+    def test_progress_without_nodes(self):
+        cluster = self.env.create_cluster(api=False)
+        self.assertIsNone(statistics.deployment_progress(cluster.id))
+        self.assertIsNone(statistics.provisioning_progress(cluster.id))
+
+    def test_provisioning_progress_ignores_other_statuses(self):
+        cluster = self.env.create(
+            nodes_kwargs=[
+                {'status': 'provisioning', 'progress': 30},
+                {'status': 'provisioned', 'progress': 100},
+                {'status': 'discover', 'progress': 0}])
+
+        self.assertEquals(
+            statistics.provisioning_progress(cluster['id']), 65)
+
+    def test_allocation_stats(self):
+        self.env.create(nodes_kwargs=[{}, {}])
+        self.env.create_node(api=False)
+
+        self.assertEquals(
+            statistics.allocation_stats(),
+            {'allocated': 2, 'unallocated': 1})
+
+    def test_roles_combinations_stats(self):
+        self.env.create(
+            nodes_kwargs=[
+                {'roles': ['controller']},
+                {'roles': ['cinder', 'controller']},
+                {'roles': ['controller', 'cinder']},
+                {'roles': [], 'pending_roles': ['compute']}])
+
+        self.assertEquals(
+            statistics.roles_combinations_stats(),
+            {'controller': 1, 'cinder+controller': 2})
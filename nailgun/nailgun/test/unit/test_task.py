@@ -243,3 +243,38 @@ class TestCheckBeforeDeploymentTask(BaseTestCase):
         self.env.db.commit()
 
         CheckBeforeDeploymentTask._check_nodes_are_online(self.task)
+
+    def test_check_volumes_and_disks_run_once_for_same_nodes(self):
+        self.set_node_status('discover')
+        self.env.create_node(
+            cluster_id=self.cluster.id,
+            roles=['controller'],
+            meta=self.node.meta)
+
+        with patch.object(
+                VolumeManager,
+                'check_volume_sizes_for_deployment') as check_mock:
+            CheckBeforeDeploymentTask._check_volumes(self.task)
+            self.assertEquals(check_mock.call_count, 1)
+
+    def test_execute_reports_all_failures(self):
+        self.cluster.mode = 'ha_compact'
+        self.node.online = False
+        self.env.db.commit()
+
+        with patch.object(
+                VolumeManager,
+                'check_disk_space_for_deployment',
+                side_effect=errors.NotEnoughFreeSpace):
+            with self.assertRaises(
+                    errors.CheckBeforeDeploymentError) as context:
+                CheckBeforeDeploymentTask.execute(self.task)
+
+        messages = context.exception.message.split('\n')
+        self.assertEquals(len(messages), 3)
+        self.assertIn('are offline', messages[0])
+        self.assertIn('Not enough controllers', messages[1])
+        self.assertEquals(
+            messages[2],
+            "Node '%s' has insufficient disk space" %
+            self.node.human_readable_name)
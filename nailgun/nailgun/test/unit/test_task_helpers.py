@@ -14,9 +14,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+import shutil
+import tempfile
+
+from mock import patch
 
 from nailgun.db.sqlalchemy.models import Cluster
+from nailgun.db.sqlalchemy.models import IPAddr
 from nailgun.db.sqlalchemy.models import Task
+from nailgun.network.manager import NetworkManager
 from nailgun.orchestrator.deployment_serializers \
     import DeploymentHASerializer
 from nailgun.task.helpers import TaskHelper
@@ -133,3 +140,38 @@ class TestTaskHelpers(BaseUnitTest):
 
         progress = TaskHelper.recalculate_provisioning_task_progress(task)
         self.assertEquals(progress, 50)
+
+    def test_prepare_syslog_dirs(self):
+        cluster = self.create_env([
+            {'roles': ['controller'], 'ip': '10.20.0.3'},
+            {'roles': ['compute'], 'ip': '10.20.0.4'}])
+        nodes = sorted(cluster.nodes, key=lambda n: n.id)
+        for node in nodes:
+            NetworkManager.assign_admin_ips(node.id)
+        self.db.commit()
+
+        prefix = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, prefix)
+        # bootstrap logs of the first node and old logs of the second
+        os.makedirs(os.path.join(prefix, nodes[0].ip))
+        open(os.path.join(prefix, nodes[0].ip, 'messages'), 'w').close()
+        os.makedirs(os.path.join(prefix, nodes[1].fqdn))
+
+        with patch('nailgun.task.helpers.os.system') as system_mock:
+            TaskHelper.prepare_syslog_dirs(nodes, prefix)
+        system_mock.assert_called_once_with("/usr/bin/pkill -HUP rsyslog")
+
+        self.assertTrue(os.path.isfile(
+            os.path.join(prefix, nodes[0].fqdn, 'messages')))
+        self.assertFalse(os.path.exists(os.path.join(prefix, nodes[0].ip)))
+        self.assertTrue(os.path.isdir(
+            os.path.join(prefix, '%s.bak' % nodes[1].fqdn)))
+        admin_net_id = NetworkManager.get_admin_network_group_id()
+        for node in nodes:
+            self.assertTrue(os.path.isdir(os.path.join(prefix, node.fqdn)))
+            ips = self.db.query(IPAddr).filter_by(
+                node=node.id, network=admin_net_id).all()
+            self.assertEquals(len(ips), 1)
+            link = os.path.join(prefix, ips[0].ip_addr)
+            self.assertTrue(os.path.islink(link))
+            self.assertEquals(os.readlink(link), node.fqdn)
@@ -15,7 +15,9 @@
 #    under the License.
 
 from nailgun.test.base import BaseIntegrationTest
+from nailgun.utils import compact_vlans
 from nailgun.utils import dict_merge
+from nailgun.utils import expand_vlans
 
 
 class TestUtils(BaseIntegrationTest):
@@ -38,3 +40,18 @@ class TestUtils(BaseIntegrationTest):
                                            "transparency": 100,
                                            "dict": {"stuff": "hz",
                                                     "another_stuff": "hz"}}})
+
+    def test_compact_vlans(self):
+        self.assertEqual(compact_vlans([]), [])
+        self.assertEqual(compact_vlans([0, 101, 102]), [0, 101, 102])
+        self.assertEqual(
+            compact_vlans([105, 0, 100, 101, 102, 103, 103, 200]),
+            [0, '100-103', 105, 200])
+        self.assertEqual(compact_vlans(range(1000, 2000)), ['1000-1999'])
+
+    def test_expand_vlans(self):
+        self.assertEqual(expand_vlans([0, '100-103', 105]),
+                         [0, 100, 101, 102, 103, 105])
+        self.assertEqual(expand_vlans(['7,10-12']), [7, 10, 11, 12])
+        vlans = [0, 5, 6, 7, 8, 20, 21, 3000]
+        self.assertEqual(expand_vlans(compact_vlans(vlans)), vlans)
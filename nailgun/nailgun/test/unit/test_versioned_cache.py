@@ -0,0 +1,82 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import Mock
+from mock import patch
+
+from nailgun import objects
+
+from nailgun.db import engine
+from nailgun.db.sqlalchemy.cache import VersionedCache
+from nailgun.db.sqlalchemy.models import CacheVersion
+from nailgun.test.base import BaseIntegrationTest
+
+
+class TestVersionedCache(BaseIntegrationTest):
+
+    def setUp(self):
+        super(TestVersionedCache, self).setUp()
+        self.cache = VersionedCache()
+
+    def test_value_is_loaded_once(self):
+        loader = Mock(return_value='value')
+        self.assertEquals(self.cache.get('ns', 'key', loader), 'value')
+        self.db.commit()
+        self.assertEquals(self.cache.get('ns', 'key', loader), 'value')
+        self.assertEquals(loader.call_count, 1)
+
+    def test_invalidate(self):
+        loader = Mock(side_effect=['old', 'new'])
+        self.assertEquals(self.cache.get('ns', 'key', loader), 'old')
+        self.cache.invalidate('ns')
+        self.assertEquals(self.cache.get('ns', 'key', loader), 'new')
+        self.assertEquals(
+            self.db.query(CacheVersion).get('ns').version, 1)
+
+    def test_version_bumped_by_other_process(self):
+        loader = Mock(side_effect=['old', 'new'])
+        self.assertEquals(self.cache.get('ns', 'key', loader), 'old')
+
+        other_cache = VersionedCache()
+        other_cache.invalidate('ns')
+        self.db.commit()
+        # stamps are read once per transaction
+        self.assertEquals(self.cache.get('ns', 'key', loader), 'new')
+
+        engine.execute(
+            CacheVersion.__table__.update().values(version=5))
+        self.assertEquals(self.cache.get('ns', 'key', loader), 'new')
+        self.db.commit()
+        self.assertRaises(
+            StopIteration, self.cache.get, 'ns', 'key', loader)
+
+    def test_release_metadata_invalidated_on_update(self):
+        release = self.env.create_release(api=False)
+        metadata = objects.Release.get_metadata(
+            release.id, 'volumes_metadata')
+        self.assertEquals(metadata, release.volumes_metadata)
+
+        objects.Release.update(release, {'volumes_metadata': {}})
+        self.assertEquals(
+            objects.Release.get_metadata(release.id, 'volumes_metadata'),
+            {})
+
+    def test_admin_network_group_cached(self):
+        manager = self.env.network_manager
+        admin_ng = manager.get_admin_network_group()
+        with patch.object(manager, '_load_admin_network_info') as load:
+            self.assertEquals(
+                manager.get_admin_network_group_id(), admin_ng.id)
+            self.assertIs(manager.get_admin_network_group(), admin_ng)
+            self.assertFalse(load.called)
@@ -59,6 +59,46 @@ def traverse(cdict, generator_class):
     return new_dict
 
 
+def compact_vlans(vlans):
+    '''Sorts VLAN ids, removes duplicates and replaces runs of three
+    or more consecutive ids with "start-end" strings, e.g.
+    [0, 5, 100, 101, 102] -> [0, 5, "100-102"]. Joined with commas the
+    result is the VLAN list format net_probe accepts, and ids which
+    aren't in runs stay integers.
+    '''
+    result = []
+    ids = sorted(set(vlans))
+    start = 0
+    while start < len(ids):
+        end = start
+        while end + 1 < len(ids) and ids[end + 1] == ids[end] + 1:
+            end += 1
+        if end - start >= 2:
+            result.append('{0}-{1}'.format(ids[start], ids[end]))
+        else:
+            result.extend(ids[start:end + 1])
+        start = end + 1
+    return result
+
+
+def expand_vlans(vlans):
+    '''Reverse of compact_vlans: returns list of VLAN ids. Items
+    can be integers, "start-end" ranges or comma separated strings.
+    '''
+    result = []
+    for item in vlans:
+        if isinstance(item, basestring):
+            for chunk in item.split(','):
+                if '-' in chunk:
+                    left, right = chunk.split('-')
+                    result.extend(xrange(int(left), int(right) + 1))
+                else:
+                    result.append(int(chunk))
+        else:
+            result.append(item)
+    return result
+
+
 class AttributesGenerator(object):
     @classmethod
     def password(cls, arg=None):
@@ -19,12 +19,18 @@ Classes for working with disks and volumes.
 All sizes in megabytes.
 '''
 
+try:
+    from collections import OrderedDict
+except ImportError:
+    # python 2.6 or earlier use backport
+    from ordereddict import OrderedDict
 import json
 
 from copy import deepcopy
 from functools import partial
 from nailgun.errors import errors
 from nailgun.logger import logger
+from nailgun.settings import settings
 
 
 def is_service(space):
@@ -109,11 +115,16 @@ def get_node_spaces(node):
     Sets key `_allocate_size` which used only for internal calculation
     and not used in partitioning system.
     """
+    from nailgun import objects
+
     node_spaces = []
 
-    role_mapping = node.cluster.release.volumes_metadata[
-        'volumes_roles_mapping']
-    all_spaces = node.cluster.release.volumes_metadata['volumes']
+    # metadata is shared by all nodes of release,
+    # so spaces are copied before modification
+    volumes_metadata = objects.Release.get_metadata(
+        node.cluster.release_id, 'volumes_metadata')
+    role_mapping = volumes_metadata['volumes_roles_mapping']
+    all_spaces = volumes_metadata['volumes']
 
     for role in node.all_roles:
         if not role_mapping.get(role):
@@ -122,23 +133,38 @@ def get_node_spaces(node):
                    if filter_node_volumes(node, v)]
 
         for volume in volumes:
-            space = find_space_by_id(all_spaces, volume['id'])
-            if space not in node_spaces:
-                space['_allocate_size'] = get_allocate_size(node, volume)
-                node_spaces.append(space)
+            if volume['id'] in [s['id'] for s in node_spaces]:
+                continue
+            space = deepcopy(find_space_by_id(all_spaces, volume['id']))
+            space['_allocate_size'] = get_allocate_size(node, volume)
+            node_spaces.append(space)
 
     # Use role `other`
     if not node_spaces:
         logger.warn('Cannot find volumes for node: %s assigning default '
-                    'volumes' % (node.full_name))
+                    'volumes', node.full_name)
         for volume in role_mapping['other']:
-            space = find_space_by_id(all_spaces, volume['id'])
+            space = deepcopy(find_space_by_id(all_spaces, volume['id']))
             space['_allocate_size'] = get_allocate_size(node, volume)
             node_spaces.append(space)
 
     return node_spaces
 
 
+def volumes_layout_key(node):
+    """Key which identifies result of VolumeManager.gen_volumes_info
+    for a node. Generated volumes depend only on node disks and RAM,
+    node roles and cluster (release volumes metadata and storage
+    attributes), so nodes with equal keys get equal volumes.
+    """
+    return (
+        node.cluster_id,
+        tuple(sorted(node.all_roles)) if node.cluster_id else (),
+        json.dumps(node.meta.get('disks'), sort_keys=True),
+        node.meta.get('memory', {}).get('total')
+    )
+
+
 def calc_glance_cache_size(volumes):
     """Calculate glance cache size based on formula:
     10%*(/var/lib/glance) if > 5GB else 5GB
@@ -562,6 +588,42 @@ class Disk(object):
         return json.dumps(self.render(), indent=4)
 
 
+class VolumesLayoutsCache(object):
+    """LRU cache of generated volumes. Volumes generated by
+    VolumeManager.gen_volumes_info depend only on node disks,
+    RAM and allowed volumes, so a canonical fingerprint of
+    these values is used as a key and cache never becomes stale.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._layouts = OrderedDict()
+
+    def get(self, fingerprint):
+        """Returns cached layout and marks it as recently used
+        or None if there is no such layout in cache.
+        """
+        layout = self._layouts.pop(fingerprint, None)
+        if layout is not None:
+            self._layouts[fingerprint] = layout
+        return layout
+
+    def put(self, fingerprint, layout):
+        self._layouts.pop(fingerprint, None)
+        self._layouts[fingerprint] = layout
+        while len(self._layouts) > self.size:
+            self._layouts.popitem(last=False)
+
+    def clear(self):
+        self._layouts.clear()
+
+    def __len__(self):
+        return len(self._layouts)
+
+
+layouts_cache = VolumesLayoutsCache(settings.VOLUMES_LAYOUTS_CACHE_SIZE)
+
+
 class VolumeManager(object):
     def __init__(self, node):
         """Disks and volumes will be set according to node attributes.
@@ -574,6 +636,8 @@ class VolumeManager(object):
         # For swap calculation
         self.ram = node.meta['memory']['total']
         self.allowed_volumes = []
+        self._fingerprint = None
+        self._generators = self._get_generators()
 
         # If node bound to the cluster than it has a role
         # and volume groups which we should to allocate
@@ -605,15 +669,15 @@ class VolumeManager(object):
 
             self.disks.append(disk)
 
-        self.__logger('Initialized with node: %s' % node.full_name)
-        self.__logger('Initialized with volumes: %s' % self.volumes)
-        self.__logger('Initialized with disks: %s' % self.disks)
+        self.__logger('Initialized with node: %s', node.full_name)
+        self.__logger('Initialized with volumes: %s', self.volumes)
+        self.__logger('Initialized with disks: %s', self.disks)
 
     def set_volume_size(self, disk_id, volume_name, size):
         """Set size of volume
         """
-        self.__logger('Update volume size for disk=%s volume_name=%s size=%s' %
-                      (disk_id, volume_name, size))
+        self.__logger('Update volume size for disk=%s volume_name=%s size=%s',
+                      disk_id, volume_name, size)
 
         disk = filter(lambda disk: disk.id == disk_id, self.disks)[0]
 
@@ -639,7 +703,7 @@ class VolumeManager(object):
 
                 self.volumes[idx] = self.expand_generators(vg_template)
 
-        self.__logger('Updated volume size %s' % self.volumes)
+        self.__logger('Updated volume size %s', self.volumes)
         return self.volumes
 
     def get_space_type(self, volume_name):
@@ -675,7 +739,7 @@ class VolumeManager(object):
 
         return size
 
-    def call_generator(self, generator, *args):
+    def _get_generators(self):
         generators = {
             # Calculate swap space based on total RAM
             'calc_swap_size': self._calc_swap_size,
@@ -701,19 +765,20 @@ class VolumeManager(object):
         }
 
         generators['calc_os_size'] = \
-            lambda: generators['calc_root_size']() + \
-            generators['calc_swap_size']()
+            lambda: self._calc_root_size() + self._calc_swap_size()
 
         generators['calc_os_vg_size'] = generators['calc_os_size']
         generators['calc_min_os_size'] = generators['calc_os_size']
+        return generators
 
-        if generator not in generators:
+    def call_generator(self, generator, *args):
+        if generator not in self._generators:
             raise errors.CannotFindGenerator(
                 u'Cannot find generator %s' % generator)
 
-        result = generators[generator](*args)
-        self.__logger('Generator %s with args %s returned result: %s' %
-                      (generator, args, result))
+        result = self._generators[generator](*args)
+        self.__logger('Generator %s with args %s returned result: %s',
+                      generator, args, result)
         return result
 
     def _calc_root_size(self):
@@ -764,28 +829,28 @@ class VolumeManager(object):
 
     def _allocate_all_free_space_for_volume(self, volume_info):
         """Allocate all existing space on all disks."""
-        self.__logger('Allocate all free space for volume %s ' % (volume_info))
+        self.__logger('Allocate all free space for volume %s ', volume_info)
 
         for disk in self.disks:
             if disk.free_space > 0:
                 self.__logger('Allocating all available space for volume: '
-                              'disk: %s volume: %s' %
-                              (disk.id, volume_info))
+                              'disk: %s volume: %s',
+                              disk.id, volume_info)
                 self._get_allocator(disk, volume_info)(volume_info)
             else:
                 self.__logger('Not enough free space for volume '
-                              'allocation: disk: %s volume: %s' %
-                              (disk.id, volume_info))
+                              'allocation: disk: %s volume: %s',
+                              disk.id, volume_info)
                 self._get_allocator(disk, volume_info)(volume_info, 0)
 
     def _allocate_size_for_volume(self, volume_info, size):
         """Allocate volumes with particaular size."""
-        self.__logger('Allocate volume %s with size %s ' % (volume_info, size))
+        self.__logger('Allocate volume %s with size %s ', volume_info, size)
 
         not_allocated_size = size
         for disk in self.disks:
-            self.__logger('Creating volume: disk: %s, vg: %s' %
-                          (disk.id, volume_info))
+            self.__logger('Creating volume: disk: %s, vg: %s',
+                          disk.id, volume_info)
 
             if disk.free_space >= not_allocated_size:
                 # if we can allocate all required size
@@ -804,7 +869,7 @@ class VolumeManager(object):
 
     def _allocate_full_disk(self, volume_info):
         """Allocate full disks for a volume."""
-        self.__logger('Allocate full disk for volume %s ' % (volume_info))
+        self.__logger('Allocate full disk for volume %s ', volume_info)
 
         for disk in self.disks:
             existing_volumes = [v for v in disk.volumes if not is_service(v)
@@ -824,7 +889,40 @@ class VolumeManager(object):
         elif volume_info['type'] == 'raid':
             return partial(disk.create_partition, ptype='raid')
 
+    @property
+    def fingerprint(self):
+        """Canonical representation of all values which
+        generated volumes depend on.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = json.dumps({
+                'disks': [(d.id, d.name, d.size, d.extra)
+                          for d in self.disks],
+                'ram': self.ram,
+                'allowed_volumes': self.allowed_volumes,
+            }, sort_keys=True)
+        return self._fingerprint
+
     def gen_volumes_info(self):
+        cached = layouts_cache.get(self.fingerprint)
+        if cached is not None:
+            self.__logger('Using cached volumes info for node')
+            self._restore_layout(cached)
+            return deepcopy(cached)
+
+        volumes = self._gen_volumes_info()
+        layouts_cache.put(self.fingerprint, deepcopy(volumes))
+        return volumes
+
+    def _restore_layout(self, volumes):
+        """Set disks state as if layout has been generated
+        """
+        self.volumes = deepcopy(volumes)
+        for disk, rendered in zip(self.disks, only_disks(self.volumes)):
+            disk.volumes = rendered['volumes']
+            disk.free_space = rendered['free_space']
+
+    def _gen_volumes_info(self):
         self.__logger('Generating volumes info for node')
         self.__logger('Purging volumes info for all node disks')
 
@@ -832,7 +930,7 @@ class VolumeManager(object):
         self.volumes = [d.render() for d in self.disks]
 
         if not self.allowed_volumes:
-            self.__logger('Role is None return volumes: %s' % self.volumes)
+            self.__logger('Role is None return volumes: %s', self.volumes)
             return self.volumes
 
         self.volumes.extend(only_vg(self.allowed_volumes))
@@ -864,7 +962,7 @@ class VolumeManager(object):
                 self._all_size_volumes[-1])
 
         self.volumes = self.expand_generators(self.volumes)
-        self.__logger('Generated volumes: %s' % self.volumes)
+        self.__logger('Generated volumes: %s', self.volumes)
         return self.volumes
 
     @property
@@ -899,8 +997,8 @@ class VolumeManager(object):
                 genval = self.call_generator(
                     generator, *generator_args)
                 self.__logger(
-                    'Generator {0} with args {1} expanded to: {2}'.format(
-                        generator, generator_args, genval))
+                    'Generator %s with args %s expanded to: %s',
+                    generator, generator_args, genval)
                 return genval
             else:
                 return dict((k, self.expand_generators(v))
@@ -918,8 +1016,8 @@ class VolumeManager(object):
         disks_space = sum([d.size for d in self.disks])
         minimal_installation_size = self.__calc_minimal_installation_size()
 
-        self.__logger('Checking disks space: disks space %s, minimal size %s' %
-                      (disks_space, minimal_installation_size))
+        self.__logger('Checking disks space: disks space %s, minimal size %s',
+                      disks_space, minimal_installation_size)
 
         if disks_space < minimal_installation_size:
             raise errors.NotEnoughFreeSpace()
@@ -952,5 +1050,6 @@ class VolumeManager(object):
 
         return min_installation_size
 
-    def __logger(self, message):
-        logger.debug('VolumeManager %s: %s', id(self), message)
+    def __logger(self, message, *args):
+        # arguments are formatted by logger only if debug is enabled
+        logger.debug('VolumeManager %s: ' + message, id(self), *args)
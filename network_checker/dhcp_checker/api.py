@@ -14,6 +14,7 @@
 
 import itertools
 import logging
+import select
 import time
 
 from scapy import config as scapy_config
@@ -28,6 +29,10 @@ from scapy import all as scapy
 
 LOG = logging.getLogger(__name__)
 
+# Once some answers were got, they are collected until
+# there are no new ones during this period (in seconds)
+QUIET_PERIOD = 1
+
 
 def _get_dhcp_discover_message(iface):
 
@@ -50,20 +55,16 @@ def _get_dhcp_discover_message(iface):
     return dhcp_discover
 
 
-@utils.single_format
 def check_dhcp_on_eth(iface, timeout):
     """Check if there is roque dhcp server in network on given iface
         @iface - name of the ethernet interface
-        @timeout - scapy timeout for waiting on response
+        @timeout - max time to wait for responses
     >>> check_dhcp_on_eth('eth1')
     """
-    scapy.conf.iface = iface
-    scapy.conf.checkIPaddr = False
-    dhcp_discover = _get_dhcp_discover_message(iface)
-    ans, unans = scapy.srp(dhcp_discover, multi=True,
-                           nofilter=1, timeout=timeout, verbose=0)
-
-    return ans
+    listeners = make_listeners((iface,))
+    send_dhcp_discover(iface)
+    return [utils.format_answer(pkt, name)
+            for pkt, name in collect_answers(listeners, timeout)]
 
 
 def check_dhcp(ifaces, timeout=5, repeat=2):
@@ -90,6 +91,7 @@ def make_listeners(ifaces):
         try:
             listener = pcap.pcap(iface)
             listener.setfilter('dst port 68')
+            listener.setnonblock(True)
             listeners.append(listener)
         except Exception:
             LOG.warning(
@@ -97,10 +99,43 @@ def make_listeners(ifaces):
     return listeners
 
 
+def collect_answers(listeners, timeout, quiet_period=QUIET_PERIOD):
+    """Wait for packets on all listeners at once and yield them
+    as soon as they arrive.
+    Stops after timeout, or earlier, when some answers were got
+    and there were no new ones during quiet_period. Most vlans
+    usually have no dhcp server, so all listeners are not waited for.
+    @listeners - pcap listeners
+    @timeout - max time to wait for answers
+    @quiet_period - time to wait for more answers
+    :returns: generator of (scapy packet, iface name) pairs
+    """
+    listeners_by_fd = dict((l.fileno(), l) for l in listeners)
+    deadline = time.time() + timeout
+    last_answer_at = None
+
+    while listeners_by_fd:
+        now = time.time()
+        wait = deadline - now
+        if last_answer_at is not None:
+            wait = min(wait, last_answer_at + quiet_period - now)
+        if wait <= 0:
+            break
+
+        ready, _, _ = select.select(listeners_by_fd.keys(), [], [], wait)
+        for fd in ready:
+            listener = listeners_by_fd[fd]
+            for ts, pkt in listener.readpkts():
+                last_answer_at = time.time()
+                yield scapy.Ether(pkt), listener.name
+
+
 @utils.filter_duplicated_results
 def check_dhcp_with_vlans(config, timeout=5, repeat=2):
     """Provide config of {iface: [vlans..]} pairs
     @config - {'eth0': (100, 101), 'eth1': (100, 102)}
+    Discovers are sent on all ifaces and vlans at once, and
+    answers are read from all listeners as they arrive.
     """
     # vifaces - list of pairs ('eth0', ['eth0.100', 'eth0.101'])
     with utils.VlansContext(config) as vifaces:
@@ -110,24 +145,16 @@ def check_dhcp_with_vlans(config, timeout=5, repeat=2):
         for i in utils.filtered_ifaces(itertools.chain(ifaces, *vlans)):
             send_dhcp_discover(i)
 
-        time.sleep(timeout)
-
-        for l in listeners:
-            for pkt in l.readpkts():
-                yield utils.format_answer(scapy.Ether(pkt[1]), l.name)
+        for pkt, iface in collect_answers(listeners, timeout):
+            yield utils.format_answer(pkt, iface)
 
 
-@utils.single_format
 def check_dhcp_request(iface, server, range_start, range_end, timeout=5):
     """Provide interface, server endpoint and pool of ip adresses
         Should be used after offer received
         >>> check_dhcp_request('eth1','10.10.0.5','10.10.0.10','10.10.0.15')
     """
 
-    scapy.conf.iface = iface
-
-    scapy.conf.checkIPaddr = False
-
     fam, hw = scapy.get_if_raw_hwaddr(iface)
 
     ip_address = next(utils.pick_ip(range_start, range_end))
@@ -141,6 +168,7 @@ def check_dhcp_request(iface, server, range_start, range_end, timeout=5):
                                         ("server_id", server),
                                         ("requested_addr", ip_address),
                                         "end"]))
-    ans, unans = scapy.srp(dhcp_request, nofilter=1, multi=True,
-                           timeout=timeout, verbose=0)
-    return ans
+    listeners = make_listeners((iface,))
+    scapy.sendp(dhcp_request, iface=iface, verbose=0)
+    return [utils.format_answer(pkt, name)
+            for pkt, name in collect_answers(listeners, timeout)]
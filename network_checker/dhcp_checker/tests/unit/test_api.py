@@ -13,8 +13,10 @@
 #    under the License.
 
 import os
+import time
 import unittest
 
+from mock import call
 from mock import patch
 from scapy import all as scapy
 
@@ -43,6 +45,36 @@ expected_response = {
 }
 
 
+LINKS = {
+    'eth0': (None, None, True),
+    'eth1': (None, None, True),
+    'eth2': (None, None, True),
+}
+
+
+class FakeListener(object):
+    """Pcap listener which returns given packets once
+    """
+    fds = iter(xrange(1000, 2000))
+
+    def __init__(self, name, packets):
+        self.name = name
+        self.packets = packets
+        self.fd = next(self.fds)
+
+    def fileno(self):
+        return self.fd
+
+    def readpkts(self):
+        packets, self.packets = self.packets, []
+        return [(0, pkt) for pkt in packets]
+
+
+def select_all(rlist, wlist, xlist, timeout):
+    time.sleep(min(timeout, 0.01))
+    return rlist, [], []
+
+
 class TestDhcpApi(unittest.TestCase):
 
     def setUp(self):
@@ -51,37 +83,102 @@ class TestDhcpApi(unittest.TestCase):
                                                          'dhcp.pcap')))
         self.dhcp_response = self.scapy_data[1:]
 
-    @patch('dhcp_checker.api.scapy.srp')
-    @patch('dhcp_checker.api.scapy.get_if_raw_hwaddr')
-    def test_check_dhcp_on_eth(self, raw_hwaddr, srp_mock):
-        raw_hwaddr.return_value = ('111', '222')
-        srp_mock.return_value = ([self.dhcp_response], [])
+    @patch('dhcp_checker.api.QUIET_PERIOD', 0)
+    @patch('dhcp_checker.api.select.select', side_effect=select_all)
+    @patch('dhcp_checker.api.send_dhcp_discover')
+    @patch('dhcp_checker.api.make_listeners')
+    def test_check_dhcp_on_eth(self, make_listeners, send_discover, _):
+        make_listeners.return_value = [
+            FakeListener('eth1', [str(self.dhcp_response[1])])]
         response = api.check_dhcp_on_eth('eth1', timeout=5)
         self.assertEqual([expected_response], response)
+        make_listeners.assert_called_once_with(('eth1',))
+        send_discover.assert_called_once_with('eth1')
 
-    @patch('dhcp_checker.api.scapy.srp')
+    @patch('dhcp_checker.api.send_dhcp_discover')
+    @patch('dhcp_checker.api.make_listeners')
+    def test_check_dhcp_on_eth_empty_response(
+            self, make_listeners, send_discover):
+        make_listeners.return_value = [FakeListener('eth1', [])]
+        with patch('dhcp_checker.api.select.select',
+                   return_value=([], [], [])) as select_mock:
+            response = api.check_dhcp_on_eth('eth1', timeout=0.01)
+        self.assertEqual([], response)
+        self.assertTrue(select_mock.called)
+
+    @patch('dhcp_checker.api.QUIET_PERIOD', 0)
+    @patch('dhcp_checker.api.select.select', side_effect=select_all)
+    @patch('dhcp_checker.api.scapy.sendp')
     @patch('dhcp_checker.api.scapy.get_if_raw_hwaddr')
-    def test_check_dhcp_on_eth_empty_response(self, raw_hwaddr, srp_mock):
+    @patch('dhcp_checker.api.make_listeners')
+    def test_check_dhcp_request(
+            self, make_listeners, raw_hwaddr, sendp, _):
         raw_hwaddr.return_value = ('111', '222')
-        srp_mock.return_value = ([], [])
-        response = api.check_dhcp_on_eth('eth1', timeout=5)
-        self.assertEqual([], response)
+        make_listeners.return_value = [
+            FakeListener('eth1', [str(self.dhcp_response[1])])]
+        response = api.check_dhcp_request(
+            'eth1', '10.20.0.2', '10.20.0.10', '10.20.0.20', timeout=5)
+        self.assertEqual([expected_response], response)
+        self.assertEqual(sendp.call_count, 1)
+
+    @patch('dhcp_checker.api.select.select', side_effect=select_all)
+    def test_collect_answers_stops_after_quiet_period(self, _):
+        offer = str(self.dhcp_response[1])
+        listeners = [
+            FakeListener('eth1', [offer, offer]),
+            FakeListener('eth2', [offer])]
+        started_at = time.time()
+        answers = list(api.collect_answers(
+            listeners, timeout=5, quiet_period=0.1))
+        self.assertLess(time.time() - started_at, 1)
+        self.assertEqual(
+            sorted(iface for pkt, iface in answers),
+            ['eth1', 'eth1', 'eth2'])
+        self.assertEqual(str(answers[0][0]), offer)
 
+    @patch('dhcp_checker.api.select.select', side_effect=select_all)
+    def test_collect_answers_does_not_wait_for_silent_listeners(self, _):
+        listeners = [
+            FakeListener('eth1', [str(self.dhcp_response[1])]),
+            FakeListener('eth2', [])]
+        started_at = time.time()
+        answers = list(api.collect_answers(
+            listeners, timeout=5, quiet_period=0.1))
+        self.assertLess(time.time() - started_at, 1)
+        self.assertEqual([iface for pkt, iface in answers], ['eth1'])
+
+    @patch('dhcp_checker.api.select.select', side_effect=select_all)
+    def test_collect_answers_waits_timeout_without_answers(self, _):
+        listeners = [FakeListener('eth1', []), FakeListener('eth2', [])]
+        started_at = time.time()
+        answers = list(api.collect_answers(
+            listeners, timeout=0.3, quiet_period=0.01))
+        self.assertGreaterEqual(time.time() - started_at, 0.3)
+        self.assertEqual(answers, [])
+
+    @patch('dhcp_checker.utils.links.ip_batch')
+    @patch('dhcp_checker.utils.links.dump_links', return_value=(LINKS, []))
     @patch('dhcp_checker.api.send_dhcp_discover')
     @patch('dhcp_checker.api.make_listeners')
     def test_check_dhcp_with_multiple_ifaces(
-            self, make_listeners, send_discover):
+            self, make_listeners, send_discover, _, ip_batch):
         api.check_dhcp(['eth1', 'eth2'])
+        ip_batch.assert_has_calls([call([]), call([])])
         make_listeners.assert_called_once_with(('eth2', 'eth1'))
         self.assertEqual(send_discover.call_count, 2)
 
+    @patch('dhcp_checker.utils.links.ip_batch')
+    @patch('dhcp_checker.utils.links.dump_links', return_value=(LINKS, []))
     @patch('dhcp_checker.api.send_dhcp_discover')
     @patch('dhcp_checker.api.make_listeners')
-    def test_check_dhcp_with_vlans(self, make_listeners, send_discover):
+    def test_check_dhcp_with_vlans(
+            self, make_listeners, send_discover, _, ip_batch):
         config_sample = {
             'eth0': (100, 101),
             'eth1': (100, 102)
         }
         api.check_dhcp_with_vlans(config_sample, timeout=1)
         make_listeners.assert_called_once_with(('eth1', 'eth0'))
+        # created vlan ifaces are not in links dump, so they are skipped
         self.assertEqual(send_discover.call_count, 2)
+        self.assertEqual(len(ip_batch.call_args_list[0][0][0]), 8)
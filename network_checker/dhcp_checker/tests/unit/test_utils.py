@@ -20,6 +20,7 @@ import unittest
 from scapy import all as scapy
 
 from dhcp_checker import utils
+from net_check import links
 
 IP_LINK_SHOW_UP = (
     "2: eth0: <BROADCAST,MULTICAST,UP,LOWER_UP>"
@@ -29,6 +30,21 @@ IP_LINK_SHOW_UP = (
 
 IP_LINK_SHOW_DOES_NOT_EXIST = 'Device "eth2" does not exist.'
 
+IP_LINK_DUMP = (
+    "1: lo: <LOOPBACK,UP,LOWER_UP> mtu 65536 qdisc noqueue state UNKNOWN "
+    "mode DEFAULT group default\\    link/loopback 00:00:00:00:00:00\n"
+    "2: eth0: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 qdisc pfifo_fast "
+    "state UP mode DEFAULT group default qlen 1000\\    link/ether "
+    "52:54:00:12:34:56 brd ff:ff:ff:ff:ff:ff promiscuity 0\n"
+    "3: eth1: <BROADCAST,MULTICAST> mtu 1500 qdisc noop state DOWN "
+    "mode DEFAULT group default qlen 1000\\    link/ether "
+    "52:54:00:12:34:57 brd ff:ff:ff:ff:ff:ff promiscuity 0\n"
+    "4: vlan100@eth0: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 qdisc "
+    "noqueue state UP mode DEFAULT group default\\    link/ether "
+    "52:54:00:12:34:56 brd ff:ff:ff:ff:ff:ff promiscuity 0 \\    vlan "
+    "protocol 802.1Q id 100 <REORDER_HDR> addrgenmode eui64\n"
+)
+
 expected_response = {
     'dport': 67,
     'gateway': '172.18.194.2',
@@ -132,6 +148,27 @@ class TestMultiprocMap(unittest.TestCase):
         self.assertEqual(rkwargs, {})
 
 
+@patch('dhcp_checker.utils.links.ip_batch')
+@patch('dhcp_checker.utils.links.dump_links',
+       return_value=(links.parse_links(IP_LINK_DUMP.splitlines()), []))
+class TestLinksHelpers(unittest.TestCase):
+
+    def test_filtered_ifaces(self, dump_links, ip_batch):
+        self.assertEqual(
+            list(utils.filtered_ifaces(['eth0', 'eth1', 'eth2', 'vlan100'])),
+            ['eth0', 'vlan100'])
+        self.assertEqual(dump_links.call_count, 1)
+
+    def test_vlans_context(self, dump_links, ip_batch):
+        with utils.VlansContext({'eth0': (0, 100, 101)}) as vifaces:
+            self.assertEqual(vifaces, [('eth0', ['vlan100', 'eth0.101'])])
+            ip_batch.assert_called_once_with([
+                'link add link eth0 name eth0.101 type vlan id 101',
+                'link set dev eth0.101 up'])
+        ip_batch.assert_called_with(['link del dev eth0.101'])
+        self.assertEqual(ip_batch.call_count, 2)
+
+
 @patch('dhcp_checker.utils._iface_state')
 @patch('dhcp_checker.utils.command_util')
 class TestIfaceStateHelper(unittest.TestCase):
@@ -18,6 +18,8 @@ import sys
 
 from scapy import all as scapy
 
+from net_check import links
+
 
 def command_util(*command):
     """object with stderr and stdout
@@ -58,11 +60,12 @@ def check_iface_exist(iface):
 
 
 def filtered_ifaces(ifaces):
+    state, _ = links.dump_links()
     for iface in ifaces:
-        if not check_iface_exist(iface):
+        if iface not in state:
             sys.stderr.write('Iface {0} does not exist.'.format(iface))
         else:
-            if not check_network_up(iface):
+            if not links.is_up(state, iface):
                 sys.stderr.write('Network for iface {0} is down.'.format(
                     iface))
             else:
@@ -159,24 +162,45 @@ def filter_duplicated_results(func):
 
 class VlansContext(object):
     """Contains all logic to manage vlans
+    Missing vlan ifaces are created and brought up on enter and
+    removed on exit, both with one `ip -batch` call
     """
 
     def __init__(self, config):
         """Initialize VlansContext
-        @config - list or tuple of (iface, vlan) pairs
+        @config - {iface: vlans} dict
         """
         self.config = config
+        self.created = []
 
     def __enter__(self):
+        state, _ = links.dump_links()
+        existing = links.vlan_links(state)
+        result = []
         for iface, vlans in self.config.iteritems():
+            iface = str(iface)
             vifaces = []
             for vlan in vlans:
                 if vlan > 0:
-                    vifaces.append('{0}.{1}'.format(iface, vlan))
-            yield str(iface), vifaces
+                    viface = existing.get((iface, vlan))
+                    if viface is None:
+                        viface = '{0}.{1}'.format(iface, vlan)
+                        existing[(iface, vlan)] = viface
+                        self.created.append((iface, vlan, viface))
+                    vifaces.append(viface)
+            result.append((iface, vifaces))
+
+        links.ip_batch(
+            ['link add link {0} name {2} type vlan id {1}'.format(*viface)
+             for viface in self.created] +
+            ['link set dev {2} up'.format(*viface)
+             for viface in self.created])
+        return result
 
     def __exit__(self, type, value, trace):
-        pass
+        links.ip_batch(['link del dev {2}'.format(*viface)
+                        for viface in self.created])
+        self.created = []
 
 
 class IfaceState(object):
@@ -19,14 +19,13 @@
 # Analyse dumps for packets with special cookie in UDP payload.
 #
 import argparse
-import functools
 import json
 import logging
 import logging.handlers
 import os
-import re
 import signal
 import socket
+import struct
 import subprocess
 import sys
 import threading
@@ -38,11 +37,23 @@ from scapy import config as scapy_config
 
 import pcap
 
+from net_check import links
+
 scapy_config.logLevel = 40
 scapy_config.use_pcap = True
 import scapy.all as scapy
 
 
+ETH_P_IP = 0x0800
+ETH_P_8021Q = 0x8100
+IPPROTO_UDP = 17
+
+_ETHERTYPE = struct.Struct('!H')
+_VLAN_TAG = struct.Struct('!HH')
+_IP_HEADER = struct.Struct('!BxxxxxHxB')
+_UDP_LENGTH = struct.Struct('!H')
+
+
 class ActorFabric(object):
     @classmethod
     def getInstance(cls, config):
@@ -78,7 +89,6 @@ class Actor(object):
         self.logger.debug("Running with config: %s", json.dumps(self.config))
         self._execute(["modprobe", "8021q"])
         self.iface_down_after = {}
-        self.viface_remove_after = {}
 
     def _define_logger(self, filename=None,
                        appname='netprobe', level=logging.DEBUG):
@@ -120,159 +130,66 @@ class Actor(object):
             )
         return output.split('\n')
 
-    def _viface_by_iface_vid(self, iface, vid):
-        return (self._try_viface_create(iface, vid) or "%s.%d" % (iface, vid))
-
-    def _iface_name(self, iface, vid=None):
-        if vid:
-            return self._viface_by_iface_vid(iface, vid)
-        return iface
-
-    def _look_for_link(self, iface, vid=None):
-        viface = None
-        if vid:
-            viface = self._viface_by_iface_vid(iface, vid)
-
-        command = ['ip', 'link']
-        r = re.compile(ur"(\d+?):\s+((?P<viface>[^:@]+)@)?(?P<iface>[^:]+?):"
-                       ".+?(?P<state>UP|DOWN|UNKNOWN).*$")
-        for line in self._execute(command):
-            m = r.search(line)
-            if m:
-                md = m.groupdict()
-                if (iface == md.get('iface') and
-                        viface == md.get('viface') and md.get('state')):
-                    return (iface, viface, md.get('state'))
-        # If we are here we aren't able to say if iface with vid is up
-        raise ActorException(
-            self.logger,
-            "Cannot find interface %s with vid=%s" % (iface, vid)
-        )
-
-    def _try_iface_up(self, iface, vid=None):
-        if vid and not self._try_viface_create(iface, vid):
-            # if viface does not exist we raise exception
-            raise ActorException(
-                self.logger,
-                "Vlan %s on interface %s does not exist" % (str(vid), iface)
-            )
-
-        self.logger.debug("Checking if interface %s with vid %s is up",
-                          iface, str(vid))
-        _, _, state = self._look_for_link(iface, vid)
-        return (state == 'UP')
+    def _dump_links(self, prefix):
+        """Reads state of all links with one `ip` call and logs it
+            :returns: dict as returned by links.parse_links
+        """
+        state, lines = links.dump_links()
+        self.logger.debug("%s: ", prefix)
+        for line in lines:
+            self.logger.debug(line.rstrip())
+        return state
 
-    def _iface_up(self, iface, vid=None):
-        """Brings interface with vid up
+    def _execute_batch(self, commands):
+        """Applies `ip` commands with one `ip -batch` call
         """
-        if vid and not self._try_viface_create(iface, vid):
-            # if viface does not exist we raise exception
+        if commands:
+            self.logger.debug("Running %d ip commands in batch",
+                              len(commands))
+            errors = links.ip_batch(commands)
+            if errors:
+                self.logger.debug(errors.rstrip())
+
+    def _ensure_ifaces_up(self, ifaces):
+        """Ensures that interfaces are up. Interfaces are brought up
+        in bulk and checked with one dump of links. Interfaces which
+        were down are marked to be brought down after probing.
+        """
+        state = self._dump_links("Interfaces just before bringing them up")
+        commands = []
+        for iface in sorted(set(ifaces)):
+            if not links.is_up(state, iface):
+                commands.append("link set dev %s up" % iface)
+                self.iface_down_after[iface] = True
+        if not commands:
+            return
+
+        self._execute_batch(commands)
+        state = self._dump_links("Interfaces just after bringing them up")
+        failed = [iface for iface in sorted(self.iface_down_after)
+                  if not links.is_up(state, iface)]
+        if failed:
             raise ActorException(
                 self.logger,
-                "Vlan %s on interface %s does not exist" % (str(vid), iface)
+                "Can not bring interfaces up: %s" % ", ".join(failed)
             )
 
-        set_iface = self._iface_name(iface, vid)
-
-        self.logger.debug("Brining interface %s with vid %s up",
-                          set_iface, str(vid))
-        self._execute([
-            "ip",
-            "link", "set",
-            "dev", set_iface,
-            "up"])
-
-    def _ensure_iface_up(self, iface, vid=None):
-        """Ensures interface is with vid up.
-        """
-        if not self._try_iface_up(iface, vid):
-            # if iface is not up we try to bring it up
-            self._iface_up(iface, vid)
-            if self._try_iface_up(iface, vid):
-                # if iface was down and we have brought it up
-                # we should mark it to be brought down after probing
-                self.iface_down_after[self._iface_name(iface, vid)] = True
-            else:
-                # if viface is still down we raise exception
-                raise ActorException(
-                    self.logger,
-                    "Can not bring interface %s with vid %s up" % (iface,
-                                                                   str(vid))
-                )
-
-    def _ensure_iface_down(self, iface, vid=None):
-        set_iface = self._iface_name(iface, vid)
-        if self.iface_down_after.get(set_iface, False):
-            # if iface with vid have been marked to be brought down
-            # after probing we try to bring it down
-            self.logger.debug("Brining down interface %s with vid %s",
-                              iface, str(vid))
-            self._execute([
-                "ip",
-                "link", "set",
-                "dev", set_iface,
-                "down"])
-            self.iface_down_after.pop(set_iface)
-
-    def _try_viface_create(self, iface, vid):
-        """Tries to find vlan interface on iface with VLAN_ID=vid and return it
-            :returns: name of vlan interface if it exists or None
-        """
-        self.logger.debug("Checking if vlan %s on interface %s exists",
-                          str(vid), iface)
-        with open("/proc/net/vlan/config", "r") as f:
-            for line in f:
-                m = re.search(ur'(.+?)\s+\|\s+(.+?)\s+\|\s+(.+?)\s*$', line)
-                if m and m.group(2) == str(vid) and m.group(3) == iface:
-                    return m.group(1)
-
-    def _viface_create(self, iface, vid):
-        """Creates VLAN interface with VLAN_ID=vid on interface iface
-            :returns: None
-        """
-        self.logger.debug("Creating vlan %s on interface %s", str(vid), iface)
-        self._execute([
-            "ip",
-            "link", "add",
-            "link", iface,
-            "name", self._viface_by_iface_vid(iface, vid),
-            "type", "vlan",
-            "id", str(vid)])
-
-    def _ensure_viface_create(self, iface, vid):
-        """Ensures that vlan interface exists. If it does not already
-        exist, then we need it to be created. It also marks newly created
-        vlan interface to remove it after probing procedure.
+    def _ensure_ifaces_restored(self):
+        """Brings down interfaces which were brought up by
+        _ensure_ifaces_up, in bulk as well.
         """
-        if not self._try_viface_create(iface, vid):
-            # if viface does not exist we try to create it
-            self._viface_create(iface, vid)
-            if self._try_viface_create(iface, vid):
-                # if viface had not existed and have been created
-                # we mark it to be removed after probing procedure
-                self.viface_remove_after[
-                    self._viface_by_iface_vid(iface, vid)
-                ] = True
-            else:
-                # if viface had not existed and still does not
-                # we raise exception
-                raise ActorException(
-                    self.logger,
-                    "Can not create vlan %d on interface %s" % (vid, iface)
-                )
-
-    def _ensure_viface_remove(self, iface, vid):
-        viface = self._viface_by_iface_vid(iface, vid)
-        if self.viface_remove_after.get(viface, False):
-            # if viface have been marked to be removed after probing
-            # we try to remove it
-            self.logger.debug("Removing vlan %s on interface %s",
-                              str(vid), iface)
-            self._execute([
-                "ip",
-                "link", "del",
-                "dev", viface])
-            self.viface_remove_after.pop(viface)
+        commands = ["link set dev %s down" % iface
+                    for iface in sorted(self.iface_down_after)]
+        if commands:
+            self._execute_batch(commands)
+            state = self._dump_links(
+                "Interfaces just after ensuring them down")
+            left = [iface for iface in sorted(self.iface_down_after)
+                    if links.is_up(state, iface)]
+            if left:
+                self.logger.warning("Can not bring interfaces down: %s",
+                                    ", ".join(left))
+        self.iface_down_after.clear()
 
     def _parse_vlan_list(self, vlan_string):
         self.logger.debug("Parsing vlan list: %s", vlan_string)
@@ -300,14 +217,6 @@ class Actor(object):
         self.logger.debug("Parsed vlans: %s", str(vlan_list))
         return vlan_list
 
-    def _ensure_viface_create_and_up(self, iface, vid):
-        self._ensure_viface_create(iface, vid)
-        self._ensure_iface_up(iface, vid)
-
-    def _ensure_viface_down_and_remove(self, iface, vid):
-        self._ensure_iface_down(iface, vid)
-        self._ensure_viface_remove(iface, vid)
-
     def _iface_vlan_iterator(self):
         for iface, vlan_list in self.config['interfaces'].iteritems():
             # Variables iface and vlan_list are getted from decoded JSON
@@ -324,11 +233,6 @@ class Actor(object):
         for iface in self.config['interfaces']:
             yield iface
 
-    def _log_ifaces(self, prefix="Current interfaces"):
-        self.logger.debug("%s: ", prefix)
-        for line in self._execute(['ip', 'address']):
-            self.logger.debug(line.rstrip())
-
 
 class Sender(Actor):
 
@@ -337,7 +241,6 @@ class Sender(Actor):
                                           'netprobe_sender')
         super(Sender, self).__init__(config)
         self.logger.info("=== Starting Sender ===")
-        self._log_ifaces("Interfaces just before sending probing packages")
 
     def run(self):
         try:
@@ -352,8 +255,9 @@ class Sender(Actor):
             return address.read().strip('\n')
 
     def _run(self):
-        for iface, vlan in self._iface_vlan_iterator():
-            self._ensure_iface_up(iface)
+        iface_vlans = list(self._iface_vlan_iterator())
+        self._ensure_ifaces_up(iface for iface, _ in iface_vlans)
+        for iface, vlan in iface_vlans:
             data = str(''.join((self.config['cookie'], iface, ' ',
                        self.config['uid'])))
             self.logger.debug("Sending packets: iface=%s vlan=%s",
@@ -375,21 +279,72 @@ class Sender(Actor):
             except socket.error as e:
                 self.logger.error("Socket error: %s, %s", e, iface)
 
-        self._log_ifaces("Interfaces just after sending probing packages")
-        for iface in self._iface_iterator():
-            self._ensure_iface_down(iface)
-        self._log_ifaces("Interfaces just after ensuring them down in sender")
+        self._ensure_ifaces_restored()
         self.logger.info("=== Sender Finished ===")
 
 
+def decode_probe_frame(frame, cookie):
+    """Get vlan and message of probe frame from its raw bytes.
+
+    Ethernet frames with at most one 802.1Q tag which carry
+    unfragmented IPv4 UDP datagrams are decoded with fixed offsets,
+    and cookie is checked before payload is copied. Other frames
+    are decoded by scapy.
+
+    :param frame: raw frame as returned by pcap
+    :param cookie: prefix of probe messages
+    :returns: (vlan, message) tuple or None if frame is not a probe
+    """
+    try:
+        ethertype, = _ETHERTYPE.unpack_from(frame, 12)
+        vlan = 0
+        offset = 14
+        if ethertype == ETH_P_8021Q:
+            tci, ethertype = _VLAN_TAG.unpack_from(frame, offset)
+            vlan = tci & 0x0fff
+            offset += 4
+        if ethertype != ETH_P_IP:
+            return _decode_probe_frame_with_scapy(frame, cookie)
+
+        version_ihl, fragment, protocol = _IP_HEADER.unpack_from(
+            frame, offset)
+        header_len = (version_ihl & 0x0f) * 4
+        if version_ihl >> 4 != 4 or header_len < 20 or fragment & 0x3fff:
+            return _decode_probe_frame_with_scapy(frame, cookie)
+        if protocol != IPPROTO_UDP:
+            return None
+
+        offset += header_len
+        udp_len, = _UDP_LENGTH.unpack_from(frame, offset + 4)
+    except struct.error:
+        return _decode_probe_frame_with_scapy(frame, cookie)
+
+    offset += 8
+    if not frame.startswith(cookie, offset):
+        return None
+    return vlan, frame[offset:offset + udp_len - 8]
+
+
+def _decode_probe_frame_with_scapy(frame, cookie):
+    p = scapy.Ether(frame)
+    if scapy.UDP not in p:
+        return None
+    if scapy.Dot1Q in p:
+        vlan = p[scapy.Dot1Q].vlan
+    else:
+        vlan = 0
+    message = str(p[scapy.UDP].payload)[:p[scapy.UDP].len - 8]
+    if not message.startswith(cookie):
+        return None
+    return vlan, message
+
+
 class Listener(Actor):
     def __init__(self, config=None):
         self.logger = self._define_logger('/root/netprobe_listener.log',
                                           'netprobe_listener')
         super(Listener, self).__init__(config)
         self.logger.info("=== Starting Listener ===")
-        self._log_ifaces("Interfaces just before starting listerning "
-                         "for probing packages")
 
         self.pidfile = self.addpid('/var/run/net_probe')
 
@@ -423,8 +378,9 @@ class Listener(Actor):
             t.start()
             return t
 
-        for iface, vlan in self._iface_vlan_iterator():
-            self._ensure_iface_up(iface)
+        ifaces = [iface for iface, _ in self._iface_vlan_iterator()]
+        self._ensure_ifaces_up(ifaces)
+        for iface in ifaces:
             if iface not in sniffers:
                 run_listener_thread(iface)
                 run_listener_thread(iface, vlan=True)
@@ -460,35 +416,27 @@ class Listener(Actor):
         except SystemExit:
             self.logger.debug("TERM signal catched")
 
-        self._log_ifaces("Interfaces just before ensuring interfaces down")
-
-        for iface in self._iface_iterator():
-            self._ensure_iface_down(iface)
-        self._log_ifaces(
-            "Interfaces just after ensuring them down in listener")
+        self._ensure_ifaces_restored()
 
         with open(self.config['dump_file'], 'w') as fo:
             fo.write(json.dumps(self.neighbours))
         os.unlink(self.pidfile)
         self.logger.info("=== Listener Finished ===")
 
-    def fprn(self, p, iface):
-
-        if scapy.Dot1Q in p:
-            vlan = p[scapy.Dot1Q].vlan
-        else:
-            vlan = 0
-
-        self.logger.debug("Catched packet: vlan=%s len=%s payload=%s",
-                          str(vlan), p[scapy.UDP].len, p[scapy.UDP].payload)
-        received_msg, _ = p[scapy.UDP].extract_padding(p[scapy.UDP].load)
-        decoded_msg = received_msg.decode()
-        riface, uid = decoded_msg[len(self.config["cookie"]):].split(' ', 1)
-
-        self.neighbours[iface].setdefault(vlan, {})
+    def add_neighbour(self, iface, vlan, message):
+        try:
+            riface, uid = message[len(self.config["cookie"]):].decode(
+            ).split(' ', 1)
+        except ValueError as e:
+            self.logger.debug("Error while decoding message %r: %s",
+                              message, str(e))
+            return
 
-        if riface not in self.neighbours[iface][vlan].setdefault(uid, []):
-            self.neighbours[iface][vlan][uid].append(riface)
+        uids = self.neighbours[iface].setdefault(vlan, {})
+        if riface not in uids.setdefault(uid, []):
+            self.logger.debug("Found neighbour: iface=%s vlan=%s "
+                              "uid=%s riface=%s", iface, vlan, uid, riface)
+            uids[uid].append(riface)
 
     def get_probe_frames(self, iface, vlan=False):
         if iface not in self.neighbours:
@@ -496,7 +444,8 @@ class Listener(Actor):
         """
         We do not use scapy filtering because it is slow. Instead we use
         python binding to extreamely fast libpcap library to filter out
-        probing packages.
+        probing packages. Frames are decoded without scapy too,
+        see decode_probe_frame.
         """
         pc = pcap.pcap(iface)
         filter_string = 'udp and dst port {0}'.format(self.config['dport'])
@@ -504,22 +453,13 @@ class Listener(Actor):
             filter_string = 'vlan and {0}'.format(filter_string)
         pc.setfilter(filter_string)
 
-        def fltr(p):
-            try:
-                received_msg = str(p[scapy.UDP].payload)[:p[scapy.UDP].len]
-                decoded_msg = received_msg.decode()
-                return decoded_msg.startswith(self.config["cookie"])
-            except Exception as e:
-                self.logger.debug("Error while filtering packet: %s", str(e))
-                return False
-
-        pprn = functools.partial(self.fprn, iface=iface)
+        cookie = str(self.config["cookie"])
         try:
             while True:
                 ts, pkt = pc.next()
-                p = scapy.Ether(pkt)
-                if fltr(p):
-                    pprn(p)
+                probe = decode_probe_frame(pkt, cookie)
+                if probe is not None:
+                    self.add_neighbour(iface, *probe)
         except (KeyboardInterrupt, SystemExit):
             pass
 
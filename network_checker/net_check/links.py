@@ -0,0 +1,98 @@
+#    Copyright 2014 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""State of network links read and changed in bulk with iproute2,
+so the number of `ip` calls doesn't depend on the number of links.
+"""
+
+import os
+import re
+import subprocess
+
+
+DUMP_COMMAND = ('ip', '-o', '-d', 'link', 'show')
+BATCH_COMMAND = ('ip', '-force', '-batch', '-')
+
+# line of `ip -o -d link show` output
+LINK_RE = re.compile(
+    r"^\d+:\s+(?P<name>[^:@\s]+)(@(?P<parent>[^:\s]+))?:\s+"
+    r"<(?P<flags>[^>]*)>(.*\svlan\s+(protocol\s+\S+\s+)?id\s+(?P<vid>\d+))?")
+
+
+def _execute(command, stdin=None):
+    env = dict(os.environ, PATH="/bin:/usr/bin:/sbin:/usr/sbin")
+    p = subprocess.Popen(command, env=env,
+                         stdin=subprocess.PIPE if stdin else None,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return p.communicate(stdin)
+
+
+def parse_links(lines):
+    """Parse lines of `ip -o -d link show` output.
+
+    :param lines: lines of output
+    :returns: dict of link name to (parent, vid, is_up) tuples,
+        parent and vid are None for links which are not vlans
+    """
+    links = {}
+    for line in lines:
+        m = LINK_RE.search(line)
+        if m:
+            vid = m.group('vid')
+            links[m.group('name')] = (
+                m.group('parent') if vid else None,
+                int(vid) if vid else None,
+                'UP' in m.group('flags').split(','))
+    return links
+
+
+def dump_links():
+    """Read state of all links with one `ip` call.
+
+    :returns: (links, lines) tuple, links as returned by
+        :func:`parse_links` and raw lines of output for logging
+    """
+    output, _ = _execute(DUMP_COMMAND)
+    lines = output.splitlines()
+    return parse_links(lines), lines
+
+
+def is_up(links, name):
+    """Whether link exists in dump and is up."""
+    return name in links and links[name][2]
+
+
+def vlan_links(links):
+    """Names of existing vlan links.
+
+    :returns: dict of (parent, vid) pairs to link names
+    """
+    return dict(((parent, vid), name)
+                for name, (parent, vid, _) in links.iteritems()
+                if vid is not None)
+
+
+def ip_batch(commands):
+    """Apply `ip` commands with one `ip -batch` call. Failed
+    commands don't stop the rest, so the result should be
+    checked with :func:`dump_links`.
+
+    :param commands: list of `ip` commands without leading 'ip'
+    :returns: error output of failed commands
+    """
+    if not commands:
+        return ''
+    _, errors = _execute(BATCH_COMMAND,
+                         stdin=''.join(c + '\n' for c in commands))
+    return errors
@@ -13,6 +13,7 @@
 #    under the License.
 
 import json
+import logging
 import multiprocessing
 import os
 import signal
@@ -20,10 +21,12 @@ import socket
 import time
 import unittest
 
+from mock import patch
 import pcap
 from scapy import all as scapy
 
 from net_check import api
+from net_check import links
 
 
 class BaseListenerTestCase(unittest.TestCase):
@@ -119,6 +122,189 @@ class TestCaseListenerCorruptedData(BaseListenerTestCase):
         self.assertEqual(data, {u'eth0': {u'0': {u'2': [u'eth0']}}})
 
 
+IP_LINK_DUMP = [
+    "1: lo: <LOOPBACK,UP,LOWER_UP> mtu 65536 qdisc noqueue state UNKNOWN "
+    "mode DEFAULT group default\\    link/loopback 00:00:00:00:00:00 brd "
+    "00:00:00:00:00:00 promiscuity 0",
+    "2: eth0: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 qdisc pfifo_fast "
+    "state UP mode DEFAULT group default qlen 1000\\    link/ether "
+    "52:54:00:12:34:56 brd ff:ff:ff:ff:ff:ff promiscuity 0",
+    "3: eth1: <BROADCAST,MULTICAST> mtu 1500 qdisc noop state DOWN "
+    "mode DEFAULT group default qlen 1000\\    link/ether "
+    "52:54:00:12:34:57 brd ff:ff:ff:ff:ff:ff promiscuity 0",
+    "4: vlan100@eth0: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 qdisc "
+    "noqueue state UP mode DEFAULT group default\\    link/ether "
+    "52:54:00:12:34:56 brd ff:ff:ff:ff:ff:ff promiscuity 0 \\    vlan "
+    "protocol 802.1Q id 100 <REORDER_HDR> addrgenmode eui64",
+    "",
+]
+
+
+class TestLinks(unittest.TestCase):
+
+    def test_parse_links(self):
+        self.assertEqual(links.parse_links(IP_LINK_DUMP), {
+            'lo': (None, None, True),
+            'eth0': (None, None, True),
+            'eth1': (None, None, False),
+            'vlan100': ('eth0', 100, True)})
+
+    def test_vlan_links(self):
+        state = links.parse_links(IP_LINK_DUMP)
+        self.assertEqual(links.vlan_links(state), {('eth0', 100): 'vlan100'})
+        self.assertTrue(links.is_up(state, 'eth0'))
+        self.assertFalse(links.is_up(state, 'eth1'))
+        self.assertFalse(links.is_up(state, 'eth2'))
+
+    @patch('net_check.links._execute', return_value=('', ''))
+    def test_ip_batch(self, execute):
+        links.ip_batch(['link set dev eth1 up', 'link set dev eth2 up'])
+        execute.assert_called_once_with(
+            links.BATCH_COMMAND,
+            stdin='link set dev eth1 up\nlink set dev eth2 up\n')
+
+        execute.reset_mock()
+        links.ip_batch([])
+        self.assertFalse(execute.called)
+
+
+class LinksActor(api.Actor):
+
+    logger = logging.getLogger('net_check_test')
+
+    def __init__(self):
+        with patch.object(api.Actor, '_execute'):
+            super(LinksActor, self).__init__()
+
+
+@patch('net_check.links.ip_batch', return_value='')
+@patch('net_check.links.dump_links')
+class TestActorLinks(unittest.TestCase):
+
+    def setUp(self):
+        self.actor = LinksActor()
+
+    def dumps(self, *dumps):
+        return [(links.parse_links(d), d) for d in dumps]
+
+    def test_ifaces_already_up(self, dump_links, ip_batch):
+        dump_links.side_effect = self.dumps(IP_LINK_DUMP)
+        self.actor._ensure_ifaces_up(['eth0', 'eth0', 'vlan100'])
+        self.actor._ensure_ifaces_restored()
+        self.assertFalse(ip_batch.called)
+        self.assertEqual(dump_links.call_count, 1)
+
+    def test_changes_are_applied_in_one_batch(self, dump_links, ip_batch):
+        ifaces_up = IP_LINK_DUMP + [
+            "5: eth1: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500",
+            "6: eth2: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500"]
+        dump_links.side_effect = self.dumps(
+            IP_LINK_DUMP + ["6: eth2: <BROADCAST,MULTICAST> mtu 1500"],
+            ifaces_up, IP_LINK_DUMP)
+
+        self.actor._ensure_ifaces_up(['eth0', 'eth1', 'eth2', 'eth1'])
+        ip_batch.assert_called_once_with(
+            ['link set dev eth1 up', 'link set dev eth2 up'])
+
+        self.actor._ensure_ifaces_restored()
+        ip_batch.assert_called_with(
+            ['link set dev eth1 down', 'link set dev eth2 down'])
+        self.assertEqual(ip_batch.call_count, 2)
+        self.assertEqual(dump_links.call_count, 3)
+        self.assertEqual(self.actor.iface_down_after, {})
+
+    def test_failed_changes_are_reported(self, dump_links, ip_batch):
+        dump_links.side_effect = self.dumps(IP_LINK_DUMP, IP_LINK_DUMP)
+        self.assertRaises(
+            api.ActorException,
+            self.actor._ensure_ifaces_up, ['eth1', 'eth2'])
+        ip_batch.assert_called_once_with(
+            ['link set dev eth1 up', 'link set dev eth2 up'])
+        self.assertEqual(
+            self.actor.iface_down_after, {'eth1': True, 'eth2': True})
+
+
+class TestProbeFrameDecoding(unittest.TestCase):
+
+    def setUp(self):
+        directory_path = os.path.dirname(__file__)
+        self.frames = [str(p) for p in scapy.rdpcap(
+            os.path.join(directory_path, 'vlan.pcap'))]
+        self.cookie = 'Nailgun:'
+
+    def probe(self, data, vlans=(), **udp):
+        p = scapy.Ether(dst="ff:ff:ff:ff:ff:ff")
+        for vlan in vlans:
+            p = p / scapy.Dot1Q(vlan=vlan)
+        p = p / scapy.IP(src='1.0.0.0', dst='1.0.0.0')
+        p = p / scapy.UDP(sport=31337, dport=31337, **udp) / data
+        return str(p)
+
+    def test_fast_path_matches_scapy(self):
+        for frame in self.frames:
+            self.assertEqual(
+                api.decode_probe_frame(frame, self.cookie),
+                api._decode_probe_frame_with_scapy(frame, self.cookie))
+
+    def test_pcap_file_frames(self):
+        probes = set(
+            api.decode_probe_frame(frame, self.cookie)
+            for frame in self.frames)
+        self.assertEqual(probes, set(
+            (vlan, 'Nailgun:eth0 {0}'.format(uid))
+            for vlan in xrange(100, 108) for uid in (1, 2)))
+
+    def test_untagged_frame(self):
+        self.assertEqual(
+            api.decode_probe_frame(self.probe('Nailgun:eth1 3'), self.cookie),
+            (0, 'Nailgun:eth1 3'))
+
+    def test_payload_is_cut_by_udp_length(self):
+        frame = self.probe('Nailgun:eth0 27h 7\00\00\00', len=22)
+        self.assertEqual(
+            api.decode_probe_frame(frame, self.cookie), (0, 'Nailgun:eth0 2'))
+
+    def test_frame_without_cookie(self):
+        self.assertIsNone(
+            api.decode_probe_frame(self.probe('Other:eth0 2'), self.cookie))
+
+    def test_unusual_frame_is_decoded_by_scapy(self):
+        frame = self.probe('Nailgun:eth0 2', vlans=(10, 20))
+        with patch.object(api, '_decode_probe_frame_with_scapy') as decode:
+            api.decode_probe_frame(frame, self.cookie)
+        decode.assert_called_once_with(frame, self.cookie)
+        self.assertEqual(
+            api.decode_probe_frame(frame, self.cookie),
+            (10, 'Nailgun:eth0 2'))
+
+    def test_truncated_frame(self):
+        frame = self.probe('Nailgun:eth0 2')[:30]
+        self.assertIsNone(api.decode_probe_frame(frame, self.cookie))
+
+
+class TestProbeFrameDecodingBenchmark(unittest.TestCase):
+
+    replays = 50
+    min_speedup = 20
+
+    def setUp(self):
+        directory_path = os.path.dirname(__file__)
+        self.frames = [str(p) for p in scapy.rdpcap(
+            os.path.join(directory_path, 'vlan.pcap'))]
+
+    def replay(self, decode):
+        started_at = time.time()
+        for _ in xrange(self.replays):
+            for frame in self.frames:
+                decode(frame, 'Nailgun:')
+        return time.time() - started_at
+
+    def test_fast_path_speedup(self):
+        fast = self.replay(api.decode_probe_frame)
+        slow = self.replay(api._decode_probe_frame_with_scapy)
+        self.assertGreater(slow / fast, self.min_speedup)
+
+
 class TestNetCheckSender(unittest.TestCase):
 
     def setUp(self):